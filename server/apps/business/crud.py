@@ -587,6 +587,48 @@ async def update_user_entitlement(db: AsyncSession, entitlement_id: str, user_en
     await db.refresh(user_entitlement)
     return user_entitlement
 
+async def reserve_user_entitlement_quota(db: AsyncSession, entitlement_id: str, count: int):
+    """
+    原子扣减用户权益当日剩余次数
+    只有剩余次数足够时才扣减，避免并发请求超额使用
+    :param count: 扣减次数
+    :return: 扣减后的剩余次数，额度不足时返回 None
+    """
+    try:
+        stmt = update(User_entitlements).where(
+            User_entitlements.entitlement_id == entitlement_id,
+            User_entitlements.daily_remaining >= count
+        ).values(
+            daily_remaining=User_entitlements.daily_remaining - count
+        ).returning(User_entitlements.daily_remaining)
+        result = await db.execute(stmt)
+        remaining = result.scalar_one_or_none()
+        await db.commit()
+        return remaining
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def release_user_entitlement_quota(db: AsyncSession, entitlement_id: str, count: int):
+    """
+    退还用户权益当日剩余次数(预扣后检测失败时使用)
+    :param count: 退还次数
+    :return: 退还后的剩余次数
+    """
+    try:
+        stmt = update(User_entitlements).where(
+            User_entitlements.entitlement_id == entitlement_id
+        ).values(
+            daily_remaining=User_entitlements.daily_remaining + count
+        ).returning(User_entitlements.daily_remaining)
+        result = await db.execute(stmt)
+        remaining = result.scalar_one_or_none()
+        await db.commit()
+        return remaining
+    except Exception as e:
+        await db.rollback()
+        raise e
+
 async def delete_user_entitlement(db: AsyncSession, entitlement_id: str):
     """
     删除用户权益
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from core.logger import setup_logger
+from apps.vio_word.config import VIO_FAKE_LATENCY, VIO_FAKE_OUTPUTS_PATH, VIO_FAKE_SEED, VIO_RECORD_DIR
+from apps.vio_word.prompts import SYSTEM_PROMPT_DETECT, SYSTEM_PROMPT_OPTIMIZE, SYSTEM_PROMPT_SCORE, SYSTEM_PROMPT_COMBINED
+
+# 设置日志记录器
+logger = setup_logger('vio_word_backends')
+
+"""
+离线大模型后端
+    FakeChatModel         - 进程内假模型，按延迟分布等待后返回固定JSON
+    RecordReplayChatModel - 录制真实响应到磁盘，或从磁盘确定性回放
+用于在无网络环境下压测 /vio_word/check 的吞吐和尾延迟
+"""
+
+DEFAULT_FAKE_OUTPUTS = {
+    "detect": {
+        "is_Violations": "是",
+        "words": "国家级,根治,骨折价",
+        "reason": "国家级属于绝对化用语;根治属于医疗功效宣传;骨折价属于夸张价格用语"
+    },
+    "optimize": {
+        "op": "家人们看好了！这款专利磁疗床垫，睡感舒适，现在下单享受优惠价，点击下方链接了解详情！",
+        "ideas": "删除绝对化用语和医疗功效宣传，价格表述改为优惠价"
+    },
+    "score": {
+        "old_score": 35,
+        "new_score": 95,
+        "old_rating": "业余",
+        "new_rating": "大师"
+    }
+}
+DEFAULT_FAKE_OUTPUTS["combined"] = {
+    **DEFAULT_FAKE_OUTPUTS["detect"],
+    **DEFAULT_FAKE_OUTPUTS["optimize"],
+    **DEFAULT_FAKE_OUTPUTS["score"]
+}
+
+# 模板渲染后 {{ }} 会变为 { }，按渲染后的系统消息识别阶段
+STAGE_BY_SYSTEM_PROMPT = {
+    prompt.replace("{{", "{").replace("}}", "}"): stage
+    for prompt, stage in (
+        (SYSTEM_PROMPT_DETECT, "detect"),
+        (SYSTEM_PROMPT_OPTIMIZE, "optimize"),
+        (SYSTEM_PROMPT_SCORE, "score"),
+        (SYSTEM_PROMPT_COMBINED, "combined")
+    )
+}
+
+
+class LatencyModel:
+    """
+    延迟分布
+    fixed:300         固定 300ms
+    uniform:100,500   100ms ~ 500ms 均匀分布
+    lognormal:300,0.4 中位数 300ms、sigma 0.4 的对数正态分布(长尾)
+    """
+
+    def __init__(self, spec: str = VIO_FAKE_LATENCY, seed: Optional[int] = None):
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        values = [float(value) for value in params.split(",") if value.strip()]
+        if self.kind == "fixed" and len(values) == 1:
+            self.params = [values[0] / 1000]
+        elif self.kind == "uniform" and len(values) == 2:
+            self.params = [values[0] / 1000, values[1] / 1000]
+        elif self.kind == "lognormal" and len(values) == 2:
+            self.params = [values[0] / 1000, values[1]]
+        else:
+            raise ValueError(f"不支持的延迟分布: {spec}")
+        self.random = random.Random(seed)
+
+    def sample(self) -> float:
+        """采样一次延迟(秒)"""
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.random.uniform(self.params[0], self.params[1])
+        return self.random.lognormvariate(math.log(self.params[0]), self.params[1])
+
+
+def load_fake_outputs(path: str = VIO_FAKE_OUTPUTS_PATH) -> Dict[str, dict]:
+    """加载假模型输出，文件中的阶段覆盖内置输出"""
+    outputs = dict(DEFAULT_FAKE_OUTPUTS)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            outputs.update(json.load(f))
+    return outputs
+
+
+class FakeChatModel(BaseChatModel):
+    """按系统提示词识别阶段并返回固定JSON的本地假模型，支持流式输出"""
+    latency: Any = None
+    outputs: Dict[str, dict] = {}
+    chunk_size: int = 8
+
+    def __init__(self, latency=None, outputs=None, **kwargs):
+        if latency is None:
+            latency = LatencyModel(seed=int(VIO_FAKE_SEED) if VIO_FAKE_SEED else None)
+        elif isinstance(latency, (int, float)):
+            latency = LatencyModel(f"fixed:{latency * 1000}")
+        super().__init__(latency=latency, outputs=outputs or load_fake_outputs(), **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-vio-word"
+
+    def _content(self, messages: List[BaseMessage]) -> str:
+        stage = STAGE_BY_SYSTEM_PROMPT.get(messages[0].content) if messages else None
+        output = self.outputs.get(stage, {"is_Violations": "否"})
+        return json.dumps(output, ensure_ascii=False)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency.sample())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._content(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency.sample())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._content(messages)))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        content = self._content(messages)
+        chunks = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        # 总延迟按分布采样，平均分摊到各个分片
+        delay = self.latency.sample() / max(1, len(chunks))
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """
+    录制/回放模型
+    record 模式调用内部真实模型并把响应写入 record_dir；replay 模式只读磁盘，未录制的请求直接报错
+    录制键 = 模型名称 + 全部消息内容的哈希，同一请求总是回放同一响应
+    """
+    inner: Any = None
+    mode: str = "replay"
+    record_dir: str = VIO_RECORD_DIR
+    model_name: str = ""
+    chunk_size: int = 8
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}-vio-word"
+
+    def _key(self, messages: List[BaseMessage]) -> str:
+        digest = hashlib.sha256(self.model_name.encode("utf-8"))
+        for message in messages:
+            digest.update(b"\x00")
+            digest.update(message.type.encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(str(message.content).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.record_dir, key[:2], f"{key}.json")
+
+    def _load(self, messages: List[BaseMessage]) -> str:
+        key = self._key(messages)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except FileNotFoundError:
+            raise LookupError(f"未找到录制的响应: {key}")
+
+    def _save(self, messages: List[BaseMessage], content: str):
+        key = self._key(messages)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            "model": self.model_name,
+            "messages": [{"type": message.type, "content": message.content} for message in messages],
+            "content": content
+        }
+        # 先写临时文件再原子替换，避免并发录制写出半个文件
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "replay":
+            content = self._load(messages)
+        else:
+            content = self.inner.invoke(messages).content
+            self._save(messages, content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.mode == "replay":
+            content = self._load(messages)
+        else:
+            content = (await self.inner.ainvoke(messages)).content
+            self._save(messages, content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.mode == "replay":
+            content = self._load(messages)
+            for i in range(0, len(content), self.chunk_size):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + self.chunk_size]))
+            return
+
+        parts = []
+        try:
+            async for chunk in self.inner.astream(messages):
+                parts.append(chunk.content)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+        except GeneratorExit:
+            # 调用方拿到完整的JSON对象后提前关闭流，录制已收到的部分
+            self._save(messages, "".join(parts))
+            raise
+        self._save(messages, "".join(parts))
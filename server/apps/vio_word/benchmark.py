@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+from apps.vio_word.backends import FakeChatModel, LatencyModel
+from apps.vio_word.metrics import percentile
+
+"""
+违规词检测性能基准
+使用本地假模型，不访问网络
+    python -m apps.vio_word.benchmark pipeline --requests 50 --latency 300
+        对比 staged / combined 两种流程模式的 p50/p95 延迟
+    python -m apps.vio_word.benchmark check --requests 500 --concurrency 50 --latency lognormal:300,0.4
+        并发调用完整的 vio_word_check 路径，输出吞吐和尾延迟
+    python -m apps.vio_word.benchmark normalize --rounds 100000
+        话术归一化单次耗时(每120字符)
+    python -m apps.vio_word.benchmark tokens
+        各阶段提示词的 token 构成(系统提示词 / 输入)和预算
+    python -m apps.vio_word.benchmark history --rows 1000000
+        在临时 SQLite 库中逐步写入检测记录，输出各数据量下按手机号分页查询和全文检索的耗时
+"""
+
+# 检测记录检索基准中只有少量记录包含的短语
+RARE_PHRASE = "量子共振理疗仪"
+SAMPLE_INPUT = "家人们看好了！这款国家级专利的磁疗床垫，彻底根治腰间盘突出！现在下单直接砍到骨折价，点击下方链接马上抢购！无效全额退款！"
+
+
+def report(name: str, latencies: List[float]):
+    """打印延迟统计(毫秒)"""
+    ms = [value * 1000 for value in latencies]
+    print(f"{name:<12} n={len(ms):<6} p50={percentile(ms, 50):9.2f}ms  p95={percentile(ms, 95):9.2f}ms  "
+          f"p99={percentile(ms, 99):9.2f}ms  max={max(ms):9.2f}ms")
+
+
+async def bench_pipeline(requests: int, latency: float):
+    """对比 staged / combined 两种流程模式的端到端延迟"""
+    from apps.vio_word.core import run_pipeline
+    model = FakeChatModel(latency=latency)
+    for mode in ("staged", "combined"):
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                await run_pipeline(SAMPLE_INPUT, [], mode=mode, model=model)
+            latencies.append(time.perf_counter() - start)
+        report(mode, latencies)
+
+
+async def bench_check(requests: int, concurrency: int, latency: str, use_cache: bool):
+    """并发调用完整的 vio_word_check 路径(预过滤、缓存、大模型流程)，输出吞吐和尾延迟"""
+    from apps.vio_word.core import vio_word_check, result_cache
+    from apps.vio_word.llm import LLMRegistry, build_chains
+
+    LLMRegistry._model = FakeChatModel(latency=LatencyModel(latency, seed=42))
+    LLMRegistry._chains = build_chains(LLMRegistry._model)
+    result_cache.enabled = use_cache
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            # 每个请求使用不同的输入，避免被缓存吸收
+            result = await vio_word_check(f"{SAMPLE_INPUT}{index}")
+            latencies.append(time.perf_counter() - start)
+            if result == False:
+                failures += 1
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    report("check", latencies)
+    print(f"throughput={requests / elapsed:.1f} req/s  elapsed={elapsed:.2f}s  concurrency={concurrency}  failures={failures}")
+
+
+def bench_normalize(rounds: int):
+    """归一化耗时: 普通话术、含不可见字符/表情/繁体/全角的话术、含干扰符号的话术"""
+    from apps.vio_word.normalize import normalize_uncached
+    samples = {
+        "plain": SAMPLE_INPUT,
+        "noisy": SAMPLE_INPUT.replace("国家级", "國\u200b家級🔥").replace("骨折价", "骨折價").replace("！", "！！😀"),
+        "filler": SAMPLE_INPUT.replace("国家级", "国*家*级").replace("根治", "根 治")
+    }
+    for name, text in samples.items():
+        text = (text * (120 // len(text) + 1))[:120]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            normalize_uncached(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} chars={len(text)}  {elapsed / rounds * 1e6:8.2f}us/op")
+
+
+def bench_tokens():
+    """各阶段提示词 token 构成，按示例话术展开"""
+    from core.tokens import count_messages, count_tokens, tokenizer_name, load_encoder
+    from apps.vio_word.budget import TOKEN_BUDGETS
+    from apps.vio_word.prompts import PROMPT_DETECT, PROMPT_OPTIMIZE, PROMPT_SCORE, PROMPT_COMBINED
+    stages = {
+        "detect": (PROMPT_DETECT, {"input": SAMPLE_INPUT}),
+        "optimize": (PROMPT_OPTIMIZE, {"input": SAMPLE_INPUT, "words": "国家级,根治,骨折价", "reason": "绝对化用语;医疗功效;诱导交易"}),
+        "score": (PROMPT_SCORE, {"input": SAMPLE_INPUT, "op": SAMPLE_INPUT}),
+        "combined": (PROMPT_COMBINED, {"input": SAMPLE_INPUT})
+    }
+    asyncio.run(load_encoder())
+    print(f"tokenizer={tokenizer_name()}")
+    for stage, (prompt, inputs) in stages.items():
+        messages = [{"role": message.type, "content": message.content} for message in prompt.format_messages(**inputs)]
+        system = sum(count_tokens(message["content"]) for message in messages if message["role"] == "system")
+        total = count_messages(messages)
+        print(f"{stage:<10} total={total:<6} system={system:<6} ({system / total:6.1%})  budget={TOKEN_BUDGETS.get(stage, '-')}")
+
+
+async def bench_history(rows: int, rounds: int):
+    """
+    检测记录分页查询耗时随表行数的变化
+    目标手机号固定 200 条记录，高频手机号占总行数的 5%，其余记录分散在 10 万个手机号上；
+    按手机号的分页查询应与总行数无关，全表列表的 COUNT 和排序仍需扫描全表，仅作对照；
+    高频手机号的最后一页对比页码分页(OFFSET 逐行跳过)和游标分页(不统计总数)；
+    每 1000 条记录中有 1 条包含罕见短语，对比 FTS 检索罕见短语、检索所有记录都包含的词(命中超过上限，按时间倒序)和 2 字短词(LIKE 扫描)
+    """
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from core.database import Base
+    from apps.vio_word import crud as vio_word_crud
+    from apps.vio_word.models import Vio_word
+
+    path = os.path.join(tempfile.mkdtemp(prefix="vio_word_bench_"), "history.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    target = "13800000000"
+    heavy = "13700000000"
+    rng = random.Random(42)
+    base_time = datetime(2026, 1, 1)
+
+    def make_rows(start: int, count: int):
+        return [{
+            "phone": target if (start + index) % max(rows // 200, 1) == 0
+            else heavy if (start + index) % 20 == 1 else f"139{rng.randrange(100000):08d}",
+            "input": RARE_PHRASE + SAMPLE_INPUT[:40] if (start + index) % 1000 == 7 else SAMPLE_INPUT,
+            "is_violation": True,
+            "words": "国家级,根治",
+            "reasons": "绝对化用语;医疗功效",
+            "op": SAMPLE_INPUT,
+            "ideas": "",
+            "old_score": 40,
+            "new_score": 90,
+            "old_rating": "高风险",
+            "new_rating": "低风险",
+            "created_at": base_time + timedelta(seconds=start + index),
+            "is_deleted": False
+        } for index in range(count)]
+
+    async def timed(filters: dict, page: int):
+        latencies = []
+        for _ in range(rounds):
+            async with session_factory() as db:
+                start = time.perf_counter()
+                await vio_word_crud.get_vio_words_by_filters(db, filters=filters, order_by={"created_at": "desc"},
+                                                             page=page, page_size=10)
+                latencies.append(time.perf_counter() - start)
+        return percentile([value * 1000 for value in latencies], 50)
+
+    async def timed_cursor(cursor: str):
+        latencies = []
+        for _ in range(rounds):
+            async with session_factory() as db:
+                start = time.perf_counter()
+                await vio_word_crud.get_vio_words_by_cursor(db, heavy, cursor=cursor, page_size=10, with_total=False)
+                latencies.append(time.perf_counter() - start)
+        return percentile([value * 1000 for value in latencies], 50)
+
+    async def timed_search(terms: List[str]):
+        latencies = []
+        for _ in range(rounds):
+            async with session_factory() as db:
+                start = time.perf_counter()
+                await vio_word_crud.search_vio_words(db, terms, limit=20)
+                latencies.append(time.perf_counter() - start)
+        return percentile([value * 1000 for value in latencies], 50)
+
+    checkpoints = sorted({max(rows // 100, 1), max(rows // 10, 1), rows})
+    written = 0
+    try:
+        for checkpoint in checkpoints:
+            while written < checkpoint:
+                count = min(50000, checkpoint - written)
+                async with engine.begin() as conn:
+                    await conn.execute(insert(Vio_word), make_rows(written, count))
+                written += count
+            phone_first = await timed({"phone": target}, 1)
+            phone_last = await timed({"phone": target}, 20)
+            all_first = await timed({}, 1)
+            # 高频手机号最后一页: 页码分页与从上一页末尾开始的游标分页
+            heavy_total = (written + 18) // 20
+            last_page = (heavy_total - 1) // 10 + 1
+            async with session_factory() as db:
+                items, _ = await vio_word_crud.get_vio_words_by_filters(
+                    db, filters={"phone": heavy}, order_by={"created_at": "desc"}, page=last_page - 1, page_size=10)
+            heavy_offset = await timed({"phone": heavy}, last_page)
+            heavy_cursor = await timed_cursor(vio_word_crud.encode_cursor(items[-1]))
+            print(f"rows={written:<9} phone page1 p50={phone_first:7.2f}ms  phone page20 p50={phone_last:7.2f}ms  "
+                  f"all page1 p50={all_first:9.2f}ms  heavy page{last_page} offset p50={heavy_offset:7.2f}ms  "
+                  f"cursor p50={heavy_cursor:7.2f}ms")
+            search_rare = await timed_search([RARE_PHRASE])
+            search_common = await timed_search(["国家级专利"])
+            search_short = await timed_search([RARE_PHRASE[:2]])
+            print(f"{'':<15}search rare p50={search_rare:7.2f}ms  common p50={search_common:9.2f}ms  "
+                  f"short(LIKE) p50={search_short:7.2f}ms")
+    finally:
+        await engine.dispose()
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="违规词检测性能基准")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="对比 staged / combined 流程模式延迟")
+    pipeline_parser.add_argument("--requests", type=int, default=50, help="每种模式的请求次数")
+    pipeline_parser.add_argument("--latency", type=float, default=300, help="假模型单次调用延迟(毫秒)")
+
+    check_parser = subparsers.add_parser("check", help="并发压测完整检测路径")
+    check_parser.add_argument("--requests", type=int, default=500, help="请求总数")
+    check_parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    check_parser.add_argument("--latency", default="lognormal:300,0.4", help="假模型延迟分布")
+    check_parser.add_argument("--cache", action="store_true", help="启用结果缓存")
+
+    normalize_parser = subparsers.add_parser("normalize", help="话术归一化耗时")
+    normalize_parser.add_argument("--rounds", type=int, default=100000, help="每种话术的执行次数")
+
+    subparsers.add_parser("tokens", help="各阶段提示词 token 构成")
+
+    history_parser = subparsers.add_parser("history", help="检测记录分页查询耗时")
+    history_parser.add_argument("--rows", type=int, default=1000000, help="写入的检测记录总数")
+    history_parser.add_argument("--rounds", type=int, default=20, help="每种查询的执行次数")
+
+    args = parser.parse_args()
+    if args.command == "pipeline":
+        asyncio.run(bench_pipeline(args.requests, args.latency / 1000))
+    elif args.command == "check":
+        asyncio.run(bench_check(args.requests, args.concurrency, args.latency, args.cache))
+    elif args.command == "normalize":
+        bench_normalize(args.rounds)
+    elif args.command == "tokens":
+        bench_tokens()
+    elif args.command == "history":
+        asyncio.run(bench_history(args.rows, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import json
+from typing import Dict, Optional, Tuple
+from langchain_core.prompts import ChatPromptTemplate
+from core.tokens import count_messages, count_tokens, truncate_tokens
+from apps.vio_word.config import VIO_TOKEN_BUDGETS
+
+"""
+各阶段提示词 token 预算
+调用前按阶段提示词模板展开消息并计数，超过预算时从最长的输入字段开始截断，
+系统提示词不截断；调用后按返回结果估算输出 token 数
+"""
+
+
+def parse_token_budgets(spec: str) -> Dict[str, int]:
+    """解析 "detect:1500,optimize:1200" 形式的分阶段 token 预算"""
+    budgets = {}
+    for item in spec.split(","):
+        stage, _, tokens = item.partition(":")
+        if stage.strip() and tokens.strip():
+            budgets[stage.strip()] = int(tokens)
+    return budgets
+
+
+TOKEN_BUDGETS = parse_token_budgets(VIO_TOKEN_BUDGETS)
+
+
+def prompt_messages(chain, inputs: dict) -> Optional[list]:
+    """按调用链的提示词模板展开消息 [{"role", "content"}]，调用链不以提示词模板开头时返回 None"""
+    prompt = getattr(chain, "first", None)
+    if not isinstance(prompt, ChatPromptTemplate):
+        return None
+    return [{"role": message.type, "content": message.content} for message in prompt.format_messages(**inputs)]
+
+
+def apply_budget(stage: str, chain, inputs: dict, budgets: Dict[str, int] = TOKEN_BUDGETS) -> Tuple[dict, dict]:
+    """
+    统计提示词 token 数，超过阶段预算时截断输入字段
+    :return: (实际使用的输入, {"prompt", "system", "truncated"})
+    """
+    messages = prompt_messages(chain, inputs)
+    if messages is None:
+        return inputs, {"prompt": 0, "system": 0, "truncated": False}
+    budget = budgets.get(stage, 0)
+    truncated = False
+    total = count_messages(messages)
+    fields = [key for key, value in inputs.items() if isinstance(value, str)]
+    # 计数按整段文本计算，截断后可能仍略超预算，多留两次修正机会
+    for _ in range(len(fields) + 2):
+        if budget <= 0 or total <= budget:
+            break
+        # 每次截断当前最长的字段
+        key = max(fields, key=lambda name: count_tokens(inputs[name]))
+        value = inputs[key]
+        shortened = truncate_tokens(value, count_tokens(value) - (total - budget))
+        if shortened == value:
+            break
+        inputs = {**inputs, key: shortened}
+        truncated = True
+        messages = prompt_messages(chain, inputs)
+        total = count_messages(messages)
+    system = sum(count_tokens(message["content"]) for message in messages if message["role"] == "system")
+    return inputs, {"prompt": total, "system": system, "truncated": truncated}
+
+
+def completion_tokens(result) -> int:
+    """返回结果的 token 数(解析后的 JSON 按紧凑序列化计)"""
+    if result is None:
+        return 0
+    if not isinstance(result, str):
+        result = json.dumps(result, ensure_ascii=False)
+    return count_tokens(result)
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+from core.cache import Cache
+from core.logger import setup_logger
+from apps.vio_word.config import VIO_CACHE_ENABLED, VIO_CACHE_MAX_SIZE, VIO_CACHE_TTL, VIO_CACHE_REDIS
+from apps.vio_word.normalize import normalize
+
+# 设置日志记录器
+logger = setup_logger('vio_word_cache')
+
+"""
+违规词检测结果缓存
+缓存键 = 版本号 + 归一化输入的哈希，版本号由提示词、模型名称等计算得出，
+任何一项变化都会生成新的键空间，旧缓存自然失效
+一级缓存为进程内LRU(带TTL)，二级缓存为Redis(基于 core.cache.Cache)
+"""
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_input(text: str) -> str:
+    """归一化输入: 规范化(全半角、繁简、形近字、不可见字符等)后去除首尾及多余空白"""
+    return _WHITESPACE_RE.sub(" ", normalize(text).text).strip()
+
+
+def make_version(*parts) -> str:
+    """根据提示词、模型名称等计算缓存版本号"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:12]
+
+
+class ResultCache:
+    def __init__(self, namespace: str, version: str, max_size: int = VIO_CACHE_MAX_SIZE,
+                 ttl: int = VIO_CACHE_TTL, use_redis: bool = VIO_CACHE_REDIS, enabled: bool = VIO_CACHE_ENABLED):
+        self.namespace = namespace
+        self.version = version
+        self.max_size = max_size
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.enabled = enabled
+        self._store: "OrderedDict[str, tuple]" = OrderedDict()
+        self.counters = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expired": 0
+        }
+
+    def key(self, text: str) -> str:
+        """计算缓存键"""
+        digest = hashlib.sha256(normalize_input(text).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{self.version}:{digest}"
+
+    def _redis_available(self) -> bool:
+        # 只在Redis已初始化时使用，避免请求路径上触发重连等待
+        return self.use_redis and Cache._initialized
+
+    def _memory_get(self, key: str) -> Optional[dict]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expire_at, value = entry
+        if expire_at < time.monotonic():
+            del self._store[key]
+            self.counters["expired"] += 1
+            return None
+        self._store.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: dict):
+        self._store[key] = (time.monotonic() + self.ttl, value)
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_size:
+            self._store.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def get(self, text: str) -> Optional[dict]:
+        """
+        获取缓存结果
+        :param text: 原始输入
+        :return: 检测结果，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        key = self.key(text)
+
+        value = self._memory_get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+
+        if self._redis_available():
+            value = await Cache.get(key)
+            if value is not None:
+                self.counters["redis_hits"] += 1
+                self._memory_set(key, value)
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, text: str, value: dict):
+        """
+        写入缓存结果
+        :param text: 原始输入
+        :param value: 检测结果
+        """
+        if not self.enabled:
+            return
+        key = self.key(text)
+        self._memory_set(key, value)
+        self.counters["sets"] += 1
+
+        if self._redis_available():
+            try:
+                await Cache.set(key, value, expire=self.ttl)
+            except Exception as e:
+                logger.error(f"写入Redis检测结果缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空进程内缓存"""
+        self._store.clear()
+
+    def stats(self) -> dict:
+        """缓存命中统计"""
+        hits = self.counters["memory_hits"] + self.counters["redis_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "size": len(self._store),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "redis": self._redis_available(),
+            "hits": hits,
+            **self.counters,
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
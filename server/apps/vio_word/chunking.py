@@ -0,0 +1,124 @@
+import hashlib
+import re
+from typing import List, Tuple
+from apps.vio_word.config import VIO_CHUNK_MAX_CHARS, VIO_CHUNK_BOUNDARY_MOD
+from apps.vio_word.scoring import rating_for
+
+"""
+长话术分段检测
+按句子边界切分整段直播话术，相邻句子合并为不超过 VIO_CHUNK_MAX_CHARS 的分段，
+各分段分别检测(分别命中缓存)后合并为一个结果
+
+分段边界由句子内容决定(句子哈希满足条件处断开)，修改某一句只影响它所在的分段，
+其余分段内容不变，重新检测时直接命中缓存
+"""
+
+# 句末标点，后面紧跟的引号、括号归入同一句
+SENTENCE_END = re.compile(r"[^。！？!?；;\n]*(?:[。！？!?；;\n]+[”’」』）)]*|$)")
+# 句子超长时的次级切分点
+CLAUSE_END = re.compile(r"[^，,、：:]*(?:[，,、：:]+|$)")
+
+
+def _split(text: str, pattern: re.Pattern, start: int = 0) -> List[Tuple[int, int]]:
+    spans = []
+    for match in pattern.finditer(text):
+        if match.end() > match.start():
+            spans.append((start + match.start(), start + match.end()))
+    return spans
+
+
+def split_sentences(text: str, max_chars: int = VIO_CHUNK_MAX_CHARS) -> List[Tuple[int, int]]:
+    """
+    按句子切分，超长的句子再按逗号切分，仍超长的直接按长度截断
+    :return: 句子在原文中的 (start, end) 偏移列表
+    """
+    spans = []
+    for start, end in _split(text, SENTENCE_END):
+        if end - start <= max_chars:
+            spans.append((start, end))
+            continue
+        for clause_start, clause_end in _split(text[start:end], CLAUSE_END, start):
+            for offset in range(clause_start, clause_end, max_chars):
+                spans.append((offset, min(offset + max_chars, clause_end)))
+    return spans
+
+
+def _is_boundary(sentence: str) -> bool:
+    digest = hashlib.md5(sentence.encode("utf-8")).digest()
+    return digest[0] % VIO_CHUNK_BOUNDARY_MOD == 0
+
+
+def split_chunks(text: str, max_chars: int = VIO_CHUNK_MAX_CHARS) -> List[Tuple[int, int]]:
+    """
+    把句子合并为检测分段
+    :return: 分段在原文中的 (start, end) 偏移列表，首尾相接覆盖全文
+    """
+    chunks = []
+    chunk_start = chunk_end = None
+    for start, end in split_sentences(text, max_chars):
+        if chunk_start is not None and end - chunk_start > max_chars:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = None
+        if chunk_start is None:
+            chunk_start = start
+        chunk_end = end
+        if _is_boundary(text[start:end]):
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = None
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def merge_results(text: str, chunks: List[Tuple[int, int]], results: List[dict]) -> dict:
+    """
+    合并各分段的检测结果
+    违规词去重合并，原因和优化思路按分段拼接，优化话术由违规分段的优化结果和未违规分段的原文拼接，
+    分值按分段长度加权平均(未违规分段按100分计)，命中位置换算为全文偏移；任一分段为降级结果时整体标记为降级
+    :return: 结构与单条检测结果一致，另含 chunks 分段信息
+    """
+    words, reasons, ideas, ops, hits, chunk_info = [], [], [], [], [], []
+    old_total = new_total = 0
+    for (start, end), result in zip(chunks, results):
+        length = end - start
+        violated = result.get("is_Violations") == "是"
+        chunk_info.append({"start": start, "end": end, "is_Violations": result.get("is_Violations")})
+        for hit in result.get("hits") or []:
+            hits.append({**hit, "start": hit["start"] + start, "end": hit["end"] + start})
+        if not violated:
+            ops.append(text[start:end])
+            old_total += 100 * length
+            new_total += 100 * length
+            continue
+        for word in re.split(r"[,，]", result.get("words") or ""):
+            if word and word not in words:
+                words.append(word)
+        if result.get("reason"):
+            reasons.append(result["reason"])
+        if result.get("ideas"):
+            ideas.append(result["ideas"])
+        ops.append(result.get("op") or text[start:end])
+        old_total += result.get("old_score", 0) * length
+        new_total += result.get("new_score", 0) * length
+
+    merged = {"is_Violations": "否", "hits": hits, "chunks": chunk_info}
+    if any(result.get("degraded") for result in results):
+        merged["degraded"] = True
+    if not words and not any(info["is_Violations"] == "是" for info in chunk_info):
+        return merged
+
+    total = max(1, sum(end - start for start, end in chunks))
+    old_score = round(old_total / total)
+    new_score = round(new_total / total)
+    merged.update({
+        "is_Violations": "是",
+        "words": ",".join(words),
+        "reason": ";".join(reasons),
+        "op": "".join(ops),
+        "ideas": ";".join(ideas),
+        "old_score": old_score,
+        "new_score": new_score,
+        "old_rating": rating_for(old_score),
+        "new_rating": rating_for(new_score)
+    })
+    return merged
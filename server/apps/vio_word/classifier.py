@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from core.logger import setup_logger
+from apps.vio_word.config import (
+    VIO_CLASSIFIER_DIR, VIO_CLASSIFIER_FEATURES, VIO_CLASSIFIER_NGRAMS, VIO_CLASSIFIER_ALPHA,
+    VIO_CLASSIFIER_CLEAN_THRESHOLD
+)
+from apps.vio_word.metrics import percentile
+
+# 设置日志记录器
+logger = setup_logger('vio_word_classifier')
+
+"""
+字符 n-gram 朴素贝叶斯违规分类器
+以 vio_word 历史检测记录(input, is_violation)为训练数据，特征为哈希后的字符 n-gram，
+预测耗时在毫秒级，用于对高置信度未违规的输入跳过大模型调用
+
+模型文件按版本保存在 VIO_CLASSIFIER_DIR 下，CURRENT 文件记录当前使用的版本
+    python -m apps.vio_word.classifier train             从历史记录训练新版本并切换为当前版本
+    python -m apps.vio_word.classifier report            用当前版本评估留出集的准确率和预测耗时
+    python -m apps.vio_word.classifier predict "话术"     打印违规概率
+"""
+
+CURRENT_FILE = "CURRENT"
+# 留出集比例，按输入内容哈希划分，同一话术总是落在同一侧
+HOLDOUT_PERCENT = 20
+
+
+def feature_indices(text: str, ngrams: Sequence[int] = VIO_CLASSIFIER_NGRAMS, features: int = VIO_CLASSIFIER_FEATURES) -> np.ndarray:
+    """
+    字符 n-gram 特征(哈希到固定维度，去重)
+    :return: 特征下标数组
+    """
+    grams = []
+    for n in ngrams:
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.int64, count=len(grams))
+    return np.unique(hashes % features)
+
+
+def is_holdout(text: str) -> bool:
+    """是否属于留出集"""
+    return zlib.crc32(text.encode("utf-8")) % 100 < HOLDOUT_PERCENT
+
+
+class NaiveBayesClassifier:
+    """
+    伯努利朴素贝叶斯，类别 0 = 未违规，1 = 违规
+    log_prior 为 先验 + 全部特征缺失时的对数似然，log_prob 为特征出现相对缺失的对数似然比，
+    预测时只需累加出现的特征
+    """
+
+    def __init__(self, log_prior: np.ndarray, log_prob: np.ndarray, ngrams: Sequence[int], version: str = "", meta: dict = None):
+        self.log_prior = log_prior
+        self.log_prob = log_prob
+        self.ngrams = tuple(ngrams)
+        self.version = version
+        self.meta = meta or {}
+
+    @property
+    def features(self) -> int:
+        return self.log_prob.shape[1]
+
+    @classmethod
+    def fit(cls, texts: List[str], labels: List[int], ngrams: Sequence[int] = VIO_CLASSIFIER_NGRAMS,
+            features: int = VIO_CLASSIFIER_FEATURES, alpha: float = VIO_CLASSIFIER_ALPHA) -> "NaiveBayesClassifier":
+        """训练模型"""
+        indices = ([], [])
+        for text, label in zip(texts, labels):
+            indices[1 if label else 0].append(feature_indices(text, ngrams, features))
+        # 每个类别一次 bincount 统计各特征出现的文档数
+        counts = np.stack([
+            np.bincount(np.concatenate(class_indices), minlength=features) if class_indices else np.zeros(features)
+            for class_indices in indices
+        ]).astype(np.float64)
+        docs = np.array([len(class_indices) for class_indices in indices], dtype=np.float64)
+        # 拉普拉斯平滑后的特征出现概率
+        present = (counts + alpha) / (docs[:, None] + 2 * alpha)
+        log_present = np.log(present)
+        log_absent = np.log1p(-present)
+        log_prob = log_present - log_absent
+        # 训练集中从未出现的哈希桶不携带信息，不参与打分
+        unseen = counts.sum(axis=0) == 0
+        log_absent[:, unseen] = 0
+        log_prob[:, unseen] = 0
+        log_prior = np.log((docs + 1) / (docs.sum() + 2)) + log_absent.sum(axis=1)
+        meta = {"samples": int(docs.sum()), "violations": int(docs[1]), "alpha": alpha}
+        return cls(log_prior, log_prob, ngrams, meta=meta)
+
+    def predict_proba(self, text: str) -> float:
+        """违规概率"""
+        indices = feature_indices(text, self.ngrams, self.features)
+        scores = self.log_prior + self.log_prob[:, indices].sum(axis=1)
+        # 两类 softmax
+        return float(1.0 / (1.0 + np.exp(scores[0] - scores[1])))
+
+    def save(self, directory: str = VIO_CLASSIFIER_DIR) -> str:
+        """
+        保存为新版本并切换为当前版本
+        :return: 版本号
+        """
+        digest = hashlib.sha256(self.log_prob.tobytes()).hexdigest()[:8]
+        self.version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{digest}"
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"vio_nb-{self.version}.npz")
+        np.savez_compressed(
+            path,
+            log_prior=self.log_prior,
+            log_prob=self.log_prob.astype(np.float32),
+            ngrams=np.array(self.ngrams),
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False))
+        )
+        # 先写临时文件再原子替换当前版本指针
+        tmp_path = os.path.join(directory, f"{CURRENT_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.version)
+        os.replace(tmp_path, os.path.join(directory, CURRENT_FILE))
+        return self.version
+
+    @classmethod
+    def load(cls, version: str = None, directory: str = VIO_CLASSIFIER_DIR) -> Optional["NaiveBayesClassifier"]:
+        """加载指定版本，未指定时加载当前版本，不存在时返回 None"""
+        if version is None:
+            try:
+                with open(os.path.join(directory, CURRENT_FILE), "r", encoding="utf-8") as f:
+                    version = f.read().strip()
+            except FileNotFoundError:
+                return None
+        path = os.path.join(directory, f"vio_nb-{version}.npz")
+        with np.load(path) as data:
+            return cls(
+                data["log_prior"],
+                data["log_prob"],
+                [int(n) for n in data["ngrams"]],
+                version=version,
+                meta=json.loads(str(data["meta"]))
+            )
+
+
+class Classifier:
+    """进程内共享的分类器，首次使用时加载当前版本"""
+    _model = None
+    _loaded = False
+    counters = {
+        "predictions": 0,
+        "short_circuits": 0
+    }
+
+    @classmethod
+    def get(cls) -> Optional[NaiveBayesClassifier]:
+        if not cls._loaded:
+            cls._loaded = True
+            try:
+                cls._model = NaiveBayesClassifier.load()
+                if cls._model is not None:
+                    logger.info(f"vio_word classifier loaded: {cls._model.version}")
+            except Exception as e:
+                logger.error(f"加载违规分类器失败: {str(e)}")
+                cls._model = None
+        return cls._model
+
+    @classmethod
+    def reload(cls):
+        """重新加载当前版本(重新训练后调用)"""
+        cls._loaded = False
+        return cls.get()
+
+    @classmethod
+    def is_confident_clean(cls, text: str, threshold: float = VIO_CLASSIFIER_CLEAN_THRESHOLD) -> bool:
+        """违规概率低于阈值时认为可以跳过大模型检测"""
+        model = cls.get()
+        if model is None:
+            return False
+        cls.counters["predictions"] += 1
+        if model.predict_proba(text) < threshold:
+            cls.counters["short_circuits"] += 1
+            return True
+        return False
+
+    @classmethod
+    def stats(cls) -> dict:
+        model = cls._model
+        return {
+            "version": model.version if model else None,
+            **cls.counters
+        }
+
+
+async def load_history() -> List[Tuple[str, int]]:
+    """读取历史检测记录 (input, is_violation)，不含降级结果"""
+    from sqlalchemy import select
+    from core.database import AsyncSessionLocal
+    from apps.vio_word.models import Vio_word
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Vio_word.input, Vio_word.is_violation).where(Vio_word.is_deleted == False, Vio_word.degraded == False)
+        )
+        return [(input, 1 if is_violation else 0) for input, is_violation in result.all()]
+
+
+def evaluate(model: NaiveBayesClassifier, samples: List[Tuple[str, int]], threshold: float = VIO_CLASSIFIER_CLEAN_THRESHOLD) -> dict:
+    """
+    评估分类效果
+    accuracy/precision/recall 按 0.5 判定；short_circuit_rate 为低于阈值(跳过大模型)的比例，
+    missed_violations 为被跳过的样本中实际违规的数量
+    """
+    tp = fp = tn = fn = skipped = missed = 0
+    latencies = []
+    for text, label in samples:
+        start = time.perf_counter()
+        proba = model.predict_proba(text)
+        latencies.append(time.perf_counter() - start)
+        predicted = proba >= 0.5
+        if predicted and label:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif label:
+            fn += 1
+        else:
+            tn += 1
+        if proba < threshold:
+            skipped += 1
+            missed += label
+    total = max(1, len(samples))
+    return {
+        "samples": len(samples),
+        "accuracy": round((tp + tn) / total, 4),
+        "precision": round(tp / (tp + fp), 4) if tp + fp else 0.0,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else 0.0,
+        "threshold": threshold,
+        "short_circuit_rate": round(skipped / total, 4),
+        "missed_violations": missed,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3)
+    }
+
+
+async def train_command():
+    samples = await load_history()
+    train = [sample for sample in samples if not is_holdout(sample[0])]
+    holdout = [sample for sample in samples if is_holdout(sample[0])]
+    if not train:
+        print("没有可用的训练数据")
+        return
+    model = NaiveBayesClassifier.fit([text for text, _ in train], [label for _, label in train])
+    model.meta["trained_at"] = datetime.now().isoformat()
+    model.meta["holdout"] = evaluate(model, holdout) if holdout else None
+    version = model.save()
+    print(f"训练完成: version={version}, train={len(train)}, holdout={len(holdout)}")
+    print(json.dumps(model.meta, ensure_ascii=False, indent=2))
+
+
+async def report_command(version: str = None):
+    model = NaiveBayesClassifier.load(version)
+    if model is None:
+        print("没有已训练的模型")
+        return
+    holdout = [sample for sample in await load_history() if is_holdout(sample[0])]
+    print(f"version={model.version}")
+    print(json.dumps(evaluate(model, holdout), ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="违规分类器")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("train", help="从历史记录训练新版本")
+    report_parser = subparsers.add_parser("report", help="评估留出集准确率和预测耗时")
+    report_parser.add_argument("--version", default=None, help="模型版本，默认当前版本")
+    predict_parser = subparsers.add_parser("predict", help="打印违规概率")
+    predict_parser.add_argument("text")
+
+    args = parser.parse_args()
+    if args.command == "train":
+        asyncio.run(train_command())
+    elif args.command == "report":
+        asyncio.run(report_command(args.version))
+    elif args.command == "predict":
+        model = NaiveBayesClassifier.load()
+        print("没有已训练的模型" if model is None else f"{model.predict_proba(args.text):.4f}")
+
+
+if __name__ == "__main__":
+    main()
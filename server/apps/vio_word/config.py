@@ -0,0 +1,199 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+"""
+违规词检测配置
+所有配置项均可在 robyn.env 中通过同名环境变量覆盖
+"""
+
+# 获取项目根目录
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# 加载环境变量
+load_dotenv(os.path.join(BASE_DIR, "robyn.env"))
+
+
+def get_bool(name: str, default: bool = False) -> bool:
+    """读取布尔类型的环境变量"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# 本地违规词预过滤配置
+# 词库文件路径(JSON)，为空时使用内置词库
+VIO_LEXICON_PATH = os.getenv("VIO_LEXICON_PATH", "")
+# 发布的词库文件目录(各工作进程共享)，存在已发布版本时优先于 VIO_LEXICON_PATH 和内置词库
+VIO_LEXICON_DIR = os.getenv("VIO_LEXICON_DIR", os.path.join(BASE_DIR, "data", "lexicon"))
+# 检查词库版本变化的间隔(秒)，0 表示不检查
+VIO_LEXICON_POLL_INTERVAL = float(os.getenv("VIO_LEXICON_POLL_INTERVAL", 2))
+# 是否直接在 mmap 映射内存上匹配(多进程共享内存，匹配稍慢)，否则加载时复制为进程内数组
+VIO_LEXICON_ZERO_COPY = get_bool("VIO_LEXICON_ZERO_COPY", False)
+# 预过滤策略:
+#   llm        - 仅记录本地命中结果，始终调用大模型检测(默认)
+#   skip_clean - 本地未命中时直接返回未违规，命中时走完整大模型流程
+#   local      - 本地未命中时直接返回未违规，命中时跳过大模型检测，只把本地命中词交给优化阶段
+VIO_PREFILTER_POLICY = os.getenv("VIO_PREFILTER_POLICY", "llm")
+
+# 大模型配置
+VIO_MODEL_API_KEY = os.getenv("VIO_MODEL_API_KEY", "31711a19-2c64-4337-a7b1-70be31e1fdd2")
+VIO_MODEL_BASE_URL = os.getenv("VIO_MODEL_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
+VIO_MODEL_NAME = os.getenv("VIO_MODEL_NAME", "doubao-pro-32k-241215")
+VIO_MODEL_TEMPERATURE = float(os.getenv("VIO_MODEL_TEMPERATURE", 0.7))
+
+# 检测结果缓存配置
+VIO_CACHE_ENABLED = get_bool("VIO_CACHE_ENABLED", True)
+# 进程内LRU最大条目数
+VIO_CACHE_MAX_SIZE = int(os.getenv("VIO_CACHE_MAX_SIZE", 2048))
+# 缓存有效期(秒)
+VIO_CACHE_TTL = int(os.getenv("VIO_CACHE_TTL", 24 * 3600))
+# 是否启用Redis二级缓存(需先通过 /initialize 建立Redis连接)
+VIO_CACHE_REDIS = get_bool("VIO_CACHE_REDIS", True)
+
+# 检测流程模式:
+#   staged   - 检测、优化、打分三次大模型调用(默认，用于质量对照)
+#   combined - 一次结构化输出调用返回全部字段
+VIO_PIPELINE_MODE = os.getenv("VIO_PIPELINE_MODE", "staged")
+
+# 大模型客户端连接池配置
+# 最大并发连接数
+VIO_LLM_POOL_SIZE = int(os.getenv("VIO_LLM_POOL_SIZE", 100))
+# 最大保活连接数
+VIO_LLM_KEEPALIVE_SIZE = int(os.getenv("VIO_LLM_KEEPALIVE_SIZE", 20))
+# 保活连接空闲过期时间(秒)
+VIO_LLM_KEEPALIVE_EXPIRY = float(os.getenv("VIO_LLM_KEEPALIVE_EXPIRY", 60))
+# 请求超时时间(秒)
+VIO_LLM_TIMEOUT = float(os.getenv("VIO_LLM_TIMEOUT", 60))
+# 建立连接超时时间(秒)
+VIO_LLM_CONNECT_TIMEOUT = float(os.getenv("VIO_LLM_CONNECT_TIMEOUT", 5))
+# 失败重试次数
+VIO_LLM_MAX_RETRIES = int(os.getenv("VIO_LLM_MAX_RETRIES", 2))
+
+# 批量检测配置
+# 单次批量检测最多条数
+VIO_BATCH_MAX_SIZE = int(os.getenv("VIO_BATCH_MAX_SIZE", 50))
+# 批量检测并发数
+VIO_BATCH_CONCURRENCY = int(os.getenv("VIO_BATCH_CONCURRENCY", 8))
+
+# 异步检测任务配置
+# 工作协程数
+VIO_JOB_WORKERS = int(os.getenv("VIO_JOB_WORKERS", 4))
+# 队列为空时轮询间隔(秒)，用于发现其他进程提交的任务
+VIO_JOB_POLL_INTERVAL = float(os.getenv("VIO_JOB_POLL_INTERVAL", 1.0))
+# 单个任务最长执行时间(秒)，超时记为失败
+VIO_JOB_TIMEOUT = float(os.getenv("VIO_JOB_TIMEOUT", 240))
+# 任务租约(秒)，执行中超过该时间仍未完成的任务视为工作进程已退出，重新放回队列；必须大于 VIO_JOB_TIMEOUT
+VIO_JOB_LEASE_SECONDS = float(os.getenv("VIO_JOB_LEASE_SECONDS", 300))
+
+# 大模型后端:
+#   openai - 调用真实的大模型接口(默认)
+#   fake   - 进程内假模型，按延迟分布等待后返回固定JSON，不访问网络
+#   record - 调用真实接口，同时把响应录制到 VIO_RECORD_DIR
+#   replay - 从 VIO_RECORD_DIR 回放录制的响应，未录制的请求直接报错
+VIO_LLM_BACKEND = os.getenv("VIO_LLM_BACKEND", "openai")
+# 假模型延迟分布: fixed:毫秒 / uniform:最小毫秒,最大毫秒 / lognormal:中位毫秒,sigma
+VIO_FAKE_LATENCY = os.getenv("VIO_FAKE_LATENCY", "lognormal:300,0.4")
+# 假模型输出文件(JSON，键为 detect/optimize/score/combined)，为空时使用内置输出
+VIO_FAKE_OUTPUTS_PATH = os.getenv("VIO_FAKE_OUTPUTS_PATH", "")
+# 假模型随机种子，为空时不固定
+VIO_FAKE_SEED = os.getenv("VIO_FAKE_SEED", "")
+# 录制/回放目录
+VIO_RECORD_DIR = os.getenv("VIO_RECORD_DIR", os.path.join(BASE_DIR, "data", "llm_records"))
+
+# 打分方式:
+#   llm   - 第三阶段调用大模型打分(默认，用于校准)
+#   local - 按违规词数量和分类权重在本地确定性打分，省去一次大模型调用
+VIO_SCORER = os.getenv("VIO_SCORER", "llm")
+# 本地打分: 未命中词库的违规词默认扣分
+VIO_SCORE_DEFAULT_WEIGHT = int(os.getenv("VIO_SCORE_DEFAULT_WEIGHT", 15))
+# 本地打分: 含违规词的原始话术最高分
+VIO_SCORE_VIOLATION_CAP = int(os.getenv("VIO_SCORE_VIOLATION_CAP", 85))
+# 本地打分: 不含违规词的优化话术得分
+VIO_SCORE_CLEAN_REWRITE = int(os.getenv("VIO_SCORE_CLEAN_REWRITE", 95))
+
+# 优化阶段投机执行策略:
+#   off    - 检测完成且判定违规后再调用优化(默认)
+#   hits   - 本地预过滤有命中时，优化与检测并行执行
+#   always - 所有输入的优化都与检测并行执行
+# 检测判定未违规时取消投机优化，调用开销记为浪费
+VIO_SPECULATIVE_REWRITE = os.getenv("VIO_SPECULATIVE_REWRITE", "off")
+
+# 大模型调用容错
+# 分阶段超时(秒)，格式 阶段:秒,阶段:秒
+VIO_STAGE_TIMEOUTS = os.getenv("VIO_STAGE_TIMEOUTS", "detect:20,optimize:30,score:20,combined:45")
+# 分阶段提示词 token 预算(含系统提示词)，超过时截断输入字段，格式 阶段:token数,阶段:token数，未配置的阶段不限制
+VIO_TOKEN_BUDGETS = os.getenv("VIO_TOKEN_BUDGETS", "")
+# 熔断器统计最近调用次数
+VIO_BREAKER_WINDOW = int(os.getenv("VIO_BREAKER_WINDOW", 20))
+# 熔断器最少调用次数，不足时不判断
+VIO_BREAKER_MIN_CALLS = int(os.getenv("VIO_BREAKER_MIN_CALLS", 10))
+# 失败(含慢调用)比例达到该值时熔断
+VIO_BREAKER_FAILURE_RATIO = float(os.getenv("VIO_BREAKER_FAILURE_RATIO", 0.5))
+# 慢调用阈值(秒)
+VIO_BREAKER_SLOW_CALL = float(os.getenv("VIO_BREAKER_SLOW_CALL", 15))
+# 熔断持续时间(秒)，之后放行一个探测调用
+VIO_BREAKER_OPEN_SECONDS = float(os.getenv("VIO_BREAKER_OPEN_SECONDS", 30))
+# 是否启用对冲请求(会增加大模型调用量)
+VIO_HEDGE_ENABLED = get_bool("VIO_HEDGE_ENABLED", False)
+# 对冲所需的最少耗时样本数
+VIO_HEDGE_MIN_SAMPLES = int(os.getenv("VIO_HEDGE_MIN_SAMPLES", 20))
+# 对冲等待时间取该阶段历史耗时的百分位
+VIO_HEDGE_PERCENTILE = float(os.getenv("VIO_HEDGE_PERCENTILE", 95))
+
+# 长话术分段检测
+# 单个分段最大字符数(与单条检测的长度上限一致)
+VIO_CHUNK_MAX_CHARS = int(os.getenv("VIO_CHUNK_MAX_CHARS", 120))
+# 内容定义的分段边界: 句子哈希对该值取模为0处断开，值越大分段越长
+VIO_CHUNK_BOUNDARY_MOD = int(os.getenv("VIO_CHUNK_BOUNDARY_MOD", 3))
+# 单条长话术的分段最大并发检测数
+VIO_CHUNK_CONCURRENCY = int(os.getenv("VIO_CHUNK_CONCURRENCY", 4))
+# 长话术最大字符数
+VIO_LONG_TEXT_MAX_CHARS = int(os.getenv("VIO_LONG_TEXT_MAX_CHARS", 5000))
+
+# 字符 n-gram 违规分类器
+# 是否用分类器跳过高置信度未违规输入的大模型检测(仅在本地预过滤未命中时生效)
+VIO_CLASSIFIER_ENABLED = get_bool("VIO_CLASSIFIER_ENABLED", False)
+# 模型文件目录
+VIO_CLASSIFIER_DIR = os.getenv("VIO_CLASSIFIER_DIR", os.path.join(BASE_DIR, "data", "classifier"))
+# 违规概率低于该值时视为未违规
+VIO_CLASSIFIER_CLEAN_THRESHOLD = float(os.getenv("VIO_CLASSIFIER_CLEAN_THRESHOLD", 0.05))
+# 训练参数: 哈希特征维度、n-gram 长度、平滑系数
+VIO_CLASSIFIER_FEATURES = int(os.getenv("VIO_CLASSIFIER_FEATURES", 1 << 18))
+VIO_CLASSIFIER_NGRAMS = [int(n) for n in os.getenv("VIO_CLASSIFIER_NGRAMS", "1,2,3").split(",") if n.strip()]
+VIO_CLASSIFIER_ALPHA = float(os.getenv("VIO_CLASSIFIER_ALPHA", 1.0))
+
+# SimHash 近似重复话术
+# 是否对缓存未命中的输入查找近似重复的历史检测记录
+VIO_NEAR_DUP_ENABLED = get_bool("VIO_NEAR_DUP_ENABLED", False)
+# 近似重复的汉明距离阈值(64位指纹分4段，阈值不超过3时不会漏检)
+VIO_NEAR_DUP_THRESHOLD = int(os.getenv("VIO_NEAR_DUP_THRESHOLD", 3))
+# 索引最多保留的记录数(最近的记录)
+VIO_NEAR_DUP_MAX_ENTRIES = int(os.getenv("VIO_NEAR_DUP_MAX_ENTRIES", 200000))
+# 命中近似重复记录后的处理方式:
+#   seed  - 复用历史检测出的违规词(仍出现在本次输入中的)，跳过检测阶段，只做优化和打分(默认)
+#   reuse - 直接复用历史检测结果
+VIO_NEAR_DUP_MODE = os.getenv("VIO_NEAR_DUP_MODE", "seed")
+
+# 检测记录延迟批量写入
+# 是否启用(关闭时检测接口同步写入检测记录)
+VIO_HISTORY_WRITE_BEHIND = get_bool("VIO_HISTORY_WRITE_BEHIND", True)
+# 每攒够多少条写入一次
+VIO_HISTORY_BATCH_SIZE = int(os.getenv("VIO_HISTORY_BATCH_SIZE", 100))
+# 最长写入间隔(毫秒)
+VIO_HISTORY_FLUSH_MS = float(os.getenv("VIO_HISTORY_FLUSH_MS", 200))
+# 内存中最多积压的记录数，超过时写入方同步刷新
+VIO_HISTORY_MAX_BACKLOG = int(os.getenv("VIO_HISTORY_MAX_BACKLOG", 10000))
+
+# 检测记录全文检索
+# 单次检索最多返回的记录数
+VIO_SEARCH_MAX_LIMIT = int(os.getenv("VIO_SEARCH_MAX_LIMIT", 50))
+# 命中数不超过该值时按相关度排序，超过时按时间倒序返回最新的命中
+VIO_SEARCH_RANK_CANDIDATES = int(os.getenv("VIO_SEARCH_RANK_CANDIDATES", 2000))
+# 摘要长度(trigram 分词下约为字符数)
+VIO_SEARCH_SNIPPET_TOKENS = int(os.getenv("VIO_SEARCH_SNIPPET_TOKENS", 24))
+
+# 违规词按天汇总
+# 高频违规词接口单次最多返回的词数
+VIO_TERM_TOP_MAX_K = int(os.getenv("VIO_TERM_TOP_MAX_K", 100))
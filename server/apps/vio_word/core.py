@@ -1,213 +1,496 @@
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import JsonOutputParser
-import json
-import os
-from typing import Dict, Any
+import time
 import asyncio
-from core.response import ApiResponse
-from robyn import Response, status_codes
-
-# 初始化模型
+from apps.vio_word.config import (
+    VIO_PREFILTER_POLICY, VIO_PIPELINE_MODE, VIO_MODEL_NAME, VIO_MODEL_TEMPERATURE, VIO_BATCH_CONCURRENCY,
+    VIO_LLM_BACKEND, VIO_SCORER, VIO_SPECULATIVE_REWRITE, VIO_CHUNK_CONCURRENCY, VIO_CLASSIFIER_ENABLED,
+    VIO_NEAR_DUP_ENABLED, VIO_NEAR_DUP_MODE
+)
+from apps.vio_word.lexicon import active_lexicon, add_swap_listener, prefilter, hits_to_words
+from apps.vio_word.cache import ResultCache, make_version
+from apps.vio_word.normalize import NORMALIZER_VERSION
+from apps.vio_word.singleflight import SingleFlight
+from apps.vio_word.scoring import score_locally, split_words
+from apps.vio_word.metrics import SpeculationMetrics
+from apps.vio_word.resilience import LLMUnavailableError
+from apps.vio_word.chunking import split_chunks, merge_results
+from apps.vio_word.classifier import Classifier
+from apps.vio_word.simhash import near_duplicate_index, simhash
+from apps.vio_word import crud as vio_word_crud
+from core.database import AsyncSessionLocal
+from apps.vio_word.prompts import (
+    SYSTEM_PROMPT_DETECT, SYSTEM_PROMPT_OPTIMIZE, SYSTEM_PROMPT_SCORE, SYSTEM_PROMPT_COMBINED,
+    USER_PROMPT_DETECT, USER_PROMPT_OPTIMIZE, USER_PROMPT_SCORE, USER_PROMPT_COMBINED
+)
+from apps.vio_word.llm import LLMRegistry, build_chains
+from core.logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('vio_word_core')
+
+# 初始化模型(进程内共享同一个客户端)
 async def init_model():
+    return LLMRegistry.get_model()
+
+# 检测结果缓存，提示词、模型后端、模型、流程模式、预过滤策略、打分方式、投机策略、近似重复策略、归一化规则或词库变化时版本号随之变化
+RESULT_VERSION_PARTS = (
+    SYSTEM_PROMPT_DETECT, SYSTEM_PROMPT_OPTIMIZE, SYSTEM_PROMPT_SCORE, SYSTEM_PROMPT_COMBINED,
+    USER_PROMPT_DETECT, USER_PROMPT_OPTIMIZE, USER_PROMPT_SCORE, USER_PROMPT_COMBINED,
+    VIO_LLM_BACKEND, VIO_MODEL_NAME, VIO_MODEL_TEMPERATURE, VIO_PIPELINE_MODE, VIO_PREFILTER_POLICY,
+    VIO_SCORER, VIO_SPECULATIVE_REWRITE, VIO_NEAR_DUP_ENABLED, VIO_NEAR_DUP_MODE, NORMALIZER_VERSION
+)
+RESULT_VERSION = make_version(*RESULT_VERSION_PARTS, active_lexicon().version)
+result_cache = ResultCache("vio_word:result", RESULT_VERSION)
+
+def _on_lexicon_swap(compiled):
+    """词库替换后切换缓存版本号，旧词库下的检测结果不再命中"""
+    result_cache.version = make_version(*RESULT_VERSION_PARTS, compiled.version)
+
+add_swap_listener(_on_lexicon_swap)
+# 进行中的检测请求合并
+single_flight = SingleFlight()
+
+SCORE_KEYS = ("old_score", "new_score", "old_rating", "new_rating")
+
+async def score_rewrite(input, words, op, chains):
+    """
+    话术打分，VIO_SCORER=local 时本地确定性打分，否则调用打分大模型
+    :return: {"old_score", "new_score", "old_rating", "new_rating"}
+    """
+    if VIO_SCORER == "local":
+        return score_locally(input, words, op)
+    score = await chains["score"].ainvoke({"input": input, "op": op})
+    return {key: score[key] for key in SCORE_KEYS}
+
+# 投机优化统计
+speculation = SpeculationMetrics()
+# 本地预过滤未命中时，投机优化阶段使用的违规词和原因占位
+SPECULATIVE_WORDS = "待识别"
+SPECULATIVE_REASON = "请先自行识别话术中的违规内容再优化"
+
+def should_speculate(hits):
+    """是否与检测并行投机执行优化阶段"""
+    if VIO_SPECULATIVE_REWRITE == "always":
+        return True
+    return VIO_SPECULATIVE_REWRITE == "hits" and bool(hits)
+
+async def detect_with_speculation(input, hits, chains):
+    """
+    检测与优化并行执行: 优化阶段以本地命中词(或占位)立即启动，检测判定未违规时取消
+    :return: (检测结果, 可直接使用的优化结果 或 None)
+    """
+    if hits:
+        words, reason = hits_to_words(hits)
+    else:
+        words, reason = SPECULATIVE_WORDS, SPECULATIVE_REASON
+
+    started = time.monotonic()
+
+    async def rewrite():
+        optimized = await chains["optimize"].ainvoke({"input": input, "words": words, "reason": reason})
+        return optimized, time.monotonic() - started
+
+    task = asyncio.create_task(rewrite())
+    speculation.counters["launched"] += 1
     try:
-        model = ChatOpenAI(
-            openai_api_key="31711a19-2c64-4337-a7b1-70be31e1fdd2",
-            openai_api_base="https://ark.cn-beijing.volces.com/api/v3",
-            model_name="doubao-pro-32k-241215",
-            temperature=0.7,
-            streaming=True
-        )
-        return model
-    except Exception as e:
-        raise Exception(f"模型初始化失败: {str(e)}")
+        detected = await chains["detect"].ainvoke({"input": input})
+    except BaseException:
+        task.cancel()
+        raise
+    detect_time = time.monotonic() - started
+
+    if detected['is_Violations'] != '是':
+        task.cancel()
+        speculation.counters["cancelled"] += 1
+        speculation.add_wasted(time.monotonic() - started)
+        return detected, None
 
-async def vio_word_check(input):
     try:
-        # 定义系统提示词
-        system_prompt_1 = """# 角色
-        你是一位专业的电商领域违规词检测专家，具备深厚的电商行业知识和敏锐的语言洞察力，能够精准检测用户输入内容中的违规词，并详细解释违规原因。
-
-        ## 技能
-        ### 技能 1: 检测违规词
-        1. 仔细分析用户输入的内容，全面检测其中是否包含违规词。
-        2. 若存在违规词，明确指出包含哪些违规词。
-        3. 针对每一个违规词，单独、详细地解释其违规的原因。
-        4. 擅长仔细思考，不会将无违规内容的话术判定为违规
-
-        ## 限制:
-        - 只专注于电商领域违规词检测相关内容，拒绝回答与该主题无关的话题。
-        - 所输出的内容必须清晰明确，违规词和违规原因需一一对应展示。 
-        - 输出内容必须严格按照 JSON 格式。
-
-        ## 输出内容：
-        是否包含违规词
-        包含哪些违规词(没有则填无)
-        违规原因
-
-        ## 输出字段解释：
-        is_Violations：是否违规
-        words：违规词(可能是多个，多个违规词用逗号隔开)
-        reason：违规原因(针对每个违规词输出违规原因，多个原因用；隔开)
-        
-        
-        ## 示例：
-        {{
-            "is_Violations": "是",
-            "words": "违规词1,违规词2",
-            "reason": "违规原因1;违规原因2"
-        }}
-        """
-
-        # 定义提示词模板
-        prompt_template1 = ChatPromptTemplate.from_messages([
-            ('system', system_prompt_1),
-            ('user', '{input}')
-        ])
-
-        model = await init_model()
-        parser = JsonOutputParser()
-        chain1 = prompt_template1 | model | parser
-
+        optimized, rewrite_time = await task
+    except Exception as e:
+        logger.warning(f"投机优化失败: {e}")
+        speculation.counters["rerun"] += 1
+        speculation.add_wasted(time.monotonic() - started)
+        return detected, None
+
+    # 投机结果仍含检测出的违规词时，按检测结果重新优化
+    op = optimized.get('op') or ""
+    if any(word in op for word in split_words(detected['words'])):
+        speculation.counters["rerun"] += 1
+        speculation.add_wasted(rewrite_time)
+        return detected, None
+
+    speculation.counters["kept"] += 1
+    # 串行执行耗时 = 检测 + 优化，并行执行耗时 = max(检测, 优化)
+    speculation.add_saved(min(detect_time, rewrite_time))
+    return detected, optimized
+
+async def run_staged_pipeline(input, hits, chains, seed=None):
+    """
+    三阶段模式: 检测 -> 优化 -> 打分 依次调用大模型
+    :param input: 待检测话术
+    :param hits: 本地预过滤命中结果
+    :param chains: 各阶段调用链
+    :param seed: 已知的违规词和原因 {"words", "reason"}，传入时跳过检测阶段
+    :return: 检测结果字典，失败时抛出异常
+    """
+    optimized = None
+    if seed:
+        is_Violations = "是"
+        words, reason = seed["words"], seed["reason"]
+    elif hits and VIO_PREFILTER_POLICY == "local":
+        # 跳过大模型检测，只把本地命中词交给优化阶段
+        is_Violations = "是"
+        words, reason = hits_to_words(hits)
+    elif should_speculate(hits):
+        detected, optimized = await detect_with_speculation(input, hits, chains)
+
+        is_Violations = detected['is_Violations']
+        words = detected.get('words')
+        reason = detected.get('reason')
+    else:
         # 违规词检测生成输出 
-        Violations_words = await chain1.ainvoke({"input": input})
+        Violations_words = await chains["detect"].ainvoke({"input": input})
 
         is_Violations = Violations_words['is_Violations']
         words = Violations_words['words']
         reason = Violations_words['reason']
 
-        if is_Violations == '是':
-            # print(f"违规词：{words}")
-            # print(f"违规原因：{reason}")
-
-            # 违规话术优化
-            # 定义系统提示词
-            system_prompt_2 = """
-            # 角色
-            你是一位专业且权威的资深电商主播违规词检测优化大师，对各大电商平台规则烂熟于心，拥有顶级的电商领域违规词检测与优化能力，具备海量的实践经验。用户将提供原始话术及违规词违规原因，你需要输出优化后的话术及其优化思路，优化后的话术要既符合平台要求，又适合主播直播话术场景。
-
-            ## 技能
-            ### 技能 1: 优化直播话术
-            1. 接收用户提供的原始话术及违规词违规原因。
-            2. 依据各大电商平台规则，对原始话术进行优化。
-            3. 输出包含优化后的话术及核心优化思路的内容，优化后的话术需符合平台要求且适合主播直播场景。
-                - op字段：优化后的话术
-                - ideas字段：核心优化思路
-
-            ## 限制:
-            - 仅围绕电商直播话术的违规词检测与优化进行回答，拒绝处理与该任务无关的话题。
-            - 输出内容需包含指定的优化后的话术及核心优化思路，不能遗漏。 
-            - 输出内容必须严格按照 JSON 格式。
-
-            ## 示例：
-            {{
-                "op": "优化后的话术",
-                "ideas": "核心优化思路"
-            }}
-            """
-
-            # 定义提示词模板
-            prompt_template2 = ChatPromptTemplate.from_messages([
-                ('system', system_prompt_2),
-                ('user', '话术：{input}，违规词：{words}，违规原因：{reason}')
-            ])
-
-            chain2 = prompt_template2 | model | parser
-            Violations_words = await chain2.ainvoke({"input": input, "words": words, "reason": reason})
-            op = Violations_words['op']
-            ideas = Violations_words['ideas']
-
-            # print(f"优化后的话术1：{optimization1}")
-            # print(f"优化后的话术2：{optimization2}")
-            # print(f"优化后的话术3：{optimization3}")
-            # print(f"优化思路：{ideas}")
-
-            # 话术打分大模型
-            system_prompt_3 = """
-            # 角色
-            你是一位专业且权威的电商直播话术违规词检测与打分专家，在电商直播话术领域经验丰富、极具权威性。你需要对直播话术进行全面细致的分析，精准判断其中是否存在违规词，并根据违规情况进行合理扣分，给出准确的分值。同时，对于 AI 优化后的话术，要给予客观公正的高分评价。
-
-            ## 技能
-            ### 技能 1: 检测并为原始话术打分
-            1. 仔细分析输入的原始话术，全面排查其中是否存在违规词。
-            2. 若发现违规词，依据违规的严重程度和数量进行合理扣分，满分 100 分，给出原始话术的最终分值。
-
-            ### 技能 2: 检测并为优化后话术打分
-            1. 认真审查 AI 优化后的话术，同样检查是否有违规词。
-            2. 确保优化后的话术符合优质话术标准，给予其尽可能高的分数，满分 100 分。
-
-            ### 技能 3: 输出分值
-            请以 JSON 格式输出，包含以下字段：
-            - old_score: 原始话术的分值
-            - new_score: 优化后话术的分值
-
-            ### 技能 4: 评级
-            根据话术的整体质量、专业程度、表达技巧等多方面因素，在"小白，业余，专业，资深，大师"中选择一个合适的评级输出。
-            0-25分：小白
-            26-50分：业余
-            51-75分：专业
-            76-90分：资深
-            91-100分：大师
-
-            示例输出格式：
-            {{
-                "old_score": 70,
-                "new_score": 95,
-                "old_rating": "专业",
-                "new_rating": "大师"
-            }}
-
-            ## 限制:
-            - 只专注于电商直播话术的违规词检测与打分，不回答与该任务无关的话题。
-            - 输出内容必须严格按照 JSON 格式，包含 old_score 和 new_score 和 old_rating 和 new_rating 四个字段。
-            """
-
-            # 定义提示词模板
-            prompt_template3 = ChatPromptTemplate.from_messages([
-                ('system', system_prompt_3),
-                ('user', '原始话术：{input},优化后的话术：{op}')
-            ])
-
-            chain3 = prompt_template3 | model | parser
-            score = await chain3.ainvoke({"input": input, "op": op})
-            old_score = score['old_score']
-            new_score = score['new_score']
-            old_rating = score['old_rating']
-            new_rating = score['new_rating']
-
-            # print(f"原始话术分值：{old_score}")
-            # print(f"优化后话术分值：{new_score}")
-            # print(f"原始话术评级：{old_rating}")
-            # print(f"优化后话术评级：{new_rating}")
-
-            # 整合json输出结果
-            result = {
-                "is_Violations": is_Violations,
-                "words": words,
-                "reason": reason,
-                "op": op,
-                "ideas": ideas,
-                "old_score": old_score,
-                "new_score": new_score,
-                "old_rating": old_rating,
-                "new_rating": new_rating
-            }
-            print(result)
-            return result  # 直接返回字典结果
+    if is_Violations != '是':
+        print("未违规")
+        return {
+            "is_Violations": "否"
+        }
+
+    # 违规话术优化，投机结果可用时直接使用
+    if optimized is None:
+        optimized = await chains["optimize"].ainvoke({"input": input, "words": words, "reason": reason})
+    op = optimized['op']
+    ideas = optimized['ideas']
+
+    # 话术打分
+    score = await score_rewrite(input, words, op, chains)
+
+    # 整合json输出结果
+    result = {
+        "is_Violations": is_Violations,
+        "words": words,
+        "reason": reason,
+        "op": op,
+        "ideas": ideas,
+        "old_score": score['old_score'],
+        "new_score": score['new_score'],
+        "old_rating": score['old_rating'],
+        "new_rating": score['new_rating']
+    }
+    print(result)
+    return result
+
+async def run_combined_pipeline(input, hits, chains, seed=None):
+    """
+    合并模式: 一次结构化输出调用同时完成检测、优化和打分，返回结构与三阶段模式一致
+    :param input: 待检测话术
+    :param hits: 本地预过滤命中结果(合并模式下仅用于预过滤短路)
+    :param chains: 各阶段调用链
+    :param seed: 合并模式只有一次调用，忽略已知的违规词
+    :return: 检测结果字典，失败时抛出异常
+    """
+    output = await chains["combined"].ainvoke({"input": input})
+
+    if output['is_Violations'] != '是':
+        print("未违规")
+        return {
+            "is_Violations": "否"
+        }
+    if VIO_SCORER == "local":
+        # 本地打分时忽略模型给出的分值，保证两种流程模式的分值口径一致
+        output = {**output, **score_locally(input, output['words'], output['op'])}
+
+    result = {
+        "is_Violations": "是",
+        "words": output['words'],
+        "reason": output['reason'],
+        "op": output['op'],
+        "ideas": output['ideas'],
+        "old_score": output['old_score'],
+        "new_score": output['new_score'],
+        "old_rating": output['old_rating'],
+        "new_rating": output['new_rating']
+    }
+    print(result)
+    return result
+
+DEGRADED_IDEAS = "大模型服务繁忙，已按本地词库删除违规词，建议稍后重新检测"
+
+def degraded_result(input, hits):
+    """
+    降级结果: 大模型熔断或超时时，按本地词库命中结果生成检测结论和删除违规词后的话术
+    :param input: 待检测话术
+    :param hits: 本地预过滤命中结果
+    :return: 与检测结果结构一致的字典，degraded 为 True
+    """
+    if not hits:
+        return {"is_Violations": "否", "degraded": True}
+    words, reason = hits_to_words(hits)
+    parts = []
+    position = 0
+    for hit in hits:
+        parts.append(input[position:hit["start"]])
+        position = hit["end"]
+    parts.append(input[position:])
+    op = "".join(parts)
+    return {
+        "is_Violations": "是",
+        "words": words,
+        "reason": reason,
+        "op": op,
+        "ideas": DEGRADED_IDEAS,
+        **score_locally(input, words, op),
+        "degraded": True
+    }
+
+PIPELINES = {
+    "staged": run_staged_pipeline,
+    "combined": run_combined_pipeline
+}
+
+async def run_pipeline(input, hits, mode=VIO_PIPELINE_MODE, model=None, seed=None):
+    """
+    按模式执行大模型检测流程
+    :param input: 待检测话术
+    :param hits: 本地预过滤命中结果
+    :param mode: 流程模式 staged / combined
+    :param model: 大模型实例，为空时使用进程内共享的预构建调用链
+    :param seed: 已知的违规词和原因，传入时跳过检测阶段
+    :return: 检测结果字典，失败时抛出异常
+    """
+    pipeline = PIPELINES.get(mode)
+    if pipeline is None:
+        raise ValueError(f"不支持的检测流程模式: {mode}")
+    chains = LLMRegistry.get_chains() if model is None else build_chains(model)
+    return await pipeline(input, hits, chains, seed=seed)
+
+def record_to_result(record):
+    """检测记录转为检测结果"""
+    if not record.is_violation:
+        return {"is_Violations": "否"}
+    return {
+        "is_Violations": "是",
+        "words": record.words,
+        "reason": record.reasons,
+        "op": record.op,
+        "ideas": record.ideas,
+        "old_score": record.old_score,
+        "new_score": record.new_score,
+        "old_rating": record.old_rating,
+        "new_rating": record.new_rating
+    }
+
+async def find_near_duplicate(input):
+    """
+    查找近似重复的历史检测记录
+    :return: (检测记录, 汉明距离)，未找到时返回 None
+    """
+    await near_duplicate_index.ensure_loaded()
+    match = near_duplicate_index.nearest(simhash(input))
+    if match is None:
+        return None
+    record_id, distance = match
+    async with AsyncSessionLocal() as db:
+        record = await vio_word_crud.get_vio_word(db, record_id)
+    if record is None or record.is_deleted or record.degraded:
+        near_duplicate_index.remove(record_id)
+        return None
+    return record, distance
+
+async def run_near_duplicate(input, hits):
+    """
+    近似重复话术检测: reuse 模式直接复用历史结果；seed 模式复用历史检测出的违规词，跳过检测阶段
+    :return: 检测结果，没有可用的近似重复记录时返回 None
+    """
+    found = await find_near_duplicate(input)
+    if found is None:
+        return None
+    record, distance = found
+    logger.info(f"近似重复话术: 记录 {record.id}, 距离 {distance}")
+    if not record.is_violation:
+        # 历史记录未违规但本次命中本地词库，说明改动引入了违规词，走完整流程
+        return None if hits else {"is_Violations": "否"}
+    if VIO_NEAR_DUP_MODE == "reuse":
+        return record_to_result(record)
+
+    # 只保留仍出现在本次输入中的违规词，并补充本地命中词
+    words = [word for word in split_words(record.words) if word in input]
+    for hit in hits:
+        if hit["word"] not in words:
+            words.append(hit["word"])
+    if not words:
+        return None
+    return await run_pipeline(input, hits, seed={"words": ",".join(words), "reason": record.reasons})
 
-        else:
-            result = {
-                "is_Violations": "否"
-            }
-            
-            print("未违规")
-            return result  # 直接返回字典结果
+async def vio_word_check(input):
+    try:
+        # 本地违规词预过滤，命中结果带字符偏移
+        hits = prefilter(input)
+        if not hits and VIO_PREFILTER_POLICY in ("skip_clean", "local"):
+            logger.info("本地预过滤未命中，未违规")
+            return {"is_Violations": "否", "hits": hits}
+        # 本地分类器高置信度判定未违规时跳过大模型
+        if not hits and VIO_CLASSIFIER_ENABLED and Classifier.is_confident_clean(input):
+            logger.info("分类器判定未违规")
+            return {"is_Violations": "否", "hits": hits}
+
+        # 命中缓存时直接返回，命中位置按本次输入重新计算
+        cached = await result_cache.get(input)
+        if cached is not None:
+            return {**cached, "hits": hits}
+
+        # 相同归一化输入的并发请求合并为一次大模型调用
+        async def run_and_cache():
+            result = await run_near_duplicate(input, hits) if VIO_NEAR_DUP_ENABLED else None
+            if result is None:
+                result = await run_pipeline(input, hits)
+            await result_cache.set(input, result)
+            return result
+
+        try:
+            result = await single_flight.do(result_cache.key(input), run_and_cache)
+        except LLMUnavailableError as e:
+            # 大模型熔断或超时，返回本地词库降级结果(不缓存)
+            logger.warning(f"降级检测: {e}")
+            result = degraded_result(input, hits)
+        return {**result, "hits": hits}  # 直接返回字典结果
     except Exception as e:
         print(f"Error: {e}")
         return False
 
+async def vio_word_check_batch(inputs, concurrency=VIO_BATCH_CONCURRENCY):
+    """
+    批量违规词检测，通过信号量限制同时执行的检测数
+    :param inputs: 待检测话术列表
+    :param concurrency: 最大并发数
+    :return: 与输入顺序一致的结果列表，单条失败时对应位置为 False
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def check_one(input):
+        async with semaphore:
+            return await vio_word_check(input)
+
+    return await asyncio.gather(*(check_one(input) for input in inputs))
+
+async def vio_word_check_long(input, concurrency=VIO_CHUNK_CONCURRENCY):
+    """
+    长话术分段检测: 按句子边界切分后并发检测各分段，再合并为一个结果
+    每个分段单独走缓存，修改过的话术只重新检测变化的分段
+    :param input: 长话术
+    :param concurrency: 单条话术的分段最大并发数
+    :return: 合并后的检测结果(含 chunks 分段信息)，任一分段失败时返回 False
+    """
+    chunks = split_chunks(input)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def check_chunk(start, end):
+        text = input[start:end]
+        if not text.strip():
+            return {"is_Violations": "否", "hits": []}
+        async with semaphore:
+            return await vio_word_check(text)
+
+    results = await asyncio.gather(*(check_chunk(start, end) for start, end in chunks))
+    if any(result == False for result in results):
+        return False
+    return merge_results(input, chunks, results)
+
+async def vio_word_check_stream(input):
+    """
+    流式违规词检测，按阶段逐步产出事件 (事件名, 数据):
+        verdict - 检测阶段完成后立即产出是否违规、违规词及原因
+        op      - 优化阶段逐段产出改写话术的增量 {"delta": ...}
+        ideas   - 优化阶段完成后产出完整改写话术和优化思路
+        score   - 打分阶段完成后产出分值和评级
+        done    - 完整检测结果，结构与 vio_word_check 返回值一致
+        error   - 检测失败
+    大模型熔断或超时时直接产出 done，结果为本地词库降级结果(degraded 为 True)
+    流式接口固定按三阶段执行，以便尽早返回检测结论；优化阶段需要流式输出，不做投机执行
+    """
+    try:
+        # 本地违规词预过滤
+        hits = prefilter(input)
+        if not hits and (VIO_PREFILTER_POLICY in ("skip_clean", "local")
+                         or VIO_CLASSIFIER_ENABLED and Classifier.is_confident_clean(input)):
+            result = {"is_Violations": "否", "hits": hits}
+            yield "verdict", result
+            yield "done", result
+            return
+
+        # 命中缓存时一次性回放全部事件
+        cached = await result_cache.get(input)
+        if cached is not None:
+            result = {**cached, "hits": hits}
+            yield "verdict", {key: result[key] for key in ("is_Violations", "words", "reason", "hits") if key in result}
+            if result["is_Violations"] == "是":
+                yield "op", {"delta": result["op"]}
+                yield "ideas", {"op": result["op"], "ideas": result["ideas"]}
+                yield "score", {key: result[key] for key in SCORE_KEYS}
+            yield "done", result
+            return
+
+        chains = LLMRegistry.get_chains()
+
+        if hits and VIO_PREFILTER_POLICY == "local":
+            is_Violations = "是"
+            words, reason = hits_to_words(hits)
+        else:
+            detected = await chains["detect"].ainvoke({"input": input})
+            is_Violations = detected['is_Violations']
+            words = detected['words']
+            reason = detected['reason']
+
+        if is_Violations != '是':
+            await result_cache.set(input, {"is_Violations": "否"})
+            result = {"is_Violations": "否", "hits": hits}
+            yield "verdict", result
+            yield "done", result
+            return
+
+        yield "verdict", {"is_Violations": is_Violations, "words": words, "reason": reason, "hits": hits}
+
+        # 优化阶段: 解析器逐步产出不完整的JSON对象，按 op 字段的增长推送增量
+        optimized = {}
+        sent = ""
+        async for partial in chains["optimize"].astream({"input": input, "words": words, "reason": reason}):
+            optimized = partial
+            op = partial.get("op") or ""
+            if isinstance(op, str) and len(op) > len(sent) and op.startswith(sent):
+                yield "op", {"delta": op[len(sent):]}
+                sent = op
+        op = optimized['op']
+        ideas = optimized['ideas']
+        if op != sent:
+            yield "op", {"delta": op[len(sent):] if op.startswith(sent) else op}
+        yield "ideas", {"op": op, "ideas": ideas}
+
+        score = await score_rewrite(input, words, op, chains)
+        yield "score", score
+
+        result = {
+            "is_Violations": is_Violations,
+            "words": words,
+            "reason": reason,
+            "op": op,
+            "ideas": ideas,
+            **score
+        }
+        await result_cache.set(input, result)
+        yield "done", {**result, "hits": hits}
+    except LLMUnavailableError as e:
+        # 大模型熔断或超时，以本地词库降级结果结束
+        logger.warning(f"降级检测: {e}")
+        yield "done", {**degraded_result(input, hits), "hits": hits}
+    except Exception as e:
+        print(f"Error: {e}")
+        yield "error", {"message": "检测失败"}
+
 async def main():
     result = await vio_word_check("家人们看好了！这款国家级专利的磁疗床垫，彻底根治腰间盘突出！现在下单直接砍到骨折价，点击下方链接马上抢购！无效全额退款！")
     print(result)
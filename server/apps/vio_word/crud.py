@@ -1,8 +1,19 @@
+import base64
+import html
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, update, delete, tuple_, or_, text, table, column, literal_column, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql import func
 from core.database import AsyncSessionLocal
 from core.logger import setup_logger
-from apps.vio_word.models import Vio_word
+from apps.vio_word.models import Vio_word, Vio_word_job, Vio_lexicon_category, Vio_lexicon_term, Vio_word_term_daily
+from apps.vio_word.simhash import near_duplicate_index, to_unsigned
+from apps.vio_word.config import VIO_SEARCH_SNIPPET_TOKENS, VIO_SEARCH_RANK_CANDIDATES, VIO_NEAR_DUP_ENABLED
+from apps.vio_word.scoring import split_words
 
 # 设置日志记录器
 logger = setup_logger('vio_word_crud')
@@ -12,32 +23,64 @@ async def create_vio_word(db: AsyncSession, vio_word_data: dict):
     try:
         new_vio_word = Vio_word(**vio_word_data)
         db.add(new_vio_word)
+        await apply_term_rollup(db, term_rollup_deltas([vio_word_data]))
         await db.commit()
         await db.refresh(new_vio_word)
+        # 启用近似重复查找时新记录加入索引(降级结果不参与复用)
+        if VIO_NEAR_DUP_ENABLED and new_vio_word.simhash is not None and not new_vio_word.degraded:
+            near_duplicate_index.add(new_vio_word.id, to_unsigned(new_vio_word.simhash))
         return new_vio_word
     except Exception as e:
         await db.rollback()
         raise e
 
+async def create_vio_words(db: AsyncSession, vio_word_data_list: list):
+    """批量创建违规词检测记录(单条 INSERT 语句批量写入)"""
+    if not vio_word_data_list:
+        return 0
+    try:
+        result = await db.execute(insert(Vio_word).returning(Vio_word.id, Vio_word.simhash, Vio_word.degraded), vio_word_data_list)
+        rows = result.all()
+        # 违规词按天汇总与检测记录在同一事务中更新
+        await apply_term_rollup(db, term_rollup_deltas(vio_word_data_list))
+        await db.commit()
+        # 启用近似重复查找时新记录加入索引(降级结果不参与复用)
+        if VIO_NEAR_DUP_ENABLED:
+            for id, simhash, degraded in rows:
+                if simhash is not None and not degraded:
+                    near_duplicate_index.add(id, to_unsigned(simhash))
+        return len(vio_word_data_list)
+    except Exception as e:
+        await db.rollback()
+        raise e
+
 async def get_vio_word(db: AsyncSession, id: int):
     """获取单个违规词检测记录"""
     return await db.get(Vio_word, id)
 
 async def get_vio_words_by_filters(db: AsyncSession, filters: dict = None, order_by: dict = None, page: int = 1, page_size: int = 10):
-    """根据条件查询违规词检测记录"""
+    """
+    根据条件查询违规词检测记录，分页和计数在数据库中完成
+    按手机号查询时走 (phone, is_deleted, created_at) 组合索引，每页耗时与表的总行数无关
+    :return: (当前页记录, 总记录数)
+    """
     try:
-        # 构建基础查询
-        query = select(Vio_word).where(Vio_word.is_deleted == False)
-        
-        # 添加过滤条件
+        # 构建过滤条件
+        conditions = [Vio_word.is_deleted == False]
         if filters:
             if "phone" in filters:
-                query = query.where(Vio_word.phone == filters["phone"])
+                conditions.append(Vio_word.phone == filters["phone"])
             if "is_violation" in filters:
-                query = query.where(Vio_word.is_violation == filters["is_violation"])
+                conditions.append(Vio_word.is_violation == filters["is_violation"])
             if "created_at" in filters:
-                query = query.where(Vio_word.created_at == filters["created_at"])
-        
+                conditions.append(Vio_word.created_at == filters["created_at"])
+
+        # 计算总记录数
+        total = await db.execute(select(func.count()).select_from(Vio_word).where(*conditions))
+        total_count = total.scalar()
+
+        query = select(Vio_word).where(*conditions)
+
         # 添加排序条件
         if order_by:
             for key, value in order_by.items():
@@ -45,24 +88,181 @@ async def get_vio_words_by_filters(db: AsyncSession, filters: dict = None, order
                     query = query.order_by(getattr(Vio_word, key).desc())
                 else:
                     query = query.order_by(getattr(Vio_word, key))
-        
+
+        # 添加分页
+        offset = (page - 1) * page_size
+        query = query.offset(offset).limit(page_size)
+
         # 执行查询
         result = await db.execute(query)
         vio_words = result.scalars().all()
-        
-        # 计算总记录数
-        total_count = len(vio_words)
-        
-        # 手动分页
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_vio_words = vio_words[start_idx:end_idx]
-        
-        return paginated_vio_words, total_count
+
+        return vio_words, total_count
     except Exception as e:
         logger.error(f"查询违规词检测记录失败: {str(e)}")
         raise
 
+def encode_cursor(vio_word: Vio_word) -> str:
+    """由一页最后一条记录生成游标(对客户端不透明)"""
+    payload = json.dumps([vio_word.created_at.isoformat(), vio_word.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解析游标
+    :raises ValueError: 游标格式错误
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(id)
+    except Exception:
+        raise ValueError("游标格式错误")
+
+async def get_vio_words_by_cursor(db: AsyncSession, phone: str, cursor: Optional[str] = None,
+                                  page_size: int = 10, with_total: bool = True):
+    """
+    按手机号游标分页查询违规词检测记录，按 (created_at, id) 倒序
+    从上一页最后一条记录之后继续读取，沿组合索引定位，每页耗时与翻页深度无关
+    :param cursor: 上一页返回的 next_cursor，为空时从最新的记录开始
+    :param with_total: 是否统计总记录数，不需要时跳过 COUNT
+    :return: (当前页记录, 下一页游标(没有更多记录时为 None), 总记录数(未统计时为 None))
+    :raises ValueError: 游标格式错误
+    """
+    try:
+        conditions = [Vio_word.phone == phone, Vio_word.is_deleted == False]
+
+        total_count = None
+        if with_total:
+            total = await db.execute(select(func.count()).select_from(Vio_word).where(*conditions))
+            total_count = total.scalar()
+
+        query = select(Vio_word).where(*conditions)
+        if cursor:
+            query = query.where(tuple_(Vio_word.created_at, Vio_word.id) < tuple_(*decode_cursor(cursor)))
+        # 多取一条判断是否还有下一页
+        query = query.order_by(Vio_word.created_at.desc(), Vio_word.id.desc()).limit(page_size + 1)
+
+        result = await db.execute(query)
+        vio_words = result.scalars().all()
+
+        next_cursor = None
+        if len(vio_words) > page_size:
+            vio_words = vio_words[:page_size]
+            next_cursor = encode_cursor(vio_words[-1])
+
+        return vio_words, next_cursor, total_count
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"游标查询违规词检测记录失败: {str(e)}")
+        raise
+
+# 全文索引表(见 models.VIO_WORD_FTS_DDL)
+vio_word_fts = table("vio_word_fts", column("rowid"), column("rank"))
+# 参与检索的字段
+SEARCH_COLUMNS = ("input", "words", "reasons", "op")
+# trigram 分词最短可检索长度，更短的词改用 LIKE 匹配
+TRIGRAM_MIN_CHARS = 3
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, ELLIPSIS = "<mark>", "</mark>", "…"
+# 摘要中标记命中位置的控制字符，转义原文后再替换为高亮标签，避免原文中的 HTML 被后台页面渲染
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _render_snippet(fragment: str) -> str:
+    """转义摘要原文，再把命中位置标记替换为高亮标签"""
+    return html.escape(fragment).replace(_MARK_OPEN, HIGHLIGHT_OPEN).replace(_MARK_CLOSE, HIGHLIGHT_CLOSE)
+
+def _like_snippet(vio_word: Vio_word, terms: List[str], width: int = VIO_SEARCH_SNIPPET_TOKENS) -> str:
+    """LIKE 匹配的记录没有 FTS 摘要，取首个命中位置附近的片段并高亮"""
+    for name in SEARCH_COLUMNS:
+        value = getattr(vio_word, name) or ""
+        positions = [value.find(term) for term in terms if term in value]
+        if not positions:
+            continue
+        start = max(min(positions) - width // 2, 0)
+        end = min(start + width, len(value))
+        fragment = value[start:end]
+        for term in terms:
+            fragment = fragment.replace(term, f"{_MARK_OPEN}{term}{_MARK_CLOSE}")
+        return _render_snippet(f"{ELLIPSIS if start > 0 else ''}{fragment}{ELLIPSIS if end < len(value) else ''}")
+    return ""
+
+async def search_vio_words(db: AsyncSession, terms: List[str], phone: str = None, limit: int = 20):
+    """
+    全文检索违规词检测记录(输入内容、违规词、违规原因、优化话术)，多个检索词之间为 AND
+    3 个字符及以上的检索词走 FTS5 trigram 索引并返回高亮摘要:
+        命中不超过 VIO_SEARCH_RANK_CANDIDATES 条时按 bm25 相关度排序；
+        命中更多时(常见词，bm25 需要统计全部命中，耗时随命中数线性增长)按时间倒序返回最新的命中
+    全部检索词都短于 3 个字符时无法使用索引，退化为从最新记录开始的 LIKE 扫描
+    摘要中的原文已做 HTML 转义，只有高亮标签是 HTML
+    :return: [(记录, 高亮摘要, 相关度得分(越小越相关，未按相关度排序时为 None))]
+    """
+    try:
+        long_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+        short_terms = [term for term in terms if len(term) < TRIGRAM_MIN_CHARS]
+
+        conditions = [Vio_word.is_deleted == False]
+        if phone:
+            conditions.append(Vio_word.phone == phone)
+        for term in short_terms:
+            pattern = f"%{_escape_like(term)}%"
+            conditions.append(or_(*(getattr(Vio_word, name).like(pattern, escape="\\") for name in SEARCH_COLUMNS)))
+
+        if long_terms:
+            # 每个检索词按短语匹配，双引号转义
+            match = text("vio_word_fts MATCH :match").bindparams(
+                match=" ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+            )
+            # 先数命中数(最多数到上限 + 1，沿倒排表读取，不计算相关度)决定排序方式
+            candidates = select(vio_word_fts.c.rowid).where(match).limit(VIO_SEARCH_RANK_CANDIDATES + 1).subquery()
+            matched = (await db.execute(select(func.count()).select_from(candidates))).scalar()
+            ranked = matched <= VIO_SEARCH_RANK_CANDIDATES
+            snippet = literal_column(
+                f"snippet(vio_word_fts, -1, char(2), char(3), '{ELLIPSIS}', {int(VIO_SEARCH_SNIPPET_TOKENS)})"
+            )
+            query = (
+                select(Vio_word, snippet, vio_word_fts.c.rank if ranked else literal_column("NULL"))
+                .select_from(vio_word_fts)
+                .join(Vio_word, Vio_word.id == vio_word_fts.c.rowid)
+                .where(match, *conditions)
+                .order_by(vio_word_fts.c.rank if ranked else vio_word_fts.c.rowid.desc())
+                .limit(limit)
+            )
+            result = await db.execute(query)
+            return [(vio_word, _render_snippet(snippet or ""), rank) for vio_word, snippet, rank in result.all()]
+
+        query = select(Vio_word).where(*conditions).order_by(Vio_word.id.desc()).limit(limit)
+        result = await db.execute(query)
+        return [(vio_word, _like_snippet(vio_word, short_terms), None) for vio_word in result.scalars().all()]
+    except Exception as e:
+        logger.error(f"全文检索违规词检测记录失败: {str(e)}")
+        raise
+
+async def get_vio_word_fingerprints(db: AsyncSession, limit: int):
+    """获取最近的检测记录指纹 [(id, input, simhash)]，按ID降序，不含降级结果"""
+    result = await db.execute(
+        select(Vio_word.id, Vio_word.input, Vio_word.simhash)
+        .where(Vio_word.is_deleted == False, Vio_word.degraded == False)
+        .order_by(Vio_word.id.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+async def update_vio_word_fingerprints(db: AsyncSession, fingerprints: dict):
+    """批量回写检测记录指纹 {id: simhash}"""
+    if not fingerprints:
+        return 0
+    try:
+        await db.execute(update(Vio_word), [{"id": id, "simhash": simhash} for id, simhash in fingerprints.items()])
+        await db.commit()
+        return len(fingerprints)
+    except Exception as e:
+        await db.rollback()
+        raise e
+
 async def update_vio_word(db: AsyncSession, id: int, update_data: dict):
     """更新违规词检测记录"""
     try:
@@ -82,9 +282,283 @@ async def delete_vio_word(db: AsyncSession, id: int):
     try:
         vio_word = await db.get(Vio_word, id)
         if vio_word:
+            if not vio_word.is_deleted:
+                # 从违规词按天汇总中扣除
+                await apply_term_rollup(db, term_rollup_deltas([{
+                    "is_violation": vio_word.is_violation,
+                    "words": vio_word.words,
+                    "ai_product_id": vio_word.ai_product_id,
+                    "degraded": vio_word.degraded,
+                    "created_at": vio_word.created_at
+                }]), sign=-1)
             vio_word.is_deleted = True
             await db.commit()
         return vio_word
     except Exception as e:
         await db.rollback()
-        raise e 
\ No newline at end of file
+        raise e
+
+
+# 违规词按天汇总表操作
+def term_rollup_deltas(records: List[dict]) -> Counter:
+    """
+    统计一批检测记录对按天汇总的增量
+    只统计违规记录(不含降级结果)，同一条记录中重复的违规词计一次；没有创建时间的新记录按当前 UTC 日期
+    :return: Counter[(日期, AI产品ID, 违规词)] -> 次数
+    """
+    deltas = Counter()
+    today = datetime.utcnow().date()
+    for record in records:
+        if not record.get("is_violation") or record.get("degraded"):
+            continue
+        created_at = record.get("created_at")
+        day = created_at.date() if created_at else today
+        ai_product_id = record.get("ai_product_id") or ""
+        for term in dict.fromkeys(split_words(record.get("words") or "")):
+            deltas[(day, ai_product_id, term[:100])] += 1
+    return deltas
+
+async def apply_term_rollup(db: AsyncSession, deltas: Counter, sign: int = 1):
+    """
+    把增量累加到按天汇总表(INSERT ... ON CONFLICT DO UPDATE)，不提交事务
+    :param sign: 1 为累加，-1 为扣除(删除检测记录时)
+    扣除只更新已有的汇总行且结果不小于 0：汇总表建立前(迁移时未重算)的检测记录被删除时没有可扣除的计数
+    """
+    if not deltas:
+        return
+    if sign < 0:
+        rollup = Vio_word_term_daily.__table__
+        stmt = (
+            update(rollup)
+            .where(
+                rollup.c.day == bindparam("b_day"),
+                rollup.c.ai_product_id == bindparam("b_ai_product_id"),
+                rollup.c.term == bindparam("b_term")
+            )
+            .values(count=func.max(rollup.c.count - bindparam("b_count"), 0))
+        )
+        await db.execute(stmt, [
+            {"b_day": day, "b_ai_product_id": ai_product_id, "b_term": term, "b_count": count}
+            for (day, ai_product_id, term), count in deltas.items()
+        ])
+        return
+    stmt = sqlite_insert(Vio_word_term_daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vio_word_term_daily.day, Vio_word_term_daily.ai_product_id, Vio_word_term_daily.term],
+        set_={"count": Vio_word_term_daily.count + stmt.excluded.count}
+    )
+    await db.execute(stmt, [
+        {"day": day, "ai_product_id": ai_product_id, "term": term, "count": count}
+        for (day, ai_product_id, term), count in deltas.items()
+    ])
+
+async def get_top_terms(db: AsyncSession, start: date, end: date, ai_product_id: str = None, k: int = 10) -> List[Dict]:
+    """
+    日期范围内检出次数最多的 k 个违规词，只读取按天汇总表
+    :param ai_product_id: 指定AI产品，为 None 时统计全部产品
+    :return: [{"term", "count"}]
+    """
+    try:
+        total = func.sum(Vio_word_term_daily.count).label("count")
+        query = select(Vio_word_term_daily.term, total).where(
+            Vio_word_term_daily.day >= start,
+            Vio_word_term_daily.day <= end
+        )
+        if ai_product_id is not None:
+            query = query.where(Vio_word_term_daily.ai_product_id == ai_product_id)
+        query = query.group_by(Vio_word_term_daily.term).having(total > 0).order_by(total.desc(), Vio_word_term_daily.term).limit(k)
+        result = await db.execute(query)
+        return [{"term": term, "count": count} for term, count in result.all()]
+    except Exception as e:
+        logger.error(f"查询高频违规词失败: {str(e)}")
+        raise
+
+async def rebuild_term_rollup(db: AsyncSession, since: date = None, batch_size: int = 10000) -> Dict:
+    """
+    由检测记录重新计算按天汇总(since 之后的日期，未指定时全部重算)
+    先删除汇总行再分批读取检测记录，整个过程在一个写事务中完成，期间的新记录等待事务提交后写入，不会重复计数
+    :return: {"records", "rows"} 读取的检测记录数和写入的汇总行数
+    """
+    try:
+        cleanup = delete(Vio_word_term_daily)
+        if since is not None:
+            cleanup = cleanup.where(Vio_word_term_daily.day >= since)
+        await db.execute(cleanup)
+
+        conditions = [Vio_word.is_deleted == False, Vio_word.is_violation == True, Vio_word.degraded == False]
+        if since is not None:
+            conditions.append(Vio_word.created_at >= datetime.combine(since, time.min))
+        deltas = Counter()
+        records = 0
+        last_id = 0
+        while True:
+            result = await db.execute(
+                select(Vio_word.id, Vio_word.is_violation, Vio_word.words, Vio_word.ai_product_id, Vio_word.created_at)
+                .where(Vio_word.id > last_id, *conditions)
+                .order_by(Vio_word.id)
+                .limit(batch_size)
+            )
+            rows = [row._asdict() for row in result.all()]
+            if not rows:
+                break
+            deltas.update(term_rollup_deltas(rows))
+            records += len(rows)
+            last_id = rows[-1]["id"]
+
+        items = list(deltas.items())
+        for start in range(0, len(items), batch_size):
+            await apply_term_rollup(db, Counter(dict(items[start:start + batch_size])))
+        await db.commit()
+        return {"records": records, "rows": len(deltas)}
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"重算违规词按天汇总失败: {str(e)}")
+        raise
+
+
+# 违规词检测异步任务表操作
+async def create_vio_word_job(db: AsyncSession, job_data: dict):
+    """创建违规词检测异步任务"""
+    try:
+        new_job = Vio_word_job(**job_data)
+        db.add(new_job)
+        await db.commit()
+        return new_job
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def get_vio_word_job(db: AsyncSession, job_id: str):
+    """获取单个违规词检测异步任务"""
+    return await db.get(Vio_word_job, job_id)
+
+async def claim_vio_word_job(db: AsyncSession):
+    """
+    领取最早提交的待执行任务
+    查找与状态更新在同一条语句内完成，多个工作协程/进程并发领取时不会重复
+    :return: 领取到的任务，队列为空时返回 None
+    """
+    try:
+        next_job_id = select(Vio_word_job.job_id).where(
+            Vio_word_job.status == "pending"
+        ).order_by(Vio_word_job.created_at).limit(1).scalar_subquery()
+        stmt = update(Vio_word_job).where(
+            Vio_word_job.job_id == next_job_id,
+            Vio_word_job.status == "pending"
+        ).values(
+            status="running",
+            started_at=datetime.utcnow()
+        ).returning(Vio_word_job)
+        result = await db.execute(stmt)
+        job = result.scalars().first()
+        await db.commit()
+        return job
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def update_vio_word_job(db: AsyncSession, job_id: str, update_data: dict):
+    """更新违规词检测异步任务"""
+    try:
+        stmt = update(Vio_word_job).where(Vio_word_job.job_id == job_id).values(**update_data)
+        await db.execute(stmt)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def requeue_running_vio_word_jobs(db: AsyncSession, lease_seconds: float):
+    """
+    把租约已过期的执行中任务重新放回队列
+    只处理开始执行超过 lease_seconds 的任务(执行它的进程已退出)，其他进程正在执行的任务不受影响
+    """
+    try:
+        expired = datetime.utcnow() - timedelta(seconds=lease_seconds)
+        stmt = update(Vio_word_job).where(
+            Vio_word_job.status == "running",
+            Vio_word_job.started_at < expired
+        ).values(status="pending", started_at=None)
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def count_vio_word_jobs_by_status(db: AsyncSession):
+    """按状态统计违规词检测异步任务数量"""
+    result = await db.execute(
+        select(Vio_word_job.status, func.count()).group_by(Vio_word_job.status)
+    )
+    return {status: count for status, count in result.all()}
+
+
+# 违规词词库表操作
+async def get_lexicon_categories(db: AsyncSession):
+    """获取所有词库分类"""
+    result = await db.execute(select(Vio_lexicon_category).order_by(Vio_lexicon_category.name))
+    return result.scalars().all()
+
+async def get_lexicon_terms(db: AsyncSession, category: str = None):
+    """获取未删除的词库词条，可按分类过滤"""
+    query = select(Vio_lexicon_term).where(Vio_lexicon_term.is_deleted == False)
+    if category:
+        query = query.where(Vio_lexicon_term.category == category)
+    result = await db.execute(query.order_by(Vio_lexicon_term.id))
+    return result.scalars().all()
+
+async def upsert_lexicon_category(db: AsyncSession, name: str, weight: int, reason: str):
+    """创建或更新词库分类"""
+    try:
+        category = await db.get(Vio_lexicon_category, name)
+        if category is None:
+            category = Vio_lexicon_category(name=name, weight=weight, reason=reason)
+            db.add(category)
+        else:
+            category.weight = weight
+            category.reason = reason
+        await db.commit()
+        await db.refresh(category)
+        return category
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def create_lexicon_terms(db: AsyncSession, category: str, terms: list):
+    """
+    批量添加词条，已存在的词条(包括已删除的)恢复并移动到该分类
+    :return: 新增或恢复的词条数
+    """
+    terms = list(dict.fromkeys(terms))
+    if not terms:
+        return 0
+    try:
+        result = await db.execute(select(Vio_lexicon_term).where(Vio_lexicon_term.term.in_(terms)))
+        existing = {term.term: term for term in result.scalars().all()}
+        changed = 0
+        for word in terms:
+            term = existing.get(word)
+            if term is None:
+                db.add(Vio_lexicon_term(term=word, category=category, is_deleted=False))
+                changed += 1
+            elif term.is_deleted or term.category != category:
+                term.is_deleted = False
+                term.category = category
+                changed += 1
+        await db.commit()
+        return changed
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+async def delete_lexicon_term(db: AsyncSession, id: int):
+    """删除词库词条（软删除）"""
+    try:
+        term = await db.get(Vio_lexicon_term, id)
+        if term:
+            term.is_deleted = True
+            await db.commit()
+        return term
+    except Exception as e:
+        await db.rollback()
+        raise e
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import deque
+from typing import List
+from core.database import AsyncSessionLocal
+from core.logger import setup_logger
+from apps.vio_word import crud as vio_word_crud
+from apps.vio_word.config import (
+    VIO_HISTORY_WRITE_BEHIND, VIO_HISTORY_BATCH_SIZE, VIO_HISTORY_FLUSH_MS, VIO_HISTORY_MAX_BACKLOG
+)
+from apps.vio_word.metrics import LatencyWindow
+
+# 设置日志记录器
+logger = setup_logger('vio_word_history')
+
+"""
+检测记录延迟批量写入
+检测接口只把记录放入内存队列即返回，后台协程每攒够 batch_size 条或每隔 flush_ms 毫秒
+用一条批量 INSERT 写入，减少请求路径上的数据库往返和对 SQLite 写锁的争用
+
+积压超过 max_backlog 时由写入方同步刷新(反压)；写入失败的记录放回队列等待下次刷新，
+持续失败导致积压超过上限时丢弃最早的记录并记录错误日志；关闭时刷新全部积压记录
+"""
+
+
+class HistoryWriter:
+    def __init__(self, batch_size: int = VIO_HISTORY_BATCH_SIZE, flush_ms: float = VIO_HISTORY_FLUSH_MS,
+                 max_backlog: int = VIO_HISTORY_MAX_BACKLOG, enabled: bool = VIO_HISTORY_WRITE_BEHIND):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.max_backlog = max_backlog
+        self.enabled = enabled
+        # (入队时间, 记录)
+        self.pending: deque = deque()
+        self._task = None
+        self._wakeup = None
+        self._lock = None
+        self.counters = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "failures": 0,
+            "dropped": 0,
+            "backpressure": 0
+        }
+        self.flush_latency = LatencyWindow()
+        # 记录从入队到写入数据库的延迟
+        self.write_delay = LatencyWindow()
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """启动后台刷新协程"""
+        if self.started or not self.enabled:
+            return
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"vio_word history writer started: batch_size={self.batch_size}, flush_ms={self.flush_interval * 1000:.0f}")
+
+    async def stop(self):
+        """停止后台协程并写入全部积压记录"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self.pending:
+            if not await self.flush():
+                logger.error(f"关闭时写入检测记录失败，丢弃 {len(self.pending)} 条")
+                self.counters["dropped"] += len(self.pending)
+                self.pending.clear()
+        logger.info("vio_word history writer stopped")
+
+    async def add(self, records: List[dict]):
+        """
+        保存检测记录
+        启用延迟写入时放入队列后立即返回，否则直接写入数据库
+        """
+        if not records:
+            return
+        if not self.enabled:
+            async with AsyncSessionLocal() as db:
+                await vio_word_crud.create_vio_words(db, records)
+            return
+        if not self.started:
+            self.start()
+        now = time.monotonic()
+        self.pending.extend((now, record) for record in records)
+        self.counters["enqueued"] += len(records)
+        if len(self.pending) >= self.max_backlog:
+            # 后台写入跟不上，由写入方同步刷新
+            self.counters["backpressure"] += 1
+            await self.flush()
+        elif len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self.pending:
+                if not await self.flush():
+                    break
+                if len(self.pending) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        """
+        写入一批积压记录(最多 batch_size 条)
+        :return: 是否写入成功
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.pending:
+                return True
+            count = min(self.batch_size, len(self.pending))
+            batch = [self.pending.popleft() for _ in range(count)]
+            started = time.monotonic()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await vio_word_crud.create_vio_words(db, [record for _, record in batch])
+            except Exception as e:
+                self.counters["failures"] += 1
+                logger.error(f"批量写入检测记录失败: {str(e)}")
+                # 放回队首等待下次刷新，超过上限的部分丢弃最早的记录
+                self.pending.extendleft(reversed(batch))
+                overflow = len(self.pending) - self.max_backlog
+                if overflow > 0:
+                    for _ in range(overflow):
+                        self.pending.popleft()
+                    self.counters["dropped"] += overflow
+                    logger.error(f"检测记录积压超过上限，丢弃 {overflow} 条")
+                return False
+            finished = time.monotonic()
+            self.flush_latency.add(finished - started)
+            for enqueued_at, _ in batch:
+                self.write_delay.add(finished - enqueued_at)
+            self.counters["written"] += count
+            self.counters["batches"] += 1
+            return True
+
+    def stats(self) -> dict:
+        oldest = time.monotonic() - self.pending[0][0] if self.pending else 0.0
+        return {
+            "enabled": self.enabled,
+            "backlog": len(self.pending),
+            "oldest_ms": round(oldest * 1000, 2),
+            **self.counters,
+            "flush_latency": self.flush_latency.summary(),
+            "write_delay": self.write_delay.summary()
+        }
+
+
+# 进程内共享的检测记录写入队列
+history_writer = HistoryWriter()
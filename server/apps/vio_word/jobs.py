@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from core.database import AsyncSessionLocal
+from core.logger import setup_logger
+from apps.vio_word import crud as vio_word_crud
+from apps.business import crud as business_crud
+from apps.vio_word.config import VIO_JOB_WORKERS, VIO_JOB_POLL_INTERVAL, VIO_JOB_TIMEOUT, VIO_JOB_LEASE_SECONDS
+from apps.vio_word.core import vio_word_check
+from apps.vio_word.metrics import LatencyWindow
+from apps.vio_word.history import history_writer
+
+# 设置日志记录器
+logger = setup_logger('vio_word_jobs')
+
+"""
+违规词检测异步任务
+提交接口只写入任务表并立即返回任务ID，由进程内的工作协程池从任务表(持久化队列)中领取执行，
+调用方通过任务ID轮询结果，慢速的大模型调用不再占用HTTP请求槽位
+
+领取任务即取得租约: 任务最长执行 timeout 秒，超时记为失败；执行中超过 lease_seconds 仍未完成的任务
+说明执行它的进程已退出，由任一进程的工作池在启动时和空闲时重新放回队列
+"""
+
+
+class JobWorkerPool:
+    def __init__(self, workers: int = VIO_JOB_WORKERS, poll_interval: float = VIO_JOB_POLL_INTERVAL,
+                 timeout: float = VIO_JOB_TIMEOUT, lease_seconds: float = VIO_JOB_LEASE_SECONDS):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.timeout = min(timeout, lease_seconds)
+        self.lease_seconds = lease_seconds
+        self._last_requeue = 0.0
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self.busy = 0
+        self.counters = {
+            "submitted": 0,
+            "done": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "requeued": 0
+        }
+        # 排队等待时间(提交 -> 开始执行)与服务时间(开始执行 -> 完成)
+        self.wait_time = LatencyWindow()
+        self.service_time = LatencyWindow()
+
+    @property
+    def started(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def _requeue_expired(self):
+        """把租约已过期的任务放回队列"""
+        self._last_requeue = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            requeued = await vio_word_crud.requeue_running_vio_word_jobs(db, self.lease_seconds)
+        if requeued:
+            self.counters["requeued"] += requeued
+            logger.info(f"Requeued {requeued} vio_word jobs with expired lease")
+
+    async def start(self):
+        """启动工作协程，并把租约已过期(执行进程已退出)的任务放回队列"""
+        if self.started:
+            return
+        await self._requeue_expired()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        logger.info(f"vio_word job worker pool started with {self.workers} workers")
+
+    async def stop(self):
+        """停止工作协程，执行中的任务在租约过期后重新入队"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("vio_word job worker pool stopped")
+
+    async def submit(self, phone: str, ai_product_id: str, entitlement_id: str, input_text: str):
+        """
+        提交检测任务
+        :return: 新建的任务
+        """
+        if not self.started:
+            await self.start()
+        job_data = {
+            "job_id": uuid.uuid4().hex,
+            "phone": phone,
+            "ai_product_id": ai_product_id,
+            "entitlement_id": entitlement_id,
+            "input": input_text,
+            "status": "pending"
+        }
+        async with AsyncSessionLocal() as db:
+            job = await vio_word_crud.create_vio_word_job(db, job_data)
+        self.counters["submitted"] += 1
+        self._wakeup.set()
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await vio_word_crud.claim_vio_word_job(db)
+                if job is None:
+                    # 队列为空时顺带回收过期租约
+                    if time.monotonic() - self._last_requeue >= self.lease_seconds / 2:
+                        await self._requeue_expired()
+                    # 等待新任务提交或到达轮询间隔
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"vio_word job worker {index} error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, job):
+        """执行单个任务并保存结果"""
+        self.busy += 1
+        started = time.monotonic()
+        if job.created_at and job.started_at:
+            self.wait_time.add((job.started_at - job.created_at).total_seconds())
+        try:
+            # 在租约到期前结束，避免过期后被其他进程重复执行
+            result = await asyncio.wait_for(vio_word_check(job.input), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"vio_word job {job.job_id} timed out after {self.timeout}s")
+            self.counters["timeouts"] += 1
+            result = False
+        except Exception as e:
+            logger.error(f"vio_word job {job.job_id} failed: {str(e)}")
+            result = False
+        finally:
+            self.busy -= 1
+        self.service_time.add(time.monotonic() - started)
+
+        from apps.vio_word.services import build_vio_word_record
+        async with AsyncSessionLocal() as db:
+            if result == False:
+                self.counters["failed"] += 1
+                await vio_word_crud.update_vio_word_job(db, job.job_id, {
+                    "status": "failed",
+                    "error": "检测失败",
+                    "finished_at": datetime.utcnow()
+                })
+                # 检测失败，退还提交时预扣的额度
+                await business_crud.release_user_entitlement_quota(db, job.entitlement_id, 1)
+                return
+
+            self.counters["done"] += 1
+            await vio_word_crud.update_vio_word_job(db, job.job_id, {
+                "status": "done",
+                "result": json.dumps(result, ensure_ascii=False),
+                "finished_at": datetime.utcnow()
+            })
+        # 保存检测记录(写入队列，由后台批量写入)
+        try:
+            await history_writer.add([build_vio_word_record(job.phone, job.input, result, job.ai_product_id)])
+        except Exception as e:
+            logger.error(f"保存违规词检测记录失败: {str(e)}")
+
+    async def stats(self) -> dict:
+        """任务队列运行指标"""
+        async with AsyncSessionLocal() as db:
+            by_status = await vio_word_crud.count_vio_word_jobs_by_status(db)
+        return {
+            "workers": self.workers if self.started else 0,
+            "busy": self.busy,
+            "queue_depth": by_status.get("pending", 0),
+            "running": by_status.get("running", 0),
+            "by_status": by_status,
+            **self.counters,
+            "wait_time": self.wait_time.summary(),
+            "service_time": self.service_time.summary()
+        }
+
+
+# 进程内共享的任务工作池
+job_pool = JobWorkerPool()
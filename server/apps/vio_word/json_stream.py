@@ -0,0 +1,236 @@
+from typing import List, Optional
+import orjson
+from core.logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('vio_word_json_stream')
+
+"""
+流式 JSON 提取
+逐块扫描模型输出，从第一个 { 开始跟踪字符串和括号嵌套，顶层对象闭合即完成，
+调用方随即关闭模型流，不再等待(和计费)后面的代码块结束标记、解释文字等多余输出
+
+解析前修复常见的格式问题，再用 orjson 解析:
+    代码块标记和前后多余文字  - 只取顶层对象
+    字符串中未转义的换行等控制字符
+    对象/数组末尾多余的逗号
+    输出被截断                - 补齐字符串引号和括号
+"""
+
+# 字符串中需要转义的控制字符
+CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+# 解析统计，early_closed 为对象闭合后主动关闭模型流的次数
+counters = {
+    "parsed": 0,
+    "early_closed": 0,
+    "repaired": 0,
+    "failed": 0
+}
+
+
+class JsonExtractError(ValueError):
+    """模型输出中没有可解析的 JSON 对象"""
+
+
+def _strip_trailing_comma(out: List[str]):
+    while out and out[-1] in " \t\r\n":
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair(text: str) -> str:
+    """修复控制字符、末尾逗号和截断，返回可交给 orjson 解析的文本"""
+    out = []
+    closers = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch < " ":
+                ch = CONTROL_ESCAPES.get(ch, f"\\u{ord(ch):04x}")
+            out.append(ch)
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == "{":
+            closers.append("}")
+        elif ch == "[":
+            closers.append("]")
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if closers:
+                closers.pop()
+        out.append(ch)
+    # 截断的输出: 去掉不完整的转义，补齐引号和括号
+    if escape:
+        out.pop()
+    if in_string:
+        out.append('"')
+    _strip_trailing_comma(out)
+    out.extend(reversed(closers))
+    return "".join(out)
+
+
+def loads(text: str) -> dict:
+    """
+    解析 JSON 对象，直接解析失败时修复后再解析
+    :raises JsonExtractError: 修复后仍无法解析或不是对象
+    """
+    try:
+        value = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        try:
+            value = orjson.loads(repair(text))
+        except orjson.JSONDecodeError as e:
+            raise JsonExtractError(f"模型输出无法解析为JSON: {str(e)}")
+        counters["repaired"] += 1
+    if not isinstance(value, dict):
+        raise JsonExtractError("模型输出不是JSON对象")
+    return value
+
+
+class JsonExtractor:
+    """增量扫描模型输出，定位顶层 JSON 对象"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        self.length = 0
+        # 最后一个对象外层结构上的安全截断点(逗号或左括号之后)，用于解析不完整的对象
+        self.safe = 0
+
+    def feed(self, chunk: str) -> bool:
+        """
+        输入一块模型输出
+        :return: 顶层对象是否已闭合
+        """
+        if self.done or not chunk:
+            return self.done
+        if not self.started:
+            start = chunk.find("{")
+            if start < 0:
+                return False
+            chunk = chunk[start:]
+            self.started = True
+        for index, ch in enumerate(chunk):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+                self.safe = self.length + index + 1
+            elif ch == ",":
+                self.safe = self.length + index
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.parts.append(chunk[:index + 1])
+                    self.length += index + 1
+                    self.done = True
+                    return True
+        self.parts.append(chunk)
+        self.length += len(chunk)
+        return False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def result(self) -> dict:
+        """完整结果(输出结束时对象仍未闭合则按截断修复)"""
+        if not self.started:
+            counters["failed"] += 1
+            raise JsonExtractError("模型输出中没有JSON对象")
+        try:
+            value = loads(self.text)
+        except JsonExtractError as e:
+            counters["failed"] += 1
+            logger.warning(f"{str(e)}, 输出片段: {self.text[:200]}")
+            raise
+        counters["parsed"] += 1
+        return value
+
+    def partial(self) -> Optional[dict]:
+        """当前已输出部分对应的不完整对象，无法解析时返回 None"""
+        if not self.started:
+            return None
+        text = self.text
+        for candidate in (text, text[:self.safe]):
+            try:
+                value = orjson.loads(repair(candidate))
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                return value
+        return None
+
+
+class JsonStage:
+    """
+    提示词 + 模型 + 流式 JSON 提取，接口与 langchain 调用链的 ainvoke / astream 一致
+    first 为提示词模板(与 RunnableSequence.first 一致，供 token 预算展开提示词)
+    """
+
+    def __init__(self, prompt, model):
+        self.first = prompt
+        self.model = model
+
+    async def _chunks(self, inputs: dict, extractor: JsonExtractor):
+        """逐块产出模型输出，对象闭合后关闭模型流"""
+        stream = self.model.astream(self.first.format_messages(**inputs))
+        try:
+            async for chunk in stream:
+                if extractor.feed(chunk.content):
+                    yield chunk.content
+                    break
+                yield chunk.content
+            else:
+                return
+            counters["early_closed"] += 1
+        finally:
+            await stream.aclose()
+
+    async def ainvoke(self, inputs: dict) -> dict:
+        extractor = JsonExtractor()
+        async for _ in self._chunks(inputs, extractor):
+            pass
+        return extractor.result()
+
+    async def astream(self, inputs: dict):
+        """逐步产出不完整的对象(与 JsonOutputParser 的流式输出一致)，最后一次为完整结果"""
+        extractor = JsonExtractor()
+        last = None
+        async for _ in self._chunks(inputs, extractor):
+            if extractor.done:
+                # 对象已闭合，_chunks 随即关闭模型流并结束
+                continue
+            partial = extractor.partial()
+            if partial and partial != last:
+                last = partial
+                yield partial
+        result = extractor.result()
+        if result != last:
+            yield result
+
+
+def stats() -> dict:
+    return dict(counters)
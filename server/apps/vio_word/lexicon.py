@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+from typing import Callable, Dict, List, Tuple
+from core.logger import setup_logger
+from apps.vio_word.config import VIO_LEXICON_PATH, VIO_LEXICON_DIR, VIO_LEXICON_POLL_INTERVAL
+from apps.vio_word.matcher import AhoCorasick
+from apps.vio_word.normalize import normalize, normalize_uncached
+from apps.vio_word import lexicon_store
+
+# 设置日志记录器
+logger = setup_logger('vio_word_lexicon')
+
+"""
+违规词词库
+词库按分类组织，每个分类带有统一的违规原因和严重程度权重(扣分值)，供本地预过滤和本地打分使用
+可通过 VIO_LEXICON_PATH 指定 JSON 文件覆盖内置词库，格式与 DEFAULT_LEXICON 相同
+
+运营维护的词库保存在数据库中，发布时编译为版本化的词库文件(见 lexicon_store)，
+各工作进程发现当前版本变化后映射新文件并整体替换正在使用的词库，请求路径上不做任何编译
+"""
+
+DEFAULT_LEXICON: Dict[str, dict] = {
+    "绝对化用语": {
+        "weight": 15,
+        "reason": "使用绝对化用语，违反《广告法》第九条",
+        "terms": [
+            "最好", "最佳", "最优", "最强", "最高级", "最低价", "最便宜", "最先进", "最受欢迎", "最时尚",
+            "第一", "唯一", "首个", "首选", "顶级", "极致", "独一无二", "全网最低", "史上最低", "绝无仅有",
+            "万能", "100%", "百分之百", "永久", "全球首发", "销量冠军", "王牌", "巅峰"
+        ]
+    },
+    "虚假权威": {
+        "weight": 20,
+        "reason": "使用国家级、权威机构等字样进行虚假背书，违反《广告法》第九条",
+        "terms": [
+            "国家级", "世界级", "国家免检", "国家领导人推荐", "央视推荐", "特供", "专供", "驰名商标", "质量免检"
+        ]
+    },
+    "医疗功效": {
+        "weight": 25,
+        "reason": "普通商品宣传疾病治疗功效，违反《广告法》第十七条",
+        "terms": [
+            "根治", "治愈", "药到病除", "包治百病", "无副作用", "立竿见影", "一次见效", "彻底治疗",
+            "消炎", "抗癌", "防癌", "降血压", "降血糖", "排毒", "祛病"
+        ]
+    },
+    "虚假承诺": {
+        "weight": 20,
+        "reason": "作出无法兑现的效果或收益承诺，涉嫌虚假宣传",
+        "terms": [
+            "无效退款", "无效全额退款", "保证有效", "零风险", "稳赚不赔", "包过", "一夜暴富"
+        ]
+    },
+    "诱导交易": {
+        "weight": 10,
+        "reason": "使用夸张价格用语或诱导性话术，涉嫌价格欺诈",
+        "terms": [
+            "骨折价", "秒杀全网", "跳楼价", "亏本甩卖", "清仓价", "仅此一天", "错过再等一年", "马上抢购"
+        ]
+    }
+}
+
+
+def load_lexicon(path: str = VIO_LEXICON_PATH) -> Dict[str, dict]:
+    """
+    加载词库
+    :param path: 词库文件路径，为空时使用内置词库
+    :return: 分类 -> {"weight", "reason", "terms"} 的字典
+    """
+    if not path:
+        return DEFAULT_LEXICON
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"加载词库文件失败，使用内置词库: {path}, {str(e)}")
+        return DEFAULT_LEXICON
+
+
+def compile_lexicon(lexicon: Dict[str, dict]) -> AhoCorasick:
+    """编译词库为多模式匹配器，词条按与输入相同的规则规范化"""
+    terms = {}
+    for category, entry in lexicon.items():
+        for term in entry.get("terms", []):
+            terms[normalize_uncached(term).text] = category
+    return AhoCorasick.build(terms)
+
+
+class CompiledLexicon:
+    """一个版本的词库和匹配器，发布后不再修改，替换时整体替换引用"""
+    __slots__ = ("version", "lexicon", "matcher")
+
+    def __init__(self, version: str, lexicon: Dict[str, dict], matcher: AhoCorasick):
+        self.version = version
+        self.lexicon = lexicon
+        self.matcher = matcher
+
+
+def load_compiled() -> CompiledLexicon:
+    """加载当前发布的词库文件，没有发布过或加载失败时编译内置词库(或 VIO_LEXICON_PATH)"""
+    try:
+        artifact = lexicon_store.read_artifact()
+        if artifact is not None:
+            return CompiledLexicon(artifact["version"], artifact["lexicon"], artifact["matcher"])
+    except Exception as e:
+        logger.error(f"加载词库文件失败，使用内置词库: {str(e)}")
+    lexicon = load_lexicon()
+    digest = hashlib.sha256(json.dumps(lexicon, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    return CompiledLexicon(f"builtin-{digest}", lexicon, compile_lexicon(lexicon))
+
+
+# 进程内正在使用的词库，模块加载时加载一次
+_active = load_compiled()
+_swap_listeners: List[Callable[[CompiledLexicon], None]] = []
+
+
+def active_lexicon() -> CompiledLexicon:
+    """当前使用的词库，同一次检测内应只取一次，保证前后使用同一版本"""
+    return _active
+
+
+def add_swap_listener(listener: Callable[[CompiledLexicon], None]):
+    """注册词库替换后的回调(例如更新结果缓存版本号)"""
+    _swap_listeners.append(listener)
+
+
+def swap(compiled: CompiledLexicon):
+    """替换正在使用的词库(单次引用赋值，检测中的请求继续使用旧版本)"""
+    global _active
+    if compiled.version == _active.version:
+        return
+    previous = _active.version
+    _active = compiled
+    for listener in _swap_listeners:
+        try:
+            listener(compiled)
+        except Exception as e:
+            logger.error(f"词库替换回调失败: {str(e)}")
+    logger.info(f"Lexicon swapped: {previous} -> {compiled.version}")
+
+
+def reload_if_changed() -> bool:
+    """
+    当前发布版本与正在使用的版本不一致时映射新版本并替换
+    :return: 是否发生替换
+    """
+    version = lexicon_store.read_current_version()
+    if version is None or version == _active.version:
+        return False
+    artifact = lexicon_store.read_artifact(version)
+    swap(CompiledLexicon(artifact["version"], artifact["lexicon"], artifact["matcher"]))
+    return True
+
+
+def publish(lexicon: Dict[str, dict]) -> str:
+    """
+    编译词库并发布为新版本，当前进程立即替换，其他进程由 LexiconWatcher 发现后替换
+    :return: 版本号
+    """
+    matcher = compile_lexicon(lexicon)
+    version = lexicon_store.write_artifact(lexicon, matcher)
+    swap(CompiledLexicon(version, lexicon, matcher))
+    return version
+
+
+class LexiconWatcher:
+    """后台协程，定期检查 CURRENT 指向的版本，变化时替换词库"""
+
+    def __init__(self, interval: float = VIO_LEXICON_POLL_INTERVAL):
+        self.interval = interval
+        self._task = None
+        self.counters = {
+            "checks": 0,
+            "swaps": 0,
+            "errors": 0
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.counters["checks"] += 1
+            try:
+                if reload_if_changed():
+                    self.counters["swaps"] += 1
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.error(f"检查词库版本失败: {str(e)}")
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Lexicon watcher started, directory {VIO_LEXICON_DIR}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "version": _active.version,
+            "terms": len(_active.matcher.words),
+            **self.counters
+        }
+
+
+# 进程内共享的词库版本检查协程
+lexicon_watcher = LexiconWatcher()
+
+
+def prefilter(text: str) -> List[dict]:
+    """
+    本地违规词预过滤，在规范化文本上匹配，命中位置换算回原文
+    :param text: 待检测文本
+    :return: 命中列表 [{"word", "category", "start", "end"}]
+    """
+    normalized = normalize(text)
+    hits = _active.matcher.find(normalized.text)
+    if isinstance(normalized.offsets, range) and len(normalized.text) == len(text):
+        return hits
+    for hit in hits:
+        hit["start"], hit["end"] = normalized.to_original(hit["start"], hit["end"])
+    return hits
+
+
+def hits_to_words(hits: List[dict]) -> Tuple[str, str]:
+    """
+    把本地命中结果整理为与检测阶段一致的 words / reason 字段
+    :return: (违规词，逗号分隔, 违规原因，分号分隔)
+    """
+    words = []
+    reasons = []
+    for hit in hits:
+        if hit["word"] in words:
+            continue
+        words.append(hit["word"])
+        reason = _active.lexicon.get(hit["category"], {}).get("reason", hit["category"])
+        reasons.append(f"{hit['word']}：{reason}")
+    return ",".join(words), ";".join(reasons)
+
+
+def category_weight(category: str, default: int = 15) -> int:
+    """获取分类的严重程度权重(扣分值)"""
+    return _active.lexicon.get(category, {}).get("weight", default)
@@ -0,0 +1,120 @@
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+from core.logger import setup_logger
+from apps.vio_word.config import VIO_LEXICON_DIR, VIO_LEXICON_ZERO_COPY
+from apps.vio_word.matcher import AhoCorasick
+
+# 设置日志记录器
+logger = setup_logger('vio_word_lexicon_store')
+
+"""
+编译后的词库文件
+词库编译为 Aho-Corasick 自动机后按版本写入 VIO_LEXICON_DIR，CURRENT 文件记录当前版本，
+各工作进程以 mmap 只读映射同一个文件，加载时不需要重新编译:
+    VIO_LEXICON_ZERO_COPY=true   自动机数组直接引用映射内存，各进程共享同一份物理内存，匹配约慢 60%
+    VIO_LEXICON_ZERO_COPY=false  把数组复制为进程内列表(线性复制，无编译开销)，匹配速度与内置词库相同(默认)
+
+文件格式:
+    MAGIC(8字节) + 头部长度(uint32) + 头部JSON + 对齐填充 + 各 int32 数组(按 ARRAYS 顺序连续存放)
+    头部JSON: {"version", "lexicon", "words", "categories", "counts", "byteorder"}
+"""
+
+MAGIC = b"VIOLEX01"
+CURRENT_FILE = "CURRENT"
+# 自动机的扁平数组，顺序即文件中的存放顺序
+ARRAYS = ("edge_offsets", "edge_chars", "edge_targets", "fail", "out", "out_link")
+ALIGN = 8
+
+
+def artifact_path(version: str, directory: str = VIO_LEXICON_DIR) -> str:
+    return os.path.join(directory, f"vio_lexicon-{version}.bin")
+
+
+def read_current_version(directory: str = VIO_LEXICON_DIR) -> Optional[str]:
+    """读取当前版本号，没有已发布的版本时返回 None"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _atomic_write(path: str, data: bytes):
+    """先写临时文件再原子替换，读取方不会看到写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_artifact(lexicon: Dict[str, dict], matcher: AhoCorasick, directory: str = VIO_LEXICON_DIR) -> str:
+    """
+    写入新版本并切换为当前版本
+    :param lexicon: 词库(分类 -> {"weight", "reason", "terms"})
+    :param matcher: 由该词库编译的匹配器
+    :return: 版本号
+    """
+    body = b"".join(array.array("i", getattr(matcher, name)).tobytes() for name in ARRAYS)
+    digest = hashlib.sha256(body + json.dumps(lexicon, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{digest}"
+    header = json.dumps({
+        "version": version,
+        "lexicon": lexicon,
+        "words": matcher.words,
+        "categories": matcher.categories,
+        "counts": [len(getattr(matcher, name)) for name in ARRAYS],
+        "byteorder": sys.byteorder
+    }, ensure_ascii=False).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    padding = b"\0" * (-len(prefix) % ALIGN)
+
+    os.makedirs(directory, exist_ok=True)
+    _atomic_write(artifact_path(version, directory), prefix + padding + body)
+    _atomic_write(os.path.join(directory, CURRENT_FILE), version.encode("utf-8"))
+    logger.info(f"Lexicon artifact written: {version}, {len(matcher.words)} terms")
+    return version
+
+
+def read_artifact(version: str = None, directory: str = VIO_LEXICON_DIR, zero_copy: bool = VIO_LEXICON_ZERO_COPY) -> Optional[dict]:
+    """
+    映射指定版本的词库文件，未指定时读取当前版本，不存在时返回 None
+    :param zero_copy: 是否直接使用映射内存上的数组
+    :return: {"version", "lexicon", "matcher"}
+    """
+    if version is None:
+        version = read_current_version(directory)
+        if version is None:
+            return None
+    with open(artifact_path(version, directory), "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"词库文件格式错误: {version}")
+    header_len, = struct.unpack_from("<I", mapped, len(MAGIC))
+    header_end = len(MAGIC) + 4 + header_len
+    header = json.loads(mapped[len(MAGIC) + 4:header_end].decode("utf-8"))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"词库文件字节序与当前机器不一致: {version}")
+
+    offset = header_end + (-header_end % ALIGN)
+    arrays = []
+    for count in header["counts"]:
+        values = memoryview(mapped)[offset:offset + count * 4].cast("i")
+        if zero_copy:
+            arrays.append(values)
+        else:
+            arrays.append(values.tolist())
+            values.release()
+        offset += count * 4
+    if not zero_copy:
+        mapped.close()
+    matcher = AhoCorasick(*arrays, header["words"], header["categories"])
+    return {"version": header["version"], "lexicon": header["lexicon"], "matcher": matcher}
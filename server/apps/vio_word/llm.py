@@ -0,0 +1,116 @@
+import httpx
+from langchain_openai import ChatOpenAI
+from core.logger import setup_logger
+from apps.vio_word.config import (
+    VIO_MODEL_API_KEY, VIO_MODEL_BASE_URL, VIO_MODEL_NAME, VIO_MODEL_TEMPERATURE,
+    VIO_LLM_POOL_SIZE, VIO_LLM_KEEPALIVE_SIZE, VIO_LLM_KEEPALIVE_EXPIRY,
+    VIO_LLM_TIMEOUT, VIO_LLM_CONNECT_TIMEOUT, VIO_LLM_MAX_RETRIES,
+    VIO_LLM_BACKEND, VIO_FAKE_LATENCY, VIO_RECORD_DIR
+)
+from apps.vio_word.backends import FakeChatModel, RecordReplayChatModel
+from apps.vio_word.resilience import guard_chains, resilient_invoker
+from apps.vio_word.json_stream import JsonStage
+from apps.vio_word.prompts import PROMPT_DETECT, PROMPT_OPTIMIZE, PROMPT_SCORE, PROMPT_COMBINED
+
+# 设置日志记录器
+logger = setup_logger('vio_word_llm')
+
+"""
+进程级大模型客户端注册表
+模型客户端、HTTP连接池和各阶段调用链只在进程内创建一次，所有请求复用，
+避免每次检测都重新构造对象并重新建立HTTPS连接
+"""
+
+
+def build_chains(model) -> dict:
+    """
+    基于给定模型构建各阶段调用链
+    模型输出流式提取JSON，顶层对象闭合后立即结束生成
+    :param model: 大模型实例
+    :return: 阶段名 -> 调用链
+    """
+    return {
+        "detect": JsonStage(PROMPT_DETECT, model),
+        "optimize": JsonStage(PROMPT_OPTIMIZE, model),
+        "score": JsonStage(PROMPT_SCORE, model),
+        "combined": JsonStage(PROMPT_COMBINED, model)
+    }
+
+
+class LLMRegistry:
+    _http_client = None
+    _model = None
+    _chains = None
+
+    @classmethod
+    def init(cls):
+        """创建共享的HTTP连接池、模型客户端和调用链"""
+        if cls._model is not None:
+            return
+
+        if VIO_LLM_BACKEND == "fake":
+            # 进程内假模型，不需要HTTP连接池
+            cls._model = FakeChatModel()
+            cls._chains = guard_chains(build_chains(cls._model), resilient_invoker)
+            logger.info(f"LLM backend initialized: fake, latency={VIO_FAKE_LATENCY}")
+            return
+        if VIO_LLM_BACKEND == "replay":
+            cls._model = RecordReplayChatModel(mode="replay", record_dir=VIO_RECORD_DIR, model_name=VIO_MODEL_NAME)
+            cls._chains = guard_chains(build_chains(cls._model), resilient_invoker)
+            logger.info(f"LLM backend initialized: replay from {VIO_RECORD_DIR}")
+            return
+
+        cls._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=VIO_LLM_POOL_SIZE,
+                max_keepalive_connections=VIO_LLM_KEEPALIVE_SIZE,
+                keepalive_expiry=VIO_LLM_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(VIO_LLM_TIMEOUT, connect=VIO_LLM_CONNECT_TIMEOUT)
+        )
+        try:
+            cls._model = ChatOpenAI(
+                openai_api_key=VIO_MODEL_API_KEY,
+                openai_api_base=VIO_MODEL_BASE_URL,
+                model_name=VIO_MODEL_NAME,
+                temperature=VIO_MODEL_TEMPERATURE,
+                streaming=True,
+                timeout=VIO_LLM_TIMEOUT,
+                max_retries=VIO_LLM_MAX_RETRIES,
+                http_async_client=cls._http_client
+            )
+        except Exception as e:
+            raise Exception(f"模型初始化失败: {str(e)}")
+        if VIO_LLM_BACKEND == "record":
+            # 调用真实接口并录制响应
+            cls._model = RecordReplayChatModel(inner=cls._model, mode="record", record_dir=VIO_RECORD_DIR, model_name=VIO_MODEL_NAME)
+        cls._chains = guard_chains(build_chains(cls._model), resilient_invoker)
+        logger.info(f"LLM client initialized: backend={VIO_LLM_BACKEND}, model={VIO_MODEL_NAME}, pool_size={VIO_LLM_POOL_SIZE}, "
+                    f"keepalive={VIO_LLM_KEEPALIVE_SIZE}, timeout={VIO_LLM_TIMEOUT}s")
+
+    @classmethod
+    def get_model(cls):
+        """获取共享模型客户端"""
+        if cls._model is None:
+            cls.init()
+        return cls._model
+
+    @classmethod
+    def get_chains(cls) -> dict:
+        """获取预构建的各阶段调用链(带超时、熔断和对冲)"""
+        if cls._chains is None:
+            cls.init()
+        return cls._chains
+
+    @classmethod
+    async def close(cls):
+        """关闭HTTP连接池"""
+        if cls._http_client is not None:
+            try:
+                await cls._http_client.aclose()
+                logger.info("LLM client connection pool closed")
+            except Exception as e:
+                logger.error(f"Error closing LLM client connection pool: {str(e)}")
+        cls._http_client = None
+        cls._model = None
+        cls._chains = None
@@ -0,0 +1,146 @@
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+"""
+Aho-Corasick 多模式匹配器
+一次扫描即可找出文本中所有词库命中项，耗时与词库大小无关
+
+自动机编译后以扁平数组(CSR)形式保存:
+    edge_offsets[s] ~ edge_offsets[s+1]  状态 s 的出边区间
+    edge_chars / edge_targets            按字符码升序排列的出边
+    fail                                 失配指针
+    out                                  在该状态结束的模式ID，没有则为 -1
+    out_link                             沿失配链遇到的下一个有输出的状态，没有则为 -1
+"""
+
+
+class AhoCorasick:
+    def __init__(self, edge_offsets: Sequence[int], edge_chars: Sequence[int], edge_targets: Sequence[int],
+                 fail: Sequence[int], out: Sequence[int], out_link: Sequence[int],
+                 words: List[str], categories: List[str]):
+        self.edge_offsets = edge_offsets
+        self.edge_chars = edge_chars
+        self.edge_targets = edge_targets
+        self.fail = fail
+        self.out = out
+        self.out_link = out_link
+        self.words = words
+        self.categories = categories
+        self.word_lens = [len(word) for word in words]
+
+    @classmethod
+    def build(cls, terms: Dict[str, str]) -> "AhoCorasick":
+        """
+        编译词库
+        :param terms: 违规词 -> 分类 的字典
+        :return: 编译好的匹配器
+        """
+        words = [word for word in terms if word]
+        categories = [terms[word] for word in words]
+
+        # 构建字典树
+        goto: List[Dict[int, int]] = [{}]
+        out = [-1]
+        for pattern_id, word in enumerate(words):
+            state = 0
+            for ch in word:
+                code = ord(ch)
+                nxt = goto[state].get(code)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][code] = nxt
+                    goto.append({})
+                    out.append(-1)
+                state = nxt
+            out[state] = pattern_id
+
+        # 广度优先计算失配指针和输出链
+        fail = [0] * len(goto)
+        out_link = [-1] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for code, nxt in goto[state].items():
+                queue.append(nxt)
+                if state:
+                    f = fail[state]
+                    while f and code not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(code, 0)
+                link = fail[nxt]
+                out_link[nxt] = link if out[link] >= 0 else out_link[link]
+
+        # 展平为数组
+        edge_offsets = [0]
+        edge_chars: List[int] = []
+        edge_targets: List[int] = []
+        for edges in goto:
+            for code in sorted(edges):
+                edge_chars.append(code)
+                edge_targets.append(edges[code])
+            edge_offsets.append(len(edge_chars))
+
+        return cls(edge_offsets, edge_chars, edge_targets, fail, out, out_link, words, categories)
+
+    def _next(self, state: int, code: int) -> int:
+        """查找状态转移，不存在返回 -1"""
+        lo = self.edge_offsets[state]
+        hi = self.edge_offsets[state + 1]
+        if lo == hi:
+            return -1
+        idx = bisect_left(self.edge_chars, code, lo, hi)
+        if idx < hi and self.edge_chars[idx] == code:
+            return self.edge_targets[idx]
+        return -1
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        扫描文本，逐个产出 (模式ID, 起始偏移, 结束偏移)，包含互相重叠的命中
+        """
+        fail = self.fail
+        out = self.out
+        out_link = self.out_link
+        word_lens = self.word_lens
+        state = 0
+        for idx, ch in enumerate(text):
+            code = ord(ch)
+            while True:
+                nxt = self._next(state, code)
+                if nxt >= 0:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            s = state if out[state] >= 0 else out_link[state]
+            while s > 0:
+                pattern_id = out[s]
+                yield pattern_id, idx + 1 - word_lens[pattern_id], idx + 1
+                s = out_link[s]
+
+    def find(self, text: str, overlapping: bool = False) -> List[dict]:
+        """
+        查找文本中的违规词
+        :param text: 待检测文本
+        :param overlapping: 是否保留互相重叠的命中，默认按"最左最长"规则去重
+        :return: 命中列表 [{"word", "category", "start", "end"}]，偏移为字符下标(左闭右开)
+        """
+        matches = list(self.iter_matches(text))
+        if not matches:
+            return []
+
+        matches.sort(key=lambda m: (m[1], m[1] - m[2]))
+        hits = []
+        last_end = 0
+        for pattern_id, start, end in matches:
+            if not overlapping and start < last_end:
+                continue
+            hits.append({
+                "word": self.words[pattern_id],
+                "category": self.categories[pattern_id],
+                "start": start,
+                "end": end
+            })
+            last_end = max(last_end, end)
+        return hits
@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Iterable, List
+
+"""
+违规词检测运行指标工具
+"""
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """计算百分位数(最近秩法)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class LatencyWindow:
+    """最近 N 次耗时的滑动窗口，用于输出 p50/p95 等统计"""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds: float):
+        """记录一次耗时(秒)"""
+        self.samples.append(seconds)
+        self.count += 1
+
+    def values(self) -> List[float]:
+        return list(self.samples)
+
+    def summary(self) -> dict:
+        """耗时统计(毫秒)"""
+        values = self.values()
+        if not values:
+            return {"count": self.count, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": self.count,
+            "avg_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "max_ms": round(max(values) * 1000, 2)
+        }
+
+
+class SpeculationMetrics:
+    """
+    投机执行统计
+    kept      - 检测判定违规，直接使用投机结果
+    rerun     - 投机结果仍含检测出的违规词，按检测结果重新优化
+    cancelled - 检测判定未违规，投机调用被取消(浪费)
+    saved     - 保留投机结果时节省的耗时(检测与优化重叠的部分)
+    wasted    - 被取消或重新执行的投机调用已花费的耗时
+    """
+
+    def __init__(self, size: int = 1000):
+        self.counters = {
+            "launched": 0,
+            "kept": 0,
+            "rerun": 0,
+            "cancelled": 0
+        }
+        self.saved = LatencyWindow(size)
+        self.wasted = LatencyWindow(size)
+        self.saved_total = 0.0
+        self.wasted_total = 0.0
+
+    def add_saved(self, seconds: float):
+        self.saved.add(seconds)
+        self.saved_total += seconds
+
+    def add_wasted(self, seconds: float):
+        self.wasted.add(seconds)
+        self.wasted_total += seconds
+
+    def summary(self) -> dict:
+        launched = self.counters["launched"]
+        wasted_calls = self.counters["cancelled"] + self.counters["rerun"]
+        return {
+            **self.counters,
+            "waste_rate": round(wasted_calls / launched, 4) if launched else 0.0,
+            "saved_total_s": round(self.saved_total, 3),
+            "wasted_total_s": round(self.wasted_total, 3),
+            "saved": self.saved.summary(),
+            "wasted": self.wasted.summary()
+        }
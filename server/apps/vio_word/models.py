@@ -1,5 +1,6 @@
+import json
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, VARCHAR
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Date, DateTime, VARCHAR, Text, Index, DDL, event, false
 from core.database import Base
 import logging
 
@@ -11,6 +12,10 @@ class Vio_word(Base):
     AI违规词检测模型，用于定义AI违规词检测表
     """
     __tablename__ = 'vio_word'
+    __table_args__ = (
+        # 按手机号查询检测历史(过滤逻辑删除，按创建时间倒序分页)
+        Index('ix_vio_word_phone_deleted_created', 'phone', 'is_deleted', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True) # 主键
     phone = Column(VARCHAR(20), nullable=False) # 用户手机号
@@ -26,6 +31,9 @@ class Vio_word(Base):
     new_rating = Column(VARCHAR(255), nullable=False) # 优化后评级
     created_at = Column(DateTime, default=datetime.utcnow) # 创建时间
     is_deleted = Column(Boolean, default=False) # 是否删除(逻辑删除)
+    simhash = Column(BigInteger, nullable=True) # 输入内容的 SimHash 指纹(有符号64位)，用于近似重复查找
+    ai_product_id = Column(VARCHAR(50), nullable=True) # AI产品ID
+    degraded = Column(Boolean, nullable=False, default=False, server_default=false()) # 是否为大模型不可用时的本地词库降级结果(不参与近似重复复用、分类器训练和违规词汇总)
     
     def __repr__(self):
         return (f"Vio_word(id={self.id}, "
@@ -41,7 +49,9 @@ class Vio_word(Base):
                 f"old_rating={self.old_rating}, "
                 f"new_rating={self.new_rating}, "
                 f"created_at={self.created_at}, "
-                f"is_deleted={self.is_deleted}")
+                f"is_deleted={self.is_deleted}, "
+                f"ai_product_id={self.ai_product_id}, "
+                f"degraded={self.degraded}")
     
     def to_dict(self):
         """转换为字典"""
@@ -49,6 +59,7 @@ class Vio_word(Base):
             return {
                 "id": self.id,
                 "phone": self.phone,
+                "ai_product_id": self.ai_product_id,
                 "input": self.input,
                 "is_violation": self.is_violation,
                 "words": self.words,
@@ -59,9 +70,179 @@ class Vio_word(Base):
                 "new_score": self.new_score,
                 "old_rating": self.old_rating,
                 "new_rating": self.new_rating,
+                "degraded": bool(self.degraded),
                 "created_at": self.created_at.isoformat() if self.created_at else None
             }
         except Exception as e:
             logger.error(f"Error converting vio_word to dict: {str(e)}")
             return {}
         
+
+
+# 检测记录全文索引(SQLite FTS5 trigram 分词，支持中文任意子串检索)
+# 外部内容表: 只保存索引，内容从 vio_word 读取；由触发器随 vio_word 的增删改同步
+VIO_WORD_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS vio_word_fts USING fts5(
+        input, words, reasons, op, content='vio_word', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS vio_word_fts_ai AFTER INSERT ON vio_word BEGIN
+        INSERT INTO vio_word_fts(rowid, input, words, reasons, op) VALUES (new.id, new.input, new.words, new.reasons, new.op);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vio_word_fts_ad AFTER DELETE ON vio_word BEGIN
+        INSERT INTO vio_word_fts(vio_word_fts, rowid, input, words, reasons, op) VALUES ('delete', old.id, old.input, old.words, old.reasons, old.op);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vio_word_fts_au AFTER UPDATE OF input, words, reasons, op ON vio_word BEGIN
+        INSERT INTO vio_word_fts(vio_word_fts, rowid, input, words, reasons, op) VALUES ('delete', old.id, old.input, old.words, old.reasons, old.op);
+        INSERT INTO vio_word_fts(rowid, input, words, reasons, op) VALUES (new.id, new.input, new.words, new.reasons, new.op);
+    END"""
+]
+
+for statement in VIO_WORD_FTS_DDL:
+    event.listen(Vio_word.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Vio_word.__table__, "before_drop", DDL("DROP TABLE IF EXISTS vio_word_fts").execute_if(dialect="sqlite"))
+
+
+class Vio_word_job(Base):
+    """
+    违规词检测异步任务模型，用于定义异步检测任务队列表
+    """
+    __tablename__ = 'vio_word_jobs'
+
+    job_id = Column(String(50), primary_key=True, index=True) # 任务ID
+    phone = Column(VARCHAR(20), nullable=False) # 用户手机号
+    ai_product_id = Column(VARCHAR(50), nullable=True) # AI产品ID
+    entitlement_id = Column(String(50), nullable=False) # 预扣额度的用户权益ID
+    input = Column(VARCHAR(255), nullable=False) # 输入内容
+    status = Column(VARCHAR(20), nullable=False, default="pending", index=True) # 任务状态 pending/running/done/failed
+    result = Column(Text, nullable=True) # 检测结果(JSON)
+    error = Column(VARCHAR(255), nullable=True) # 失败原因
+    created_at = Column(DateTime, default=datetime.utcnow) # 提交时间
+    started_at = Column(DateTime, nullable=True) # 开始执行时间
+    finished_at = Column(DateTime, nullable=True) # 完成时间
+
+    def __repr__(self):
+        return (f"Vio_word_job(job_id={self.job_id}, "
+                f"phone={self.phone}, "
+                f"ai_product_id={self.ai_product_id}, "
+                f"entitlement_id={self.entitlement_id}, "
+                f"input={self.input}, "
+                f"status={self.status}, "
+                f"error={self.error}, "
+                f"created_at={self.created_at}, "
+                f"started_at={self.started_at}, "
+                f"finished_at={self.finished_at}")
+
+    def to_dict(self):
+        """转换为字典"""
+        try:
+            return {
+                "job_id": self.job_id,
+                "phone": self.phone,
+                "ai_product_id": self.ai_product_id,
+                "input": self.input,
+                "status": self.status,
+                "result": json.loads(self.result) if self.result else None,
+                "error": self.error,
+                "created_at": self.created_at.isoformat() if self.created_at else None,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None
+            }
+        except Exception as e:
+            logger.error(f"Error converting vio_word_job to dict: {str(e)}")
+            return {}
+
+
+class Vio_lexicon_category(Base):
+    """
+    违规词词库分类模型，每个分类带有统一的违规原因和严重程度权重
+    """
+    __tablename__ = 'vio_lexicon_categories'
+
+    name = Column(VARCHAR(50), primary_key=True) # 分类名称
+    weight = Column(Integer, nullable=False, default=15) # 严重程度权重(扣分值)
+    reason = Column(VARCHAR(255), nullable=False) # 违规原因
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # 更新时间
+
+    def __repr__(self):
+        return (f"Vio_lexicon_category(name={self.name}, "
+                f"weight={self.weight}, "
+                f"reason={self.reason}, "
+                f"updated_at={self.updated_at}")
+
+    def to_dict(self):
+        """转换为字典"""
+        try:
+            return {
+                "name": self.name,
+                "weight": self.weight,
+                "reason": self.reason,
+                "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            }
+        except Exception as e:
+            logger.error(f"Error converting vio_lexicon_category to dict: {str(e)}")
+            return {}
+
+
+class Vio_lexicon_term(Base):
+    """
+    违规词词库词条模型
+    """
+    __tablename__ = 'vio_lexicon_terms'
+
+    id = Column(Integer, primary_key=True, index=True) # 主键
+    term = Column(VARCHAR(100), nullable=False, unique=True) # 违规词
+    category = Column(VARCHAR(50), nullable=False, index=True) # 所属分类
+    created_at = Column(DateTime, default=datetime.utcnow) # 创建时间
+    is_deleted = Column(Boolean, default=False) # 是否删除(逻辑删除)
+
+    def __repr__(self):
+        return (f"Vio_lexicon_term(id={self.id}, "
+                f"term={self.term}, "
+                f"category={self.category}, "
+                f"created_at={self.created_at}, "
+                f"is_deleted={self.is_deleted}")
+
+    def to_dict(self):
+        """转换为字典"""
+        try:
+            return {
+                "id": self.id,
+                "term": self.term,
+                "category": self.category,
+                "created_at": self.created_at.isoformat() if self.created_at else None
+            }
+        except Exception as e:
+            logger.error(f"Error converting vio_lexicon_term to dict: {str(e)}")
+            return {}
+
+
+class Vio_word_term_daily(Base):
+    """
+    违规词按天汇总模型，每天每个AI产品每个违规词被检出的次数
+    随检测记录写入增量更新，供管理后台统计高频违规词，不需要扫描检测记录表
+    """
+    __tablename__ = 'vio_word_term_daily'
+
+    day = Column(Date, primary_key=True) # 日期(UTC，与检测记录创建时间一致)
+    ai_product_id = Column(VARCHAR(50), primary_key=True, default="") # AI产品ID，未知产品为空字符串
+    term = Column(VARCHAR(100), primary_key=True) # 违规词
+    count = Column(Integer, nullable=False, default=0) # 检出次数
+
+    def __repr__(self):
+        return (f"Vio_word_term_daily(day={self.day}, "
+                f"ai_product_id={self.ai_product_id}, "
+                f"term={self.term}, "
+                f"count={self.count}")
+
+    def to_dict(self):
+        """转换为字典"""
+        try:
+            return {
+                "day": self.day.isoformat() if self.day else None,
+                "ai_product_id": self.ai_product_id,
+                "term": self.term,
+                "count": self.count
+            }
+        except Exception as e:
+            logger.error(f"Error converting vio_word_term_daily to dict: {str(e)}")
+            return {}
@@ -0,0 +1,163 @@
+import re
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+"""
+话术归一化
+用预先生成的转换表(str.translate)一次完成:
+    全角字母数字 -> 半角、半角中文标点 -> 全角、繁体 -> 简体、形近字符 -> 标准字符、大写 -> 小写、
+    删除零宽等不可见字符和表情符号
+再删除夹在两个汉字之间的干扰符号(如 "国*家*级"、"国 家 级")
+输出规范化文本和偏移映射 offsets: offsets[i] 为规范化文本第 i 个字符在原文中的位置
+
+转换表只做一对一替换或删除，不会展开为多个字符，保证偏移映射可由删除位置直接算出
+规范形式以常见的中文输入为准(中文标点保持全角)，多数话术不含需要转换的字符，
+先用一次字符集查找判断，不需要转换时跳过 translate
+"""
+
+# 中文常用标点的规范形式为全角，其余全角ASCII -> 半角，全角空格 -> 半角空格
+CJK_PUNCTUATION = "，！？：；（）"
+WIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F) if chr(code) not in CJK_PUNCTUATION}
+WIDTH_TABLE.update({ord(char) - 0xFEE0: ord(char) for char in CJK_PUNCTUATION})
+WIDTH_TABLE[0x3000] = 0x20
+
+# 常用繁体字 -> 简体字(覆盖直播话术和违规词库中的常用字)
+TRADITIONAL = (
+    "國級醫療癒絕對無優價專權證質藥網銷軍極頂驗險賺賠殺樓虧過錯買賣獨類產品業務體"
+    "廣告減輕癥狀腫瘤經脈補氣養顏鬆骨質疏腦護膚淨潔滅菌確實傳統機構認證號碼"
+    "億萬點擊鏈接搶購選擇團隊調節預防發現開關東華實際區這個們來時會為與說話還"
+    "後從電視臺轉讓歲歷資訊費額貨運輸達標準備製造廠牌漲價議該詳細紹給寶貝愛"
+    "嗎麼麗圓滿條狀態勢應當變選擔負責獎勵優惠滿減數據統計總結聽見覺親戚讀書"
+    "徹灣體髮鐘蟲雙顧環盤墊間車鍵飛馬門問聞頭題顯風長張齊織飾錢鐵銀紅綠藍黃"
+    "麵飯飲魚雞鴨衛遠選鮮嚴務勞動慶節禮讚謝誠戰勝興奮緊張舊陽陰溫熱涼輕鬆"
+)
+SIMPLIFIED = (
+    "国级医疗愈绝对无优价专权证质药网销军极顶验险赚赔杀楼亏过错买卖独类产品业务体"
+    "广告减轻症状肿瘤经脉补气养颜松骨质疏脑护肤净洁灭菌确实传统机构认证号码"
+    "亿万点击链接抢购选择团队调节预防发现开关东华实际区这个们来时会为与说话还"
+    "后从电视台转让岁历资讯费额货运输达标准备制造厂牌涨价议该详细绍给宝贝爱"
+    "吗么丽圆满条状态势应当变选担负责奖励优惠满减数据统计总结听见觉亲戚读书"
+    "彻湾体发钟虫双顾环盘垫间车键飞马门问闻头题显风长张齐织饰钱铁银红绿蓝黄"
+    "面饭饮鱼鸡鸭卫远选鲜严务劳动庆节礼赞谢诚战胜兴奋紧张旧阳阴温热凉轻松"
+)
+assert len(TRADITIONAL) == len(SIMPLIFIED)
+T2S_TABLE = {ord(t): ord(s) for t, s in zip(TRADITIONAL, SIMPLIFIED) if t != s}
+
+# 形近字符 -> 标准字符(西里尔/希腊字母、带圈数字、中文数字形近符号等)
+HOMOGLYPHS = {
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "х": "x", "у": "y", "і": "i", "ј": "j", "ѕ": "s",
+    "А": "a", "В": "b", "Е": "e", "К": "k", "М": "m", "Н": "h", "О": "o", "Р": "p", "С": "c", "Т": "t", "Х": "x",
+    "α": "a", "ο": "o", "ρ": "p", "ν": "v", "τ": "t", "ι": "i", "κ": "k",
+    "Α": "a", "Β": "b", "Ε": "e", "Ζ": "z", "Η": "h", "Ι": "i", "Κ": "k", "Μ": "m", "Ν": "n", "Ο": "o",
+    "Ρ": "p", "Τ": "t", "Υ": "y", "Χ": "x",
+    "①": "1", "②": "2", "③": "3", "④": "4", "⑤": "5", "⑥": "6", "⑦": "7", "⑧": "8", "⑨": "9", "⓪": "0",
+    "〇": "零", "ㄧ": "一", "丨": "一", "︰": "：", "﹪": "%", "٪": "%", "‰": "%", "–": "-",
+}
+HOMOGLYPH_TABLE = {ord(source): ord(target) for source, target in HOMOGLYPHS.items()}
+
+# 大写字母 -> 小写
+CASE_TABLE = {code: code + 32 for code in range(ord("A"), ord("Z") + 1)}
+
+# 需要删除的字符: 零宽字符、软连字符、方向控制符、变体选择符、表情符号
+INVISIBLE = [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E, 0x3164, 0xFEFF, 0xFFA0]
+INVISIBLE += list(range(0x200B, 0x2010)) + list(range(0x202A, 0x202F)) + list(range(0x2060, 0x2070))
+INVISIBLE += list(range(0xFE00, 0xFE10)) + list(range(0xE0000, 0xE0080))
+EMOJI = list(range(0x1F000, 0x1FB00)) + list(range(0x2600, 0x27C0)) + list(range(0x2B00, 0x2C00)) + [0x20E3, 0x3030, 0x303D]
+DELETE_TABLE = {code: None for code in INVISIBLE + EMOJI}
+
+
+def build_table() -> dict:
+    """合并各转换表，后面的表优先，最后叠加删除表"""
+    table = {}
+    for part in (WIDTH_TABLE, T2S_TABLE, HOMOGLYPH_TABLE):
+        table.update(part)
+    # 全角字母先转半角再转小写: 对所有映射结果再做一次大小写折叠
+    for code, target in list(table.items()):
+        if target in CASE_TABLE:
+            table[code] = CASE_TABLE[target]
+    table.update(CASE_TABLE)
+    table.update(DELETE_TABLE)
+    return table
+
+
+def char_class(codes) -> str:
+    """把码位集合压缩为正则字符集 [a-bc-d...]"""
+    ranges = []
+    for code in sorted(codes):
+        if ranges and code == ranges[-1][1] + 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    parts = [re.escape(chr(start)) if start == end else f"{re.escape(chr(start))}-{re.escape(chr(end))}" for start, end in ranges]
+    return "[" + "".join(parts) + "]"
+
+
+TABLE = build_table()
+# 是否含有需要转换的字符
+NEEDS_TRANSLATE_RE = re.compile(char_class(TABLE))
+# 连续的待删除字符
+DELETE_RE = re.compile(char_class(DELETE_TABLE) + "+")
+# 规则版本，转换表变化时随之修改，用于缓存版本号
+NORMALIZER_VERSION = "1"
+
+# 夹在两个汉字之间的干扰符号，先用字符集判断是否含干扰符号，再做前后文匹配
+_CJK = "一-鿿"
+_FILLER = r"\s·•*_~^|/\\.\-+#@="
+FILLER_CHAR_RE = re.compile(rf"[{_FILLER}]")
+FILLER_RE = re.compile(rf"(?<=[{_CJK}])[{_FILLER}]+(?=[{_CJK}])")
+
+
+class Normalized:
+    """规范化结果: 规范化文本和到原文的偏移映射"""
+    __slots__ = ("text", "offsets", "length")
+
+    def __init__(self, text: str, offsets: Sequence[int], length: int):
+        self.text = text
+        self.offsets = offsets
+        self.length = length  # 原文长度
+
+    def to_original(self, start: int, end: int) -> Tuple[int, int]:
+        """规范化文本中的 [start, end) 换算为原文区间"""
+        if start >= len(self.offsets):
+            return self.length, self.length
+        if end <= start:
+            return self.offsets[start], self.offsets[start]
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+
+def normalize_uncached(text: str) -> Normalized:
+    """规范化文本(不使用缓存)"""
+    canonical = text.translate(TABLE) if NEEDS_TRANSLATE_RE.search(text) else text
+    if len(canonical) == len(text):
+        offsets = range(len(text))
+    else:
+        # 有字符被删除，按删除的区间拼接保留下来的字符位置
+        offsets = []
+        position = 0
+        for match in DELETE_RE.finditer(text):
+            offsets.extend(range(position, match.start()))
+            position = match.end()
+        offsets.extend(range(position, len(text)))
+    if FILLER_CHAR_RE.search(canonical) and FILLER_RE.search(canonical):
+        kept = []
+        parts = []
+        position = 0
+        for match in FILLER_RE.finditer(canonical):
+            parts.append(canonical[position:match.start()])
+            kept.extend(offsets[position:match.start()])
+            position = match.end()
+        parts.append(canonical[position:])
+        kept.extend(offsets[position:])
+        canonical = "".join(parts)
+        offsets = kept
+    # 没有删除任何字符时偏移映射为 range，不逐字符展开
+    return Normalized(canonical, offsets if isinstance(offsets, range) else tuple(offsets), len(text))
+
+
+@lru_cache(maxsize=4096)
+def normalize(text: str) -> Normalized:
+    """
+    规范化文本，同一请求中预过滤、缓存键、指纹等多次调用只计算一次
+    :return: Normalized(text, offsets)
+    """
+    return normalize_uncached(text)
@@ -0,0 +1,286 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict
+from core.limiter import llm_limiter
+from core.tokens import token_meter
+from core.logger import setup_logger
+from apps.vio_word.config import (
+    VIO_STAGE_TIMEOUTS, VIO_BREAKER_WINDOW, VIO_BREAKER_MIN_CALLS, VIO_BREAKER_FAILURE_RATIO,
+    VIO_BREAKER_SLOW_CALL, VIO_BREAKER_OPEN_SECONDS, VIO_HEDGE_ENABLED, VIO_HEDGE_MIN_SAMPLES,
+    VIO_HEDGE_PERCENTILE
+)
+from apps.vio_word.metrics import LatencyWindow, percentile
+from apps.vio_word.budget import apply_budget, completion_tokens
+
+# 设置日志记录器
+logger = setup_logger('vio_word_resilience')
+
+"""
+大模型调用容错
+    分阶段超时  - 每个阶段单独限时，超时即失败，不再等到HTTP客户端超时
+    熔断器      - 最近调用的失败(含慢调用)比例超过阈值时熔断，熔断期间直接拒绝调用
+    对冲请求    - 调用超过该阶段历史 p95 耗时仍未返回时再发一个相同请求，取先返回的结果
+    并发限制    - 每个阶段调用占用共享的自适应并发许可(core.limiter)，超时计为过载
+    token 预算  - 调用前按阶段预算截断输入，调用后按阶段记录 token 数和耗时(core.tokens)
+熔断或超时时调用方按本地词库生成降级结果
+"""
+
+
+class LLMUnavailableError(Exception):
+    """大模型暂不可用(熔断或超时)"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """熔断器打开，拒绝调用"""
+
+
+class StageTimeoutError(LLMUnavailableError):
+    """阶段调用超时"""
+
+
+def parse_stage_timeouts(spec: str) -> Dict[str, float]:
+    """解析 "detect:20,optimize:30" 形式的分阶段超时配置"""
+    timeouts = {}
+    for item in spec.split(","):
+        stage, _, seconds = item.partition(":")
+        if stage.strip() and seconds.strip():
+            timeouts[stage.strip()] = float(seconds)
+    return timeouts
+
+
+class CircuitBreaker:
+    """
+    基于最近 N 次调用结果的熔断器
+    closed    - 正常放行
+    open      - 拒绝调用，open_seconds 后进入 half_open
+    half_open - 只放行一个探测调用，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, window: int = VIO_BREAKER_WINDOW, min_calls: int = VIO_BREAKER_MIN_CALLS,
+                 failure_ratio: float = VIO_BREAKER_FAILURE_RATIO, slow_call: float = VIO_BREAKER_SLOW_CALL,
+                 open_seconds: float = VIO_BREAKER_OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.outcomes = deque(maxlen=window)
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_started = 0.0
+        self.counters = {
+            "opened": 0,
+            "rejected": 0
+        }
+
+    def allow(self) -> bool:
+        """是否放行本次调用"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.counters["rejected"] += 1
+                return False
+            self.state = "half_open"
+            self.probing = False
+        if self.state == "half_open":
+            # 探测调用被取消时不会记录结果，超过 open_seconds 后允许新的探测
+            if self.probing and time.monotonic() - self.probe_started < self.open_seconds:
+                self.counters["rejected"] += 1
+                return False
+            self.probing = True
+            self.probe_started = time.monotonic()
+        return True
+
+    def record(self, success: bool, seconds: float):
+        """记录一次调用结果，慢调用按失败计"""
+        failed = not success or seconds >= self.slow_call
+        if self.state == "half_open":
+            self.probing = False
+            if failed:
+                self._open()
+            else:
+                self.state = "closed"
+                self.outcomes.clear()
+                logger.info("LLM circuit breaker closed")
+            return
+
+        self.outcomes.append(failed)
+        if self.state == "closed" and len(self.outcomes) >= self.min_calls:
+            if sum(self.outcomes) / len(self.outcomes) >= self.failure_ratio:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+        self.counters["opened"] += 1
+        logger.warning(f"LLM circuit breaker opened for {self.open_seconds}s")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_calls": len(self.outcomes),
+            "recent_failures": sum(self.outcomes),
+            **self.counters
+        }
+
+
+class ResilientInvoker:
+    """按阶段执行大模型调用，统一处理超时、熔断和对冲"""
+
+    def __init__(self, breaker: CircuitBreaker = None, timeouts: Dict[str, float] = None,
+                 hedge: bool = VIO_HEDGE_ENABLED):
+        self.breaker = breaker or CircuitBreaker()
+        self.timeouts = timeouts if timeouts is not None else parse_stage_timeouts(VIO_STAGE_TIMEOUTS)
+        self.hedge = hedge
+        self.latency: Dict[str, LatencyWindow] = {}
+        self.counters = {
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "hedged": 0,
+            "hedge_wins": 0
+        }
+
+    def _window(self, stage: str) -> LatencyWindow:
+        if stage not in self.latency:
+            self.latency[stage] = LatencyWindow()
+        return self.latency[stage]
+
+    def hedge_delay(self, stage: str):
+        """对冲等待时间: 该阶段历史耗时的 p95，样本不足时不对冲"""
+        if not self.hedge:
+            return None
+        values = self._window(stage).values()
+        if len(values) < VIO_HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(values, VIO_HEDGE_PERCENTILE)
+
+    async def invoke(self, stage: str, chain, inputs: dict):
+        """
+        执行一次阶段调用
+        :raises CircuitOpenError: 熔断器打开
+        :raises StageTimeoutError: 阶段调用超时
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"大模型调用已熔断: {stage}")
+
+        self.counters["calls"] += 1
+        inputs, usage = apply_budget(stage, chain, inputs)
+        # 排队等待并发许可的时间不计入阶段超时; 对冲请求共用同一个许可
+        async with llm_limiter.acquire() as permit:
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(self._hedged(stage, chain, inputs), timeout=self.timeouts.get(stage))
+            except asyncio.TimeoutError:
+                permit.overload()
+                self.counters["timeouts"] += 1
+                self.breaker.record(False, time.monotonic() - started)
+                raise StageTimeoutError(f"大模型调用超时: {stage}")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.counters["failures"] += 1
+                self.breaker.record(False, time.monotonic() - started)
+                raise
+        elapsed = time.monotonic() - started
+        self.breaker.record(True, elapsed)
+        self._window(stage).add(elapsed)
+        token_meter.record(stage, usage["prompt"], completion_tokens(result), elapsed, usage["system"], usage["truncated"])
+        return result
+
+    async def _hedged(self, stage: str, chain, inputs: dict):
+        delay = self.hedge_delay(stage)
+        primary = asyncio.create_task(chain.ainvoke(inputs))
+        if delay is None:
+            return await primary
+
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                # 超过 p95 仍未返回，发出对冲请求
+                self.counters["hedged"] += 1
+                tasks.append(asyncio.create_task(chain.ainvoke(inputs)))
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                tasks = [task for task in tasks if not task.done()]
+                if not tasks:
+                    # 全部失败，抛出主请求的异常
+                    return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            **self.counters,
+            "stages": {stage: window.summary() for stage, window in self.latency.items()}
+        }
+
+
+class ResilientChain:
+    """给调用链套上 ResilientInvoker，接口与调用链一致"""
+
+    def __init__(self, stage: str, chain, invoker: ResilientInvoker):
+        self.stage = stage
+        self.chain = chain
+        self.invoker = invoker
+
+    async def ainvoke(self, inputs: dict):
+        return await self.invoker.invoke(self.stage, self.chain, inputs)
+
+    async def astream(self, inputs: dict):
+        """
+        流式调用，受熔断器和阶段超时控制
+        阶段超时按整个流计算(从开始调用到最后一块)，只在等待上游输出时计时检查
+        :raises StageTimeoutError: 超过阶段超时仍未输出完毕
+        """
+        if not self.invoker.breaker.allow():
+            raise CircuitOpenError(f"大模型调用已熔断: {self.stage}")
+        inputs, usage = apply_budget(self.stage, self.chain, inputs)
+        timeout = self.invoker.timeouts.get(self.stage)
+        async with llm_limiter.acquire() as permit:
+            started = time.monotonic()
+            last = None
+            stream = self.chain.astream(inputs)
+            try:
+                while True:
+                    remaining = None if timeout is None else timeout - (time.monotonic() - started)
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        permit.overload()
+                        self.invoker.counters["timeouts"] += 1
+                        self.invoker.breaker.record(False, time.monotonic() - started)
+                        raise StageTimeoutError(f"大模型调用超时: {self.stage}")
+                    last = chunk
+                    yield chunk
+            except (asyncio.CancelledError, StageTimeoutError, GeneratorExit):
+                raise
+            except Exception:
+                self.invoker.breaker.record(False, time.monotonic() - started)
+                raise
+            finally:
+                await stream.aclose()
+            elapsed = time.monotonic() - started
+            self.invoker.breaker.record(True, elapsed)
+            # JSON 解析器流式输出的是逐步完整的结果，最后一块即完整结果
+            token_meter.record(self.stage, usage["prompt"], completion_tokens(last), elapsed, usage["system"], usage["truncated"])
+
+
+def guard_chains(chains: dict, invoker: ResilientInvoker) -> dict:
+    """把各阶段调用链包装为带容错的调用链"""
+    return {stage: ResilientChain(stage, chain, invoker) for stage, chain in chains.items()}
+
+
+# 进程内共享的容错调用器
+resilient_invoker = ResilientInvoker()
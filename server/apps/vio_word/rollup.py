@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+from datetime import date
+from core.database import AsyncSessionLocal
+from core.logger import setup_logger
+from apps.vio_word import crud as vio_word_crud
+
+# 设置日志记录器
+logger = setup_logger('vio_word_rollup')
+
+"""
+违规词按天汇总补算
+检测记录写入时在同一事务中增量更新汇总表，该命令用于上线前的历史记录或汇总数据需要修正时重算
+    python -m apps.vio_word.rollup backfill
+        重算全部日期
+    python -m apps.vio_word.rollup backfill --since 2026-10-01
+        只重算指定日期(含)之后的汇总
+重算在一个写事务中完成，期间新的检测记录等待事务提交后写入
+"""
+
+
+async def backfill(since: date = None) -> dict:
+    async with AsyncSessionLocal() as db:
+        result = await vio_word_crud.rebuild_term_rollup(db, since=since)
+    logger.info(f"Term rollup rebuilt since {since or 'beginning'}: {result['records']} records, {result['rows']} rows")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="违规词按天汇总补算")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="由检测记录重算按天汇总")
+    backfill_parser.add_argument("--since", type=date.fromisoformat, default=None, help="起始日期(YYYY-MM-DD)，默认全部重算")
+
+    args = parser.parse_args()
+    if args.command == "backfill":
+        result = asyncio.run(backfill(args.since))
+        print(f"records={result['records']}  rows={result['rows']}")
+
+
+if __name__ == "__main__":
+    main()
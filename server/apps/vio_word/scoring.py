@@ -0,0 +1,88 @@
+import re
+from typing import Dict, List
+from apps.vio_word.config import VIO_SCORE_DEFAULT_WEIGHT, VIO_SCORE_VIOLATION_CAP, VIO_SCORE_CLEAN_REWRITE
+from apps.vio_word.lexicon import prefilter, category_weight
+
+"""
+本地确定性打分
+按违规词数量和所属分类的严重程度权重扣分，并检查优化后的话术是否仍含违规词，
+评级由分值按固定区间换算，替代第三阶段的大模型打分调用
+"""
+
+# 评级区间(分值上限, 评级)，与打分提示词中的区间一致
+RATING_BANDS = [
+    (25, "小白"),
+    (50, "业余"),
+    (75, "专业"),
+    (90, "资深"),
+    (100, "大师")
+]
+
+WORD_SEPARATORS = re.compile(r"[,，、;；\s]+")
+
+
+def rating_for(score: int) -> str:
+    """分值换算评级"""
+    for upper, rating in RATING_BANDS:
+        if score <= upper:
+            return rating
+    return RATING_BANDS[-1][1]
+
+
+def split_words(words: str) -> List[str]:
+    """拆分检测阶段输出的违规词字符串"""
+    if not words:
+        return []
+    return [word for word in WORD_SEPARATORS.split(words) if word]
+
+
+def term_weight(word: str) -> int:
+    """
+    违规词扣分值
+    词库中的词按分类权重；模型检出的词库外的词，如包含词库词则取其中最高权重，否则取默认权重
+    """
+    hits = prefilter(word)
+    if not hits:
+        return VIO_SCORE_DEFAULT_WEIGHT
+    return max(category_weight(hit["category"], VIO_SCORE_DEFAULT_WEIGHT) for hit in hits)
+
+
+def violation_terms(text: str, words: str = "") -> Dict[str, int]:
+    """
+    汇总违规词及扣分值，同一个词只计一次
+    :param text: 话术
+    :param words: 检测阶段输出的违规词，逗号分隔
+    :return: 违规词 -> 扣分值
+    """
+    terms = {}
+    for hit in prefilter(text):
+        terms.setdefault(hit["word"], category_weight(hit["category"], VIO_SCORE_DEFAULT_WEIGHT))
+    for word in split_words(words):
+        if word not in terms:
+            terms[word] = term_weight(word)
+    return terms
+
+
+def score_locally(input: str, words: str, op: str) -> dict:
+    """
+    本地打分
+    :param input: 原始话术
+    :param words: 检测出的违规词，逗号分隔
+    :param op: 优化后的话术
+    :return: {"old_score", "new_score", "old_rating", "new_rating"}，结构与打分阶段输出一致
+    """
+    old_terms = violation_terms(input, words)
+    old_score = max(0, min(VIO_SCORE_VIOLATION_CAP, 100 - sum(old_terms.values())))
+
+    # 优化后的话术中残留的原违规词，以及新引入的词库违规词
+    residual = {word: weight for word, weight in old_terms.items() if word in op}
+    for hit in prefilter(op):
+        residual.setdefault(hit["word"], category_weight(hit["category"], VIO_SCORE_DEFAULT_WEIGHT))
+    new_score = max(0, min(100, VIO_SCORE_CLEAN_REWRITE - sum(residual.values())))
+
+    return {
+        "old_score": old_score,
+        "new_score": new_score,
+        "old_rating": rating_for(old_score),
+        "new_rating": rating_for(new_score)
+    }
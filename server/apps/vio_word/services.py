@@ -1,13 +1,60 @@
+import asyncio
 from robyn import Request, Response
 from core.response import ApiResponse
 from core.middleware import error_handler, request_logger
 from core.logger import setup_logger
 from core.database import AsyncSessionLocal
 from apps.vio_word import crud as vio_word_crud
+from apps.business import crud as business_crud
+from apps.vio_word.simhash import simhash, to_signed, near_duplicate_index
+from datetime import date, datetime
+from apps.vio_word.config import VIO_SEARCH_MAX_LIMIT, VIO_TERM_TOP_MAX_K, VIO_NEAR_DUP_ENABLED
 
 # 设置日志记录器
 logger = setup_logger('vio_word_services')
 
+async def get_latest_entitlement(db, phone: str, ai_product_id: str):
+    """
+    获取用户在指定AI产品下最新的权益记录
+    :return: 权益记录，没有权益时返回 None
+    """
+    filters = {
+        "phone": phone,
+        "ai_product_id": ai_product_id,
+        "is_deleted": False
+    }
+    entitlements, total_count = await business_crud.get_user_entitlements_by_filters(
+        db,
+        filters=filters,
+        order_by={"created_at": "desc"},
+        page=1,
+        page_size=1
+    )
+    return entitlements[0] if entitlements else None
+
+def build_vio_word_record(phone: str, input_text: str, result: dict, ai_product_id: str = None) -> dict:
+    """
+    把检测结果整理为违规词检测记录
+    未启用近似重复查找时不计算指纹，启用后加载索引时为缺少指纹的记录补算
+    """
+    return {
+        "phone": phone,
+        "ai_product_id": ai_product_id,
+        "input": input_text,
+        "is_violation": result.get("is_Violations") == "是",
+        "words": result.get("words", ""),
+        "reasons": result.get("reason", ""),  # 注意：API返回的是 reason，而不是 reasons
+        "op": result.get("op", ""),
+        "ideas": result.get("ideas", ""),
+        "old_score": result.get("old_score", 0),
+        "new_score": result.get("new_score", 0),
+        "old_rating": result.get("old_rating", ""),
+        "new_rating": result.get("new_rating", ""),
+        "is_deleted": False,
+        "degraded": bool(result.get("degraded")),
+        "simhash": to_signed(simhash(input_text)) if VIO_NEAR_DUP_ENABLED else None
+    }
+
 async def get_vio_words_service(request: Request) -> Response:
     """
     获取所有违规词检测记录服务
@@ -114,6 +161,7 @@ async def get_vio_word_service(request: Request) -> Response:
 async def get_vio_words_by_phone_service(request: Request) -> Response:
     """
     根据手机号搜索违规词检测记录服务
+    支持页码分页(page)和游标分页(cursor, 可用 with_total=false 跳过总数统计)
     """
     try:
         # 获取手机号
@@ -134,6 +182,36 @@ async def get_vio_words_by_phone_service(request: Request) -> Response:
             page = 1
         if page_size < 1 or page_size > 100:
             page_size = 10
+
+        # 游标模式: 传入 cursor 参数(首页为空)时按 (created_at, id) 游标分页，返回 next_cursor
+        if "cursor" in request.query_params:
+            cursor = request.query_params.get("cursor", "") or None
+            with_total = request.query_params.get("with_total", "true") != "false"
+            async with AsyncSessionLocal() as db:
+                try:
+                    vio_words, next_cursor, total_count = await vio_word_crud.get_vio_words_by_cursor(
+                        db,
+                        phone,
+                        cursor=cursor,
+                        page_size=page_size,
+                        with_total=with_total
+                    )
+                except ValueError as e:
+                    return ApiResponse.validation_error(str(e))
+                except Exception as e:
+                    logger.error(f"查询用户违规词检测记录失败: {str(e)}")
+                    return ApiResponse.error(
+                        message="获取用户违规词检测记录失败",
+                        status_code=500
+                    )
+            data = {
+                "items": [word.to_dict() for word in vio_words],
+                "page_size": page_size,
+                "next_cursor": next_cursor
+            }
+            if total_count is not None:
+                data["total"] = total_count
+            return ApiResponse.success(data=data, message="获取用户违规词检测记录成功")
             
         # 构建过滤条件
         filters = {
@@ -178,4 +256,301 @@ async def get_vio_words_by_phone_service(request: Request) -> Response:
         return ApiResponse.error(
             message="获取用户违规词检测记录失败",
             status_code=500
-        ) 
\ No newline at end of file
+        )
+
+
+async def search_vio_words_service(request: Request) -> Response:
+    """
+    全文检索违规词检测记录服务
+    q 为检索词(空格分隔，同时包含)，可选 phone 限定用户，limit 限定返回条数
+    """
+    try:
+        query = (request.query_params.get("q", "") or "").strip()
+        terms = list(dict.fromkeys(query.split()))
+        if not terms:
+            return ApiResponse.validation_error("检索词不能为空")
+
+        try:
+            limit = int(request.query_params.get("limit", "20"))
+        except ValueError:
+            limit = 20
+        if limit < 1 or limit > VIO_SEARCH_MAX_LIMIT:
+            limit = 20
+        phone = request.query_params.get("phone", "") or None
+
+        async with AsyncSessionLocal() as db:
+            try:
+                rows = await vio_word_crud.search_vio_words(db, terms, phone=phone, limit=limit)
+            except Exception as e:
+                logger.error(f"全文检索违规词检测记录失败: {str(e)}")
+                return ApiResponse.error(
+                    message="检索违规词检测记录失败",
+                    status_code=500
+                )
+        return ApiResponse.success(
+            data={
+                "items": [{**vio_word.to_dict(), "snippet": snippet, "score": score} for vio_word, snippet, score in rows],
+                "query": terms,
+                "limit": limit
+            },
+            message="检索违规词检测记录成功"
+        )
+    except Exception as e:
+        logger.error(f"检索违规词检测记录服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="检索违规词检测记录失败",
+            status_code=500
+        )
+
+async def get_top_terms_service(request: Request) -> Response:
+    """
+    高频违规词服务
+    统计 start ~ end 日期(含，UTC，默认当天)内检出次数最多的 k 个违规词，可选 ai_product_id 限定AI产品
+    """
+    try:
+        try:
+            today = datetime.utcnow().date()
+            end = date.fromisoformat(request.query_params.get("end", "") or today.isoformat())
+            start = date.fromisoformat(request.query_params.get("start", "") or end.isoformat())
+        except ValueError:
+            return ApiResponse.validation_error("日期格式错误，应为 YYYY-MM-DD")
+        if start > end:
+            return ApiResponse.validation_error("开始日期不能晚于结束日期")
+
+        try:
+            k = int(request.query_params.get("k", "10"))
+        except ValueError:
+            k = 10
+        if k < 1 or k > VIO_TERM_TOP_MAX_K:
+            k = 10
+        ai_product_id = request.query_params.get("ai_product_id", "") or None
+
+        async with AsyncSessionLocal() as db:
+            try:
+                items = await vio_word_crud.get_top_terms(db, start, end, ai_product_id=ai_product_id, k=k)
+            except Exception as e:
+                logger.error(f"查询高频违规词失败: {str(e)}")
+                return ApiResponse.error(
+                    message="获取高频违规词失败",
+                    status_code=500
+                )
+        return ApiResponse.success(
+            data={
+                "items": items,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "ai_product_id": ai_product_id,
+                "k": k
+            },
+            message="获取高频违规词成功"
+        )
+    except Exception as e:
+        logger.error(f"获取高频违规词服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="获取高频违规词失败",
+            status_code=500
+        )
+
+async def get_vio_word_stats_service(request: Request) -> Response:
+    """
+    获取违规词检测运行指标服务
+    """
+    try:
+        from apps.vio_word.core import result_cache, single_flight, speculation
+        from apps.vio_word.jobs import job_pool
+        from apps.vio_word.history import history_writer
+        from apps.vio_word.resilience import resilient_invoker
+        from core.limiter import llm_limiter
+        from core.tokens import token_meter
+        from apps.vio_word import json_stream
+        from apps.vio_word.classifier import Classifier
+        from apps.vio_word.lexicon import lexicon_watcher
+        return ApiResponse.success(
+            data={
+                "cache": result_cache.stats(),
+                "singleflight": single_flight.stats(),
+                "speculation": speculation.summary(),
+                "llm": resilient_invoker.stats(),
+                "limiter": llm_limiter.stats(),
+                "tokens": token_meter.summary(),
+                "json": json_stream.stats(),
+                "classifier": Classifier.stats(),
+                "near_duplicates": near_duplicate_index.stats(),
+                "lexicon": lexicon_watcher.stats(),
+                "history": history_writer.stats(),
+                "jobs": await job_pool.stats()
+            },
+            message="获取违规词检测运行指标成功"
+        )
+    except Exception as e:
+        logger.error(f"获取违规词检测运行指标服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="获取违规词检测运行指标失败",
+            status_code=500
+        )
+
+
+# 违规词词库管理服务
+async def load_lexicon_from_db(db) -> dict:
+    """
+    从数据库读取词库，格式与内置词库相同
+    :return: 分类 -> {"weight", "reason", "terms"}，没有分类时返回空字典
+    """
+    categories = await vio_word_crud.get_lexicon_categories(db)
+    lexicon = {
+        category.name: {"weight": category.weight, "reason": category.reason, "terms": []}
+        for category in categories
+    }
+    for term in await vio_word_crud.get_lexicon_terms(db):
+        if term.category in lexicon:
+            lexicon[term.category]["terms"].append(term.term)
+    return lexicon
+
+async def get_lexicon_service(request: Request) -> Response:
+    """
+    获取词库分类和词条，以及当前进程使用的词库版本
+    """
+    try:
+        from apps.vio_word.lexicon import active_lexicon
+        category = request.query_params.get("category", None)
+        async with AsyncSessionLocal() as db:
+            categories = await vio_word_crud.get_lexicon_categories(db)
+            terms = await vio_word_crud.get_lexicon_terms(db, category)
+        return ApiResponse.success(
+            data={
+                "version": active_lexicon().version,
+                "categories": [item.to_dict() for item in categories],
+                "terms": [item.to_dict() for item in terms]
+            },
+            message="获取词库成功"
+        )
+    except Exception as e:
+        logger.error(f"获取词库服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="获取词库失败",
+            status_code=500
+        )
+
+async def upsert_lexicon_category_service(request: Request) -> Response:
+    """
+    创建或更新词库分类
+    请求体: {"name", "weight", "reason"}
+    """
+    try:
+        request_data = request.json()
+        name = (request_data.get("name") or "").strip()
+        reason = (request_data.get("reason") or "").strip()
+        if not name or not reason:
+            return ApiResponse.validation_error("分类名称和违规原因不能为空")
+        try:
+            weight = int(request_data.get("weight", 15))
+        except (TypeError, ValueError):
+            return ApiResponse.validation_error("权重必须是整数")
+
+        async with AsyncSessionLocal() as db:
+            category = await vio_word_crud.upsert_lexicon_category(db, name, weight, reason)
+        return ApiResponse.success(data=category.to_dict(), message="保存词库分类成功，发布后生效")
+    except Exception as e:
+        logger.error(f"保存词库分类服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="保存词库分类失败",
+            status_code=500
+        )
+
+async def add_lexicon_terms_service(request: Request) -> Response:
+    """
+    批量添加词条
+    请求体: {"category", "terms": [...]}
+    """
+    try:
+        request_data = request.json()
+        category = (request_data.get("category") or "").strip()
+        terms = request_data.get("terms") or []
+        if not category or not isinstance(terms, list):
+            return ApiResponse.validation_error("分类不能为空，terms 必须是列表")
+        terms = [str(term).strip() for term in terms if str(term).strip()]
+        if not terms:
+            return ApiResponse.validation_error("词条不能为空")
+
+        async with AsyncSessionLocal() as db:
+            categories = {item.name for item in await vio_word_crud.get_lexicon_categories(db)}
+            if category not in categories:
+                return ApiResponse.not_found("词库分类不存在")
+            changed = await vio_word_crud.create_lexicon_terms(db, category, terms)
+        return ApiResponse.success(data={"changed": changed}, message="添加词条成功，发布后生效")
+    except Exception as e:
+        logger.error(f"添加词条服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="添加词条失败",
+            status_code=500
+        )
+
+async def delete_lexicon_term_service(request: Request) -> Response:
+    """
+    删除词条(软删除)
+    """
+    try:
+        try:
+            id = int(request.path_params.get("id"))
+        except (TypeError, ValueError):
+            return ApiResponse.validation_error("词条ID必须是整数")
+
+        async with AsyncSessionLocal() as db:
+            term = await vio_word_crud.delete_lexicon_term(db, id)
+        if not term:
+            return ApiResponse.not_found("词条不存在")
+        return ApiResponse.success(data=term.to_dict(), message="删除词条成功，发布后生效")
+    except Exception as e:
+        logger.error(f"删除词条服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="删除词条失败",
+            status_code=500
+        )
+
+async def import_lexicon_service(request: Request) -> Response:
+    """
+    把当前使用的词库(内置词库或已发布版本)导入数据库，作为运营维护的初始词库
+    """
+    try:
+        from apps.vio_word.lexicon import active_lexicon
+        compiled = active_lexicon()
+        async with AsyncSessionLocal() as db:
+            changed = 0
+            for name, entry in compiled.lexicon.items():
+                await vio_word_crud.upsert_lexicon_category(db, name, entry.get("weight", 15), entry.get("reason", name))
+                changed += await vio_word_crud.create_lexicon_terms(db, name, entry.get("terms", []))
+        return ApiResponse.success(
+            data={"version": compiled.version, "changed": changed},
+            message="导入词库成功"
+        )
+    except Exception as e:
+        logger.error(f"导入词库服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="导入词库失败",
+            status_code=500
+        )
+
+async def publish_lexicon_service(request: Request) -> Response:
+    """
+    把数据库中的词库编译为新版本并发布
+    当前进程立即替换，其他工作进程在下一次版本检查时替换
+    """
+    try:
+        from apps.vio_word.lexicon import publish
+        async with AsyncSessionLocal() as db:
+            lexicon = await load_lexicon_from_db(db)
+        terms = sum(len(entry["terms"]) for entry in lexicon.values())
+        if not terms:
+            return ApiResponse.validation_error("词库为空，请先添加词条或导入词库")
+        # 编译在线程中执行，不阻塞事件循环
+        version = await asyncio.to_thread(publish, lexicon)
+        return ApiResponse.success(
+            data={"version": version, "categories": len(lexicon), "terms": terms},
+            message="发布词库成功"
+        )
+    except Exception as e:
+        logger.error(f"发布词库服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="发布词库失败",
+            status_code=500
+        )
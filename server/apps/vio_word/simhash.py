@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.logger import setup_logger
+from apps.vio_word.config import VIO_NEAR_DUP_THRESHOLD, VIO_NEAR_DUP_MAX_ENTRIES
+from apps.vio_word.cache import normalize_input
+
+# 设置日志记录器
+logger = setup_logger('vio_word_simhash')
+
+"""
+SimHash 近似重复话术索引
+每条检测记录的输入计算 64 位 SimHash 指纹(字符 2-gram)，指纹分为 BANDS 段建立分段哈希表:
+汉明距离不超过 BANDS - 1 的两个指纹至少有一段完全相同(抽屉原理)，
+查询只需比较与某一段相同的候选，不需要全表扫描
+"""
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE = 2
+_BIT_SHIFTS = np.arange(BITS, dtype=np.uint64)
+_BIT_VALUES = np.uint64(1) << _BIT_SHIFTS
+
+
+@lru_cache(maxsize=65536)
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """计算归一化输入的 64 位 SimHash 指纹(无符号)"""
+    text = normalize_input(text)
+    if len(text) < SHINGLE:
+        tokens = [text]
+    else:
+        tokens = [text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)]
+    # 相同分词只计算一次哈希；每一位的权重 = 该位为 1 的分词数 - 为 0 的分词数，按位统计一次完成
+    counts = Counter(tokens)
+    values = np.fromiter((_hash64(token) for token in counts), dtype=np.uint64, count=len(counts))
+    occurrences = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    bits = ((values[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int64)
+    weights = 2 * (occurrences @ bits) - len(tokens)
+    return int((weights > 0).astype(np.uint64) @ _BIT_VALUES)
+
+
+def to_signed(fingerprint: int) -> int:
+    """无符号指纹转为有符号 64 位整数(数据库 BIGINT 存储)"""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    """数据库中的有符号整数转回无符号指纹"""
+    return value + (1 << BITS) if value < 0 else value
+
+
+def hamming(a: int, b: int) -> int:
+    """汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+def bands(fingerprint: int) -> List[int]:
+    return [fingerprint >> (band * BAND_BITS) & BAND_MASK for band in range(BANDS)]
+
+
+class SimHashIndex:
+    """分段哈希索引，记录数超过上限时淘汰最早加入的记录"""
+
+    def __init__(self, max_entries: int = VIO_NEAR_DUP_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.fingerprints: "OrderedDict[int, int]" = OrderedDict()
+        self.tables: List[Dict[int, set]] = [{} for _ in range(BANDS)]
+        self.loaded = False
+        self._lock = None
+        self.counters = {
+            "queries": 0,
+            "hits": 0,
+            "candidates": 0
+        }
+        self.query_time = 0.0
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def add(self, record_id: int, fingerprint: int):
+        """加入或更新一条记录"""
+        if record_id in self.fingerprints:
+            self.remove(record_id)
+        self.fingerprints[record_id] = fingerprint
+        for table, value in zip(self.tables, bands(fingerprint)):
+            table.setdefault(value, set()).add(record_id)
+        while len(self.fingerprints) > self.max_entries:
+            self.remove(next(iter(self.fingerprints)))
+
+    def remove(self, record_id: int):
+        fingerprint = self.fingerprints.pop(record_id, None)
+        if fingerprint is None:
+            return
+        for table, value in zip(self.tables, bands(fingerprint)):
+            ids = table.get(value)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del table[value]
+
+    def query(self, fingerprint: int, threshold: int = VIO_NEAR_DUP_THRESHOLD) -> List[Tuple[int, int]]:
+        """
+        查找汉明距离不超过阈值的记录
+        :param threshold: 汉明距离阈值，超过 BANDS - 1 时可能漏检
+        :return: [(记录ID, 距离)]，按距离升序、ID 降序(优先最新记录)
+        """
+        started = time.perf_counter()
+        candidates = set()
+        for table, value in zip(self.tables, bands(fingerprint)):
+            candidates.update(table.get(value, ()))
+        matches = []
+        for record_id in candidates:
+            distance = hamming(fingerprint, self.fingerprints[record_id])
+            if distance <= threshold:
+                matches.append((record_id, distance))
+        matches.sort(key=lambda item: (item[1], -item[0]))
+        self.counters["queries"] += 1
+        self.counters["candidates"] += len(candidates)
+        if matches:
+            self.counters["hits"] += 1
+        self.query_time += time.perf_counter() - started
+        return matches
+
+    def nearest(self, fingerprint: int, threshold: int = VIO_NEAR_DUP_THRESHOLD) -> Optional[Tuple[int, int]]:
+        matches = self.query(fingerprint, threshold)
+        return matches[0] if matches else None
+
+    async def load(self):
+        """从检测记录表加载最近的指纹，缺少指纹的历史记录顺便补算并回写"""
+        from core.database import AsyncSessionLocal
+        from apps.vio_word import crud as vio_word_crud
+        async with AsyncSessionLocal() as db:
+            rows = await vio_word_crud.get_vio_word_fingerprints(db, self.max_entries)
+            missing = {}
+            for record_id, input_text, value in reversed(rows):
+                if value is None:
+                    fingerprint = simhash(input_text)
+                    missing[record_id] = to_signed(fingerprint)
+                else:
+                    fingerprint = to_unsigned(value)
+                self.add(record_id, fingerprint)
+            if missing:
+                await vio_word_crud.update_vio_word_fingerprints(db, missing)
+        self.loaded = True
+        logger.info(f"SimHash index loaded: {len(self)} records, backfilled {len(missing)}")
+
+    async def ensure_loaded(self):
+        """首次使用时加载，并发调用只加载一次"""
+        if self.loaded:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.loaded:
+                await self.load()
+
+    def stats(self) -> dict:
+        queries = self.counters["queries"]
+        return {
+            "entries": len(self),
+            **self.counters,
+            "avg_query_ms": round(self.query_time / queries * 1000, 4) if queries else 0.0
+        }
+
+
+# 进程内共享的近似重复索引
+near_duplicate_index = SimHashIndex()
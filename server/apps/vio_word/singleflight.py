@@ -0,0 +1,63 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+"""
+请求合并(single-flight)
+同一个键的并发调用只执行一次，其余调用方等待并共享同一个结果，
+用于在同一话术集中提交时合并重复的大模型调用
+
+实际调用在独立的任务中执行，所有调用方(包括发起方)都通过 shield 等待该任务:
+某个调用方被取消(客户端断开、批量任务取消等)只影响它自己，其他调用方照常拿到结果；
+所有调用方都已取消时才取消该任务
+"""
+
+
+class SingleFlight:
+    def __init__(self):
+        # 键 -> [执行任务, 等待方数量]
+        self._inflight: Dict[str, List] = {}
+        self.counters = {
+            "leaders": 0,
+            "shared": 0
+        }
+
+    def _finish(self, key: str, entry: List, task: asyncio.Task):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+        # 等待方都已取消时避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        """
+        执行或加入同键的进行中调用
+        :param key: 合并键
+        :param func: 实际执行的协程函数
+        :return: 调用结果，异常会传递给所有等待方
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.create_task(func())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda task: self._finish(key, entry, task))
+            self.counters["leaders"] += 1
+        else:
+            self.counters["shared"] += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # 没有等待方了，不再需要结果
+                task.cancel()
+
+    def stats(self) -> dict:
+        """合并统计"""
+        return {
+            "inflight": len(self._inflight),
+            **self.counters
+        }
@@ -1,5 +1,7 @@
-from robyn import Robyn, Request
-from apps.vio_word.views.views import vio_check, get_vio_words, get_vio_word, get_vio_words_by_phone
+from robyn import Robyn, Request, WebSocket
+from apps.vio_word.views.views import vio_check, vio_check_long, vio_check_batch, submit_vio_check_job, get_vio_check_job, get_vio_words, get_vio_word, get_vio_words_by_phone, get_vio_word_stats, search_vio_words, get_top_terms
+from apps.vio_word.views.views import vio_check_stream, vio_check_stream_connect, vio_check_stream_close
+from apps.vio_word.views.views import get_lexicon, upsert_lexicon_category, add_lexicon_terms, delete_lexicon_term, import_lexicon, publish_lexicon
 
 def vio_word_view_routes(app):
     """
@@ -8,6 +10,27 @@ def vio_word_view_routes(app):
     """
     
     app.add_route(route_type="POST", endpoint="/vio_word/check", handler=vio_check) # 违规词检测路由
+    app.add_route(route_type="POST", endpoint="/vio_word/check/long", handler=vio_check_long) # 长话术分段检测路由
+    app.add_route(route_type="POST", endpoint="/vio_word/check/batch", handler=vio_check_batch) # 批量违规词检测路由
+    app.add_route(route_type="POST", endpoint="/vio_word/jobs", handler=submit_vio_check_job) # 提交异步违规词检测任务路由
+    app.add_route(route_type="GET", endpoint="/vio_word/jobs/:job_id", handler=get_vio_check_job) # 查询异步违规词检测任务路由
+
+    # 流式违规词检测路由(WebSocket)，逐阶段推送检测结果
+    vio_check_ws = WebSocket(app, "/vio_word/check/stream")
+    vio_check_ws.on("connect")(vio_check_stream_connect)
+    vio_check_ws.on("message")(vio_check_stream)
+    vio_check_ws.on("close")(vio_check_stream_close)
+
     app.add_route(route_type="GET", endpoint="/vio_word/words", handler=get_vio_words) # 获取所有违规词检测记录路由
+    app.add_route(route_type="GET", endpoint="/vio_word/words/search", handler=search_vio_words) # 全文检索违规词检测记录路由
     app.add_route(route_type="GET", endpoint="/vio_word/words/:id", handler=get_vio_word) # 获取单个违规词检测记录路由
     app.add_route(route_type="GET", endpoint="/vio_word/words/phone/:phone", handler=get_vio_words_by_phone) # 根据手机号搜索违规词检测记录路由
+    app.add_route(route_type="GET", endpoint="/vio_word/stats", handler=get_vio_word_stats) # 获取违规词检测运行指标路由
+    app.add_route(route_type="GET", endpoint="/vio_word/terms/top", handler=get_top_terms) # 高频违规词统计路由
+
+    app.add_route(route_type="GET", endpoint="/vio_word/lexicon", handler=get_lexicon) # 获取违规词词库路由
+    app.add_route(route_type="POST", endpoint="/vio_word/lexicon/categories", handler=upsert_lexicon_category) # 创建或更新词库分类路由
+    app.add_route(route_type="POST", endpoint="/vio_word/lexicon/terms", handler=add_lexicon_terms) # 批量添加词条路由
+    app.add_route(route_type="DELETE", endpoint="/vio_word/lexicon/terms/:id", handler=delete_lexicon_term) # 删除词条路由
+    app.add_route(route_type="POST", endpoint="/vio_word/lexicon/import", handler=import_lexicon) # 导入当前词库路由
+    app.add_route(route_type="POST", endpoint="/vio_word/lexicon/publish", handler=publish_lexicon) # 发布词库路由
@@ -1,7 +1,12 @@
 from robyn import Request, Response
 from core.response import ApiResponse
-from apps.vio_word.core import vio_word_check
-from core.middleware import error_handler, request_logger, auth_required, admin_required, rate_limit, auth_userinfo
+from apps.vio_word.core import vio_word_check, vio_word_check_stream, vio_word_check_batch, vio_word_check_long
+from apps.vio_word.config import VIO_BATCH_MAX_SIZE, VIO_LONG_TEXT_MAX_CHARS
+from apps.vio_word.chunking import split_chunks
+from apps.vio_word.jobs import job_pool
+from apps.vio_word.history import history_writer
+from apps.vio_word.services import get_latest_entitlement, build_vio_word_record
+from core.middleware import error_handler, request_logger, auth_required, admin_required, rate_limit, auth_userinfo, RateLimiter
 from core.logger import setup_logger
 import json
 from apps.users.crud import get_user, update_user
@@ -24,7 +29,7 @@ async def vio_check(request: Request) -> Response:
         return Response(
             status_code=400,
             headers={"Content-Type": "application/json"},
-            description=json.dumps({"code": 400, "message": "输入字符长度不要超过120哦"})
+            description=json.dumps({"code": 400, "message": "输入字符长度不要超过120哦，长话术请使用 /vio_word/check/long"})
         )
 
     phone = request_data.get("phone")
@@ -32,20 +37,9 @@ async def vio_check(request: Request) -> Response:
     
     try:
         async with AsyncSessionLocal() as db:
-            filters = {
-                "phone": phone,
-                "ai_product_id": ai_product_id,
-                "is_deleted": False
-            }
-            
-            entitlements, total_count = await business_crud.get_user_entitlements_by_filters(
-                db, 
-                filters=filters,
-                order_by={"created_at": "desc"},
-                page=1,
-                page_size=1
-            )
-            if not entitlements:
+            # 获取最新的权益记录
+            entitlement = await get_latest_entitlement(db, phone, ai_product_id)
+            if not entitlement:
                 return ApiResponse.success(
                     message="暂无权益",
                     status_code=403
@@ -57,8 +51,6 @@ async def vio_check(request: Request) -> Response:
             status_code=500
         )
 
-    # 获取最新的权益记录
-    entitlement = entitlements[0]
     entitlement_id = entitlement.entitlement_id
     daily_remaining = entitlement.daily_remaining 
     
@@ -88,26 +80,10 @@ async def vio_check(request: Request) -> Response:
     daily_remaining -= 1
     await business_crud.update_user_entitlement(db, entitlement_id, {"daily_remaining": daily_remaining})
 
-    # 保存检测记录
+    # 保存检测记录(写入队列，不等待数据库)
     try:
-        # 处理 is_Violations 字段
-        is_violation = result.get("is_Violations") == "是"
-        
-        vio_word_data = {
-            "phone": phone,
-            "input": input_text,
-            "is_violation": is_violation,
-            "words": result.get("words", ""),
-            "reasons": result.get("reason", ""),  # 注意：API返回的是 reason，而不是 reasons
-            "op": result.get("op", ""),
-            "ideas": result.get("ideas", ""),
-            "old_score": result.get("old_score", 0),
-            "new_score": result.get("new_score", 0),
-            "old_rating": result.get("old_rating", ""),
-            "new_rating": result.get("new_rating", ""),
-            "is_deleted": False
-        }
-        await vio_word_crud.create_vio_word(db, vio_word_data)
+        vio_word_data = build_vio_word_record(phone, input_text, result, ai_product_id)
+        await history_writer.add([vio_word_data])
     except Exception as e:
         logger.error(f"保存违规词检测记录失败: {str(e)}")
         # 继续执行，不影响返回结果
@@ -128,6 +104,282 @@ async def vio_check(request: Request) -> Response:
         description=json.dumps(response_data)
     )
 
+@error_handler
+@request_logger
+@rate_limit(max_requests=5, time_window=60)  # 每分钟最多5次请求
+async def vio_check_long(request: Request) -> Response:
+    """传入整段长话术，按句子分段并发检测后返回合并结果，按分段数扣减额度"""
+    request_data = request.json()
+    input_text = request_data.get("input")
+    if not isinstance(input_text, str) or not input_text.strip():
+        return ApiResponse.validation_error("input 不能为空")
+    if len(input_text) > VIO_LONG_TEXT_MAX_CHARS:
+        return ApiResponse.validation_error(f"输入字符长度不要超过{VIO_LONG_TEXT_MAX_CHARS}哦")
+
+    phone = request_data.get("phone")
+    ai_product_id = request_data.get("ai_product_id")
+    # 每个分段计一次检测
+    cost = len(split_chunks(input_text))
+
+    try:
+        async with AsyncSessionLocal() as db:
+            entitlement = await get_latest_entitlement(db, phone, ai_product_id)
+            if not entitlement:
+                return ApiResponse.success(
+                    message="暂无权益",
+                    status_code=403
+                )
+            daily_remaining = await business_crud.reserve_user_entitlement_quota(db, entitlement.entitlement_id, cost)
+    except Exception as e:
+        logger.error(f"查询用户权益服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="查询用户权益失败",
+            status_code=500
+        )
+    if daily_remaining is None:
+        return ApiResponse.error(
+            message=f"使用额度不足，本次检测需要{cost}次额度",
+            status_code=403
+        )
+
+    result = await vio_word_check_long(input_text)
+
+    if result == False:
+        # 检测失败，退还预扣的额度
+        async with AsyncSessionLocal() as db:
+            await business_crud.release_user_entitlement_quota(db, entitlement.entitlement_id, cost)
+        return ApiResponse.error(
+            message="检测失败",
+            status_code=500
+        )
+
+    # 保存检测记录(写入队列，不等待数据库)
+    try:
+        await history_writer.add([build_vio_word_record(phone, input_text, result, ai_product_id)])
+    except Exception as e:
+        logger.error(f"保存违规词检测记录失败: {str(e)}")
+
+    return ApiResponse.success(
+        data={
+            "result": result,
+            "cost": cost,
+            "daily_remaining": daily_remaining
+        }
+    )
+
+@error_handler
+@request_logger
+@rate_limit(max_requests=5, time_window=60)  # 每分钟最多5次批量请求
+async def vio_check_batch(request: Request) -> Response:
+    """传入多条话术，并发检测后返回逐条结果"""
+    request_data = request.json()
+    inputs = request_data.get("inputs")
+    if not isinstance(inputs, list) or not inputs:
+        return ApiResponse.validation_error("inputs 必须是非空列表")
+    if len(inputs) > VIO_BATCH_MAX_SIZE:
+        return ApiResponse.validation_error(f"单次最多检测{VIO_BATCH_MAX_SIZE}条话术")
+    for input_text in inputs:
+        # 判断输入字符长度
+        if not isinstance(input_text, str) or len(input_text) > 120:
+            return ApiResponse.validation_error("每条输入字符长度不要超过120哦")
+
+    phone = request_data.get("phone")
+    ai_product_id = request_data.get("ai_product_id")
+
+    try:
+        async with AsyncSessionLocal() as db:
+            entitlement = await get_latest_entitlement(db, phone, ai_product_id)
+            if not entitlement:
+                return ApiResponse.success(
+                    message="暂无权益",
+                    status_code=403
+                )
+            # 为整批请求原子预扣额度
+            daily_remaining = await business_crud.reserve_user_entitlement_quota(db, entitlement.entitlement_id, len(inputs))
+    except Exception as e:
+        logger.error(f"查询用户权益服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="查询用户权益失败",
+            status_code=500
+        )
+    if daily_remaining is None:
+        return ApiResponse.error(
+            message="使用额度不足",
+            status_code=403
+        )
+
+    results = await vio_word_check_batch(inputs)
+
+    items = []
+    records = []
+    for index, (input_text, result) in enumerate(zip(inputs, results)):
+        if result == False:
+            items.append({"index": index, "input": input_text, "success": False, "result": "检测失败"})
+            continue
+        items.append({"index": index, "input": input_text, "success": True, "result": result})
+        records.append(build_vio_word_record(phone, input_text, result, ai_product_id))
+
+    # 退还检测失败条目预扣的额度
+    failed = len(inputs) - len(records)
+    if failed:
+        async with AsyncSessionLocal() as db:
+            daily_remaining = await business_crud.release_user_entitlement_quota(db, entitlement.entitlement_id, failed)
+
+    # 批量保存检测记录(写入队列，不等待数据库)
+    try:
+        await history_writer.add(records)
+    except Exception as e:
+        logger.error(f"批量保存违规词检测记录失败: {str(e)}")
+
+    return ApiResponse.success(
+        data={
+            "results": items,
+            "daily_remaining": daily_remaining
+        }
+    )
+
+@error_handler
+@request_logger
+@rate_limit(max_requests=5, time_window=60)  # 每分钟最多5次请求
+async def submit_vio_check_job(request: Request) -> Response:
+    """提交异步违规词检测任务，立即返回任务ID"""
+    request_data = request.json()
+    input_text = request_data.get("input") or ""
+    # 判断输入字符长度
+    if len(input_text) > 120:
+        return ApiResponse.validation_error("输入字符长度不要超过120哦")
+
+    phone = request_data.get("phone")
+    ai_product_id = request_data.get("ai_product_id")
+
+    try:
+        async with AsyncSessionLocal() as db:
+            entitlement = await get_latest_entitlement(db, phone, ai_product_id)
+            if not entitlement:
+                return ApiResponse.success(
+                    message="暂无权益",
+                    status_code=403
+                )
+            # 提交时预扣额度，任务失败时由工作协程退还
+            daily_remaining = await business_crud.reserve_user_entitlement_quota(db, entitlement.entitlement_id, 1)
+    except Exception as e:
+        logger.error(f"查询用户权益服务异常: {str(e)}")
+        return ApiResponse.error(
+            message="查询用户权益失败",
+            status_code=500
+        )
+    if daily_remaining is None:
+        return ApiResponse.error(
+            message="使用额度不足",
+            status_code=403
+        )
+
+    job = await job_pool.submit(phone, ai_product_id, entitlement.entitlement_id, input_text)
+    return ApiResponse.success(
+        data={
+            "job_id": job.job_id,
+            "status": job.status,
+            "daily_remaining": daily_remaining
+        },
+        status_code=202
+    )
+
+@error_handler
+@request_logger
+async def get_vio_check_job(request: Request) -> Response:
+    """根据任务ID查询异步违规词检测任务状态和结果"""
+    job_id = request.path_params.get("job_id")
+    if not job_id:
+        return ApiResponse.validation_error("任务ID不能为空")
+
+    async with AsyncSessionLocal() as db:
+        job = await vio_word_crud.get_vio_word_job(db, job_id)
+    if not job:
+        return ApiResponse.not_found("检测任务不存在")
+    return ApiResponse.success(data=job.to_dict())
+
+# 流式检测按手机号限流，与 /vio_word/check 一致: 每分钟最多5次检测
+stream_rate_limiter = RateLimiter(max_requests=5, time_window=60)
+
+def _stream_message(event: str, data) -> str:
+    """流式检测消息格式: {"event": 事件名, "data": 数据}"""
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False)
+
+async def vio_check_stream(ws, msg) -> str:
+    """
+    流式违规词检测(WebSocket)
+    客户端发送与 /vio_word/check 相同的JSON请求体，服务端依次推送
+    verdict -> op(增量) -> ideas -> score -> done 事件，检测失败时推送 error 事件
+    检测前预扣 1 次额度，检测失败、出错或连接中断时退还；检测成功后保存检测记录
+    """
+    try:
+        request_data = json.loads(msg)
+    except (TypeError, ValueError):
+        return _stream_message("error", {"code": 400, "message": "请求格式错误"})
+
+    input_text = request_data.get("input") or ""
+    # 判断输入字符长度
+    if len(input_text) > 120:
+        return _stream_message("error", {"code": 400, "message": "输入字符长度不要超过120哦"})
+
+    phone = request_data.get("phone")
+    ai_product_id = request_data.get("ai_product_id")
+
+    if not stream_rate_limiter.allow(phone or ws.id):
+        logger.warning(f"Rate limit exceeded for stream: {phone or ws.id}")
+        return _stream_message("error", {"code": 429, "message": "请求过于频繁，请稍后再试"})
+
+    try:
+        async with AsyncSessionLocal() as db:
+            entitlement = await get_latest_entitlement(db, phone, ai_product_id)
+            if not entitlement:
+                return _stream_message("error", {"code": 403, "message": "暂无权益"})
+            # 预扣额度，并发的流式检测不会超额使用
+            daily_remaining = await business_crud.reserve_user_entitlement_quota(db, entitlement.entitlement_id, 1)
+    except Exception as e:
+        logger.error(f"查询用户权益服务异常: {str(e)}")
+        return _stream_message("error", {"code": 500, "message": "查询用户权益失败"})
+    if daily_remaining is None:
+        return _stream_message("error", {"code": 403, "message": "使用额度不足"})
+
+    completed = False
+    try:
+        async for event, data in vio_word_check_stream(input_text):
+            if event == "error":
+                return _stream_message("error", {"code": 500, "message": data["message"]})
+            if event != "done":
+                await ws.async_send_to(ws.id, _stream_message(event, data))
+                continue
+
+            completed = True
+            # 保存检测记录(写入队列，不等待数据库)
+            try:
+                await history_writer.add([build_vio_word_record(phone, input_text, data, ai_product_id)])
+            except Exception as e:
+                logger.error(f"保存违规词检测记录失败: {str(e)}")
+            return _stream_message("done", {"result": data, "daily_remaining": daily_remaining})
+
+        return _stream_message("error", {"code": 500, "message": "检测失败"})
+    except Exception as e:
+        logger.error(f"流式检测异常: {str(e)}")
+        return _stream_message("error", {"code": 500, "message": "检测失败"})
+    finally:
+        if not completed:
+            # 检测失败、出错或连接中断，退还预扣的额度
+            try:
+                async with AsyncSessionLocal() as db:
+                    await business_crud.release_user_entitlement_quota(db, entitlement.entitlement_id, 1)
+            except Exception as e:
+                logger.error(f"退还用户权益额度失败: {str(e)}")
+
+async def vio_check_stream_connect(ws) -> str:
+    """流式检测连接建立"""
+    return _stream_message("ready", {})
+
+async def vio_check_stream_close(ws) -> str:
+    """流式检测连接关闭"""
+    return ""
+
 @error_handler
 @request_logger
 # @auth_required
@@ -168,3 +420,94 @@ async def get_vio_words_by_phone(request: Request) -> Response:
 
 
 
+
+@error_handler
+@request_logger
+# @auth_required
+# @admin_required
+async def get_vio_word_stats(request: Request) -> Response:
+    """
+    获取违规词检测运行指标(缓存命中等)
+    """
+    from apps.vio_word.services import get_vio_word_stats_service
+    return await get_vio_word_stats_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def search_vio_words(request: Request) -> Response:
+    """
+    全文检索违规词检测记录(管理员权限)
+    """
+    from apps.vio_word.services import search_vio_words_service
+    return await search_vio_words_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def get_top_terms(request: Request) -> Response:
+    """
+    按日期和AI产品统计高频违规词(管理员权限)
+    """
+    from apps.vio_word.services import get_top_terms_service
+    return await get_top_terms_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def get_lexicon(request: Request) -> Response:
+    """
+    获取违规词词库(管理员权限)
+    """
+    from apps.vio_word.services import get_lexicon_service
+    return await get_lexicon_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def upsert_lexicon_category(request: Request) -> Response:
+    """
+    创建或更新词库分类(管理员权限)
+    """
+    from apps.vio_word.services import upsert_lexicon_category_service
+    return await upsert_lexicon_category_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def add_lexicon_terms(request: Request) -> Response:
+    """
+    批量添加词条(管理员权限)
+    """
+    from apps.vio_word.services import add_lexicon_terms_service
+    return await add_lexicon_terms_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def delete_lexicon_term(request: Request) -> Response:
+    """
+    删除词条(管理员权限)
+    """
+    from apps.vio_word.services import delete_lexicon_term_service
+    return await delete_lexicon_term_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def import_lexicon(request: Request) -> Response:
+    """
+    把当前使用的词库导入数据库(管理员权限)
+    """
+    from apps.vio_word.services import import_lexicon_service
+    return await import_lexicon_service(request)
+
+@error_handler
+@request_logger
+@admin_required
+async def publish_lexicon(request: Request) -> Response:
+    """
+    编译并发布数据库中的词库(管理员权限)
+    """
+    from apps.vio_word.services import publish_lexicon_service
+    return await publish_lexicon_service(request)
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from collections import deque
+from core.logger import setup_logger
+from dotenv import load_dotenv
+from pathlib import Path
+
+# 获取项目根目录
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 加载环境变量
+load_dotenv(os.path.join(BASE_DIR, "robyn.env"))
+
+# 大模型调用并发限制配置
+LLM_LIMIT_INITIAL = int(os.getenv('LLM_LIMIT_INITIAL', 8))
+LLM_LIMIT_MIN = int(os.getenv('LLM_LIMIT_MIN', 1))
+LLM_LIMIT_MAX = int(os.getenv('LLM_LIMIT_MAX', 64))
+LLM_LIMIT_BACKOFF = float(os.getenv('LLM_LIMIT_BACKOFF', 0.5))  # 过载时并发上限乘以该系数
+LLM_LIMIT_LATENCY_TARGET = float(os.getenv('LLM_LIMIT_LATENCY_TARGET', 10))  # 秒，超过视为延迟不健康
+
+logger = setup_logger('limiter')
+
+
+def is_overload(exc: BaseException) -> bool:
+    """判断异常是否表示上游过载(429 或超时)"""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    name = type(exc).__name__
+    return "RateLimit" in name or "Timeout" in name
+
+
+class Permit:
+    """
+    并发许可，离开 async with 时按结果调整并发上限
+    正常完成且延迟健康 -> 加性增加；429/超时或延迟不健康 -> 乘性减小；被取消或其他异常 -> 只释放
+    """
+
+    def __init__(self, limiter: "AdaptiveLimiter"):
+        self.limiter = limiter
+        self.started = 0.0
+        self.overloaded = False
+
+    def overload(self):
+        """调用方主动标记本次调用过载(例如上层超时)"""
+        self.overloaded = True
+
+    async def __aenter__(self):
+        await self.limiter._acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        latency = time.monotonic() - self.started
+        if self.overloaded or (exc is not None and is_overload(exc)):
+            outcome = "overload"
+        elif exc is not None:
+            outcome = "ignore"
+        else:
+            outcome = "ok" if latency <= self.limiter.latency_target else "overload"
+        self.limiter._release(outcome, self.started)
+        return False
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制
+    等待方按先来先服务排队，并发上限在 [min_limit, max_limit] 之间随上游状态调整
+    """
+
+    def __init__(self, name: str, initial: int = LLM_LIMIT_INITIAL, min_limit: int = LLM_LIMIT_MIN,
+                 max_limit: int = LLM_LIMIT_MAX, backoff: float = LLM_LIMIT_BACKOFF,
+                 latency_target: float = LLM_LIMIT_LATENCY_TARGET):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.limit = float(max(min_limit, min(max_limit, initial)))
+        self.in_flight = 0
+        self.waiters = deque()
+        self.last_decrease = 0.0
+        self.counters = {
+            "acquired": 0,
+            "queued": 0,
+            "increases": 0,
+            "decreases": 0,
+            "overloads": 0
+        }
+        self.wait_total = 0.0
+
+    def acquire(self) -> Permit:
+        """
+        获取并发许可
+        用法: async with limiter.acquire() as permit: ...
+        """
+        return Permit(self)
+
+    async def _acquire(self):
+        # 有人排队时新来的也排队，保证先来先服务
+        if not self.waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self.counters["acquired"] += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        self.counters["queued"] += 1
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配到许可后被取消，把许可交给下一个等待方
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self.waiters.remove(future)
+            raise
+        self.wait_total += time.monotonic() - started
+        self.counters["acquired"] += 1
+
+    def _release(self, outcome: str, started: float):
+        self.in_flight -= 1
+        if outcome == "ok":
+            # 只有在并发上限接近用满时才增加，避免空闲期上限无限增长
+            if self.in_flight + 1 >= int(self.limit) and self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.counters["increases"] += 1
+        elif outcome == "overload":
+            self.counters["overloads"] += 1
+            # 同一批过载只减小一次: 在上次减小之前发出的请求不再触发减小
+            if started >= self.last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = time.monotonic()
+                self.counters["decreases"] += 1
+                logger.info(f"Limiter {self.name} backed off to {int(self.limit)}")
+        self._wake()
+
+    def _wake(self):
+        """按排队顺序唤醒等待方直到用满并发上限"""
+        while self.waiters and self.in_flight < int(self.limit):
+            future = self.waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        """当前并发上限、执行中和排队中的请求数"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_length": len(self.waiters),
+            **self.counters,
+            "wait_total_s": round(self.wait_total, 3)
+        }
+
+
+# 所有大模型调用共享的并发限制
+llm_limiter = AdaptiveLimiter("llm")
@@ -156,6 +156,42 @@ def admin_required(func: Callable) -> Callable:
         return await func(request, *args, **kwargs)
     return wrapper
 
+class RateLimiter:
+    """
+    滑动窗口速率限制
+    :param max_requests: 在时间窗口内允许的最大请求数
+    :param time_window: 时间窗口（秒）
+    """
+
+    def __init__(self, max_requests: int, time_window: int):
+        from collections import defaultdict
+        self.max_requests = max_requests
+        self.time_window = time_window
+        # 用于存储请求记录
+        self.request_records = defaultdict(list)
+
+    def allow(self, key: str) -> bool:
+        """记录一次请求，超过限制时返回 False(不记录)"""
+        import time
+
+        # 获取当前时间
+        current_time = time.time()
+
+        # 清理过期的请求记录
+        self.request_records[key] = [
+            timestamp for timestamp in self.request_records[key]
+            if current_time - timestamp < self.time_window
+        ]
+
+        # 检查是否超过限制
+        if len(self.request_records[key]) >= self.max_requests:
+            return False
+
+        # 记录新的请求
+        self.request_records[key].append(current_time)
+        return True
+
+
 def rate_limit(max_requests: int, time_window: int) -> Callable:
     """
     速率限制装饰器
@@ -163,11 +199,7 @@ def rate_limit(max_requests: int, time_window: int) -> Callable:
     :param max_requests: 在时间窗口内允许的最大请求数
     :param time_window: 时间窗口（秒）
     """
-    from collections import defaultdict
-    import time
-    
-    # 用于存储请求记录
-    request_records = defaultdict(list)
+    limiter = RateLimiter(max_requests, time_window)
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -175,26 +207,14 @@ def rate_limit(max_requests: int, time_window: int) -> Callable:
             # 获取客户端IP
             client_ip = request.headers.get("X-Real-IP") or request.headers.get("X-Forwarded-For") or request.ip_addr
             
-            # 获取当前时间
-            current_time = time.time()
-            
-            # 清理过期的请求记录
-            request_records[client_ip] = [
-                timestamp for timestamp in request_records[client_ip]
-                if current_time - timestamp < time_window
-            ]
-            
             # 检查是否超过限制
-            if len(request_records[client_ip]) >= max_requests:
+            if not limiter.allow(client_ip):
                 logger.warning(f"Rate limit exceeded for IP: {client_ip}")
                 return ApiResponse.error(
                     message="请求过于频繁，请稍后再试",
                     status_code=status_codes.HTTP_429_TOO_MANY_REQUESTS
                 )
             
-            # 记录新的请求
-            request_records[client_ip].append(current_time)
-            
             return await func(request, *args, **kwargs)
         return wrapper
     return decorator 
\ No newline at end of file
@@ -0,0 +1,190 @@
+import asyncio
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List
+from core.logger import setup_logger
+from dotenv import load_dotenv
+from pathlib import Path
+
+# 获取项目根目录
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 加载环境变量
+load_dotenv(os.path.join(BASE_DIR, "robyn.env"))
+
+# 大模型 token 统计配置
+LLM_TOKEN_ENCODING = os.getenv('LLM_TOKEN_ENCODING', 'cl100k_base')  # tiktoken 编码名称
+LLM_CHAT_CONTEXT_BUDGET = int(os.getenv('LLM_CHAT_CONTEXT_BUDGET', 6000))  # 对话上下文 token 上限，0 表示不限制
+LLM_TOKEN_CACHE_DIR = os.getenv('LLM_TOKEN_CACHE_DIR', os.path.join(BASE_DIR, "data", "tiktoken"))  # tiktoken 编码文件目录(随部署提供)
+LLM_TOKEN_LOAD_TIMEOUT = float(os.getenv('LLM_TOKEN_LOAD_TIMEOUT', 10))  # 启动时加载编码的最长等待时间(秒)
+
+# tiktoken 从 TIKTOKEN_CACHE_DIR 读取编码文件，目录中没有时才联网下载
+if LLM_TOKEN_CACHE_DIR and "TIKTOKEN_CACHE_DIR" not in os.environ:
+    os.environ["TIKTOKEN_CACHE_DIR"] = LLM_TOKEN_CACHE_DIR
+
+logger = setup_logger('tokens')
+
+"""
+大模型 token 计数、截断和按阶段统计
+使用 tiktoken 计数；编码文件不可用(例如无法联网下载)时退化为估算: 汉字等宽字符每个计 1，其余字符每 4 个计 1
+
+编码在 /initialize 中由 load_encoder 在线程中加载(可能需要下载编码文件，tiktoken 下载没有超时)，
+请求路径上从不加载编码；加载完成前或加载失败时一律使用估算
+离线部署时把编码文件放入 LLM_TOKEN_CACHE_DIR(文件名为下载地址的 sha1，可在联网机器上设置 TIKTOKEN_CACHE_DIR 后加载一次得到)
+"""
+
+# 每条消息的格式开销和回复引导开销(OpenAI 对话格式)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+_WIDE_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+_encoder = None
+
+
+def _load_encoding():
+    import tiktoken
+    return tiktoken.get_encoding(LLM_TOKEN_ENCODING)
+
+
+async def load_encoder(timeout: float = LLM_TOKEN_LOAD_TIMEOUT) -> bool:
+    """
+    在线程中加载 tiktoken 编码，不阻塞事件循环；超时或失败时继续使用估算
+    :return: 是否加载成功
+    """
+    global _encoder
+    if _encoder is not None:
+        return True
+    try:
+        encoder = await asyncio.wait_for(asyncio.to_thread(_load_encoding), timeout=timeout)
+    except Exception as e:
+        logger.warning(f"tiktoken 编码 {LLM_TOKEN_ENCODING} 加载失败，token 数改为估算: {type(e).__name__}")
+        return False
+    _encoder = encoder
+    # 丢弃加载前按估算缓存的计数
+    count_tokens.cache_clear()
+    logger.info(f"tiktoken encoding loaded: {LLM_TOKEN_ENCODING}")
+    return True
+
+
+def get_encoder():
+    """已加载的 tiktoken 编码，未加载时返回 None(使用估算)"""
+    return _encoder
+
+
+def tokenizer_name() -> str:
+    return LLM_TOKEN_ENCODING if get_encoder() is not None else "estimate"
+
+
+def _estimate(text: str) -> int:
+    wide = len(_WIDE_RE.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+@lru_cache(maxsize=1024)
+def count_tokens(text: str) -> int:
+    """文本的 token 数(系统提示词等重复文本只计算一次)"""
+    if not text:
+        return 0
+    encoder = get_encoder()
+    if encoder is None:
+        return _estimate(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def count_messages(messages: List[dict]) -> int:
+    """对话消息列表的 token 数 [{"role", "content"}]"""
+    return sum(TOKENS_PER_MESSAGE + count_tokens(message.get("content") or "") for message in messages) + TOKENS_PER_REPLY
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """截断文本使其不超过 max_tokens 个 token"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoder = get_encoder()
+    if encoder is not None:
+        # 截断处可能落在多字节字符中间，去掉解码出的替换字符
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]).rstrip("\ufffd")
+    # 估算模式: 二分查找满足上限的最长前缀
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _estimate(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def trim_messages(messages: List[dict], budget: int = LLM_CHAT_CONTEXT_BUDGET) -> List[dict]:
+    """
+    对话上下文超过 token 上限时丢弃最早的非系统消息，始终保留系统消息和最后一条消息
+    :return: 新的消息列表
+    """
+    if budget <= 0 or count_messages(messages) <= budget:
+        return messages
+    system = [message for message in messages if message.get("role") == "system"]
+    others = [message for message in messages if message.get("role") != "system"]
+    while len(others) > 1 and count_messages(system + others) > budget:
+        others.pop(0)
+    return system + others
+
+
+class TokenMeter:
+    """
+    按阶段累计 token 数和耗时
+    prompt_tokens 含系统提示词，system_tokens 为其中系统提示词部分(每次调用重复发送的固定开销)
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, prompt_tokens: int, completion_tokens: int, seconds: float,
+               system_tokens: int = 0, truncated: bool = False):
+        entry = self.stages.setdefault(stage, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "system_tokens": 0,
+            "completion_tokens": 0,
+            "truncated": 0,
+            "seconds": 0.0
+        })
+        entry["calls"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["system_tokens"] += system_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["truncated"] += 1 if truncated else 0
+        entry["seconds"] += seconds
+
+    def summary(self) -> dict:
+        """各阶段 token 和耗时统计，dominant_stage 为累计 token 最多的阶段"""
+        total = sum(entry["prompt_tokens"] + entry["completion_tokens"] for entry in self.stages.values())
+        stages = {}
+        for stage, entry in self.stages.items():
+            calls = entry["calls"] or 1
+            tokens = entry["prompt_tokens"] + entry["completion_tokens"]
+            stages[stage] = {
+                "calls": entry["calls"],
+                "prompt_tokens": entry["prompt_tokens"],
+                "system_tokens": entry["system_tokens"],
+                "completion_tokens": entry["completion_tokens"],
+                "avg_prompt_tokens": round(entry["prompt_tokens"] / calls, 1),
+                "avg_completion_tokens": round(entry["completion_tokens"] / calls, 1),
+                "avg_ms": round(entry["seconds"] / calls * 1000, 2),
+                "truncated": entry["truncated"],
+                "share": round(tokens / total, 4) if total else 0.0
+            }
+        dominant = max(stages, key=lambda stage: stages[stage]["share"]) if stages else None
+        return {
+            "tokenizer": tokenizer_name(),
+            "total_tokens": total,
+            "dominant_stage": dominant,
+            "stages": stages
+        }
+
+
+# 所有大模型调用共享的 token 统计
+token_meter = TokenMeter()
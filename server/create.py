@@ -3,7 +3,7 @@ from core.database import Base, engine
 # 必须导入所有模型
 from apps.users.models import User
 from apps.business.models import Courses, Entitlement_rules, Orders, User_entitlements, Ai_products, Upload_error_orders, Batch_generate_entitlements_error
-from apps.vio_word.models import Vio_word
+from apps.vio_word.models import Vio_word, Vio_word_job
 """
 创建 初始化asyncio数据库
 """
@@ -10,6 +10,13 @@ from core.logger import setup_logger
 import asyncio
 from apps.business.api_routes import business_api_routes # 导入业务接口路由
 from core.scheduler import start_scheduler
+from apps.vio_word.llm import LLMRegistry
+from apps.vio_word.jobs import job_pool
+from apps.vio_word.simhash import near_duplicate_index
+from apps.vio_word.lexicon import lexicon_watcher
+from apps.vio_word.history import history_writer
+from apps.vio_word.config import VIO_NEAR_DUP_ENABLED
+from core.tokens import load_encoder
 
 # 设置日志记录器
 logger = setup_logger('main')
@@ -36,11 +43,45 @@ users_view_routes(app)
 # 注册违规词检测视图路由
 vio_word_view_routes(app)
 
+async def start_background_workers():
+    """进程启动时启动检测记录批量写入协程、词库版本检查协程和异步检测任务工作协程"""
+    try:
+        history_writer.start()
+        lexicon_watcher.start()
+        await job_pool.start()
+    except Exception as e:
+        # 启动失败时不中止进程，可由 /initialize 重试
+        logger.error(f"Failed to start background workers: {str(e)}")
+
+
+async def stop_background_workers():
+    """进程正常退出时停止工作协程并写入全部积压的检测记录"""
+    await job_pool.stop()
+    await lexicon_watcher.stop()
+    await history_writer.stop()
+
+
+# 工作协程随进程启停，不依赖手动调用 /initialize、/shutdown，避免进程退出时丢失积压的检测记录
+app.startup_handler(start_background_workers)
+app.shutdown_handler(stop_background_workers)
+
 # 初始化Redis连接的路由
 @app.get("/initialize")
 async def initialize(request: Request) -> Response:
     """初始化应用的路由"""
     try:
+        # 预先创建大模型客户端和调用链
+        LLMRegistry.init()
+        # 在线程中加载 token 编码，加载完成前按估算计数
+        await load_encoder()
+        # 启动检测记录批量写入协程和异步检测任务工作协程(已随进程启动时不重复启动)
+        history_writer.start()
+        await job_pool.start()
+        # 加载近似重复话术索引
+        if VIO_NEAR_DUP_ENABLED:
+            await near_duplicate_index.ensure_loaded()
+        # 定期检查已发布的词库版本，变化时替换正在使用的词库(已随进程启动时不重复启动)
+        lexicon_watcher.start()
         await Cache.init()
         logger.info("Application initialized successfully")
         return Response(status_code=status_codes.HTTP_200_OK, description="Initialization successful")
@@ -56,7 +97,10 @@ async def initialize(request: Request) -> Response:
 async def shutdown(request: Request) -> Response:
     """关闭应用的路由"""
     try:
+        # 停止工作协程并写入全部积压的检测记录
+        await stop_background_workers()
         await Cache.close()
+        await LLMRegistry.close()
         logger.info("Application shutdown completed")
         return Response(status_code=status_codes.HTTP_200_OK, description="Shutdown successful")
     except Exception as e:
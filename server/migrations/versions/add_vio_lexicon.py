@@ -0,0 +1,43 @@
+"""add vio_lexicon tables
+
+Revision ID: add_vio_lexicon
+Revises: add_vio_word_simhash
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_lexicon'
+down_revision = 'add_vio_word_simhash'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 创建违规词词库分类表
+    op.create_table(
+        'vio_lexicon_categories',
+        sa.Column('name', sa.VARCHAR(50), primary_key=True),
+        sa.Column('weight', sa.Integer, nullable=False),
+        sa.Column('reason', sa.VARCHAR(255), nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=True)
+    )
+    # 创建违规词词库词条表
+    op.create_table(
+        'vio_lexicon_terms',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('term', sa.VARCHAR(100), nullable=False, unique=True),
+        sa.Column('category', sa.VARCHAR(50), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('is_deleted', sa.Boolean, nullable=True)
+    )
+    op.create_index('ix_vio_lexicon_terms_id', 'vio_lexicon_terms', ['id'])
+    op.create_index('ix_vio_lexicon_terms_category', 'vio_lexicon_terms', ['category'])
+
+def downgrade():
+    # 删除违规词词库表
+    op.drop_index('ix_vio_lexicon_terms_category', 'vio_lexicon_terms')
+    op.drop_index('ix_vio_lexicon_terms_id', 'vio_lexicon_terms')
+    op.drop_table('vio_lexicon_terms')
+    op.drop_table('vio_lexicon_categories')
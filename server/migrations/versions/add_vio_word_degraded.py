@@ -0,0 +1,23 @@
+"""add degraded flag to vio_word
+
+Revision ID: add_vio_word_degraded
+Revises: add_vio_word_term_rollup
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_degraded'
+down_revision = 'add_vio_word_term_rollup'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 添加降级结果标记字段，降级记录不参与近似重复复用、分类器训练和违规词汇总
+    op.add_column('vio_word', sa.Column('degraded', sa.Boolean, nullable=False, server_default=sa.false()))
+
+def downgrade():
+    # 删除降级结果标记字段
+    op.drop_column('vio_word', 'degraded')
@@ -0,0 +1,49 @@
+"""add full-text index to vio_word
+
+Revision ID: add_vio_word_fts
+Revises: add_vio_word_phone_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_fts'
+down_revision = 'add_vio_word_phone_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 创建 FTS5 全文索引(trigram 分词)，外部内容表指向 vio_word
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS vio_word_fts USING fts5(
+            input, words, reasons, op, content='vio_word', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    # 触发器随 vio_word 的增删改同步索引
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS vio_word_fts_ai AFTER INSERT ON vio_word BEGIN
+            INSERT INTO vio_word_fts(rowid, input, words, reasons, op) VALUES (new.id, new.input, new.words, new.reasons, new.op);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS vio_word_fts_ad AFTER DELETE ON vio_word BEGIN
+            INSERT INTO vio_word_fts(vio_word_fts, rowid, input, words, reasons, op) VALUES ('delete', old.id, old.input, old.words, old.reasons, old.op);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS vio_word_fts_au AFTER UPDATE OF input, words, reasons, op ON vio_word BEGIN
+            INSERT INTO vio_word_fts(vio_word_fts, rowid, input, words, reasons, op) VALUES ('delete', old.id, old.input, old.words, old.reasons, old.op);
+            INSERT INTO vio_word_fts(rowid, input, words, reasons, op) VALUES (new.id, new.input, new.words, new.reasons, new.op);
+        END
+    """)
+    # 为已有记录建立索引
+    op.execute("INSERT INTO vio_word_fts(vio_word_fts) VALUES ('rebuild')")
+
+def downgrade():
+    # 删除触发器和全文索引
+    op.execute("DROP TRIGGER IF EXISTS vio_word_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS vio_word_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS vio_word_fts_ai")
+    op.execute("DROP TABLE IF EXISTS vio_word_fts")
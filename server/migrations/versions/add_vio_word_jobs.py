@@ -0,0 +1,40 @@
+"""add vio_word_jobs table
+
+Revision ID: add_vio_word_jobs
+Revises: add_ai_product_id_to_user_entitlements
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_jobs'
+down_revision = 'add_ai_product_id_to_user_entitlements'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 创建违规词检测异步任务队列表
+    op.create_table(
+        'vio_word_jobs',
+        sa.Column('job_id', sa.String(50), primary_key=True),
+        sa.Column('phone', sa.VARCHAR(20), nullable=False),
+        sa.Column('ai_product_id', sa.VARCHAR(50), nullable=True),
+        sa.Column('entitlement_id', sa.String(50), nullable=False),
+        sa.Column('input', sa.VARCHAR(255), nullable=False),
+        sa.Column('status', sa.VARCHAR(20), nullable=False),
+        sa.Column('result', sa.Text, nullable=True),
+        sa.Column('error', sa.VARCHAR(255), nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('started_at', sa.DateTime, nullable=True),
+        sa.Column('finished_at', sa.DateTime, nullable=True)
+    )
+    op.create_index('ix_vio_word_jobs_job_id', 'vio_word_jobs', ['job_id'])
+    op.create_index('ix_vio_word_jobs_status', 'vio_word_jobs', ['status'])
+
+def downgrade():
+    # 删除违规词检测异步任务队列表
+    op.drop_index('ix_vio_word_jobs_status', 'vio_word_jobs')
+    op.drop_index('ix_vio_word_jobs_job_id', 'vio_word_jobs')
+    op.drop_table('vio_word_jobs')
@@ -0,0 +1,23 @@
+"""add phone history index to vio_word
+
+Revision ID: add_vio_word_phone_index
+Revises: add_vio_lexicon
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_phone_index'
+down_revision = 'add_vio_lexicon'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 按手机号查询检测历史的组合索引(过滤逻辑删除，按创建时间倒序分页)
+    op.create_index('ix_vio_word_phone_deleted_created', 'vio_word', ['phone', 'is_deleted', 'created_at'])
+
+def downgrade():
+    # 删除组合索引
+    op.drop_index('ix_vio_word_phone_deleted_created', table_name='vio_word')
@@ -0,0 +1,23 @@
+"""add simhash to vio_word
+
+Revision ID: add_vio_word_simhash
+Revises: add_vio_word_jobs
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_simhash'
+down_revision = 'add_vio_word_jobs'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 添加输入内容的 SimHash 指纹字段，历史记录在加载近似重复索引时补算
+    op.add_column('vio_word', sa.Column('simhash', sa.BigInteger, nullable=True))
+
+def downgrade():
+    # 删除 SimHash 指纹字段
+    op.drop_column('vio_word', 'simhash')
@@ -0,0 +1,32 @@
+"""add ai_product_id to vio_word and daily term rollup table
+
+Revision ID: add_vio_word_term_rollup
+Revises: add_vio_word_fts
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_vio_word_term_rollup'
+down_revision = 'add_vio_word_fts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 检测记录添加AI产品ID字段
+    op.add_column('vio_word', sa.Column('ai_product_id', sa.VARCHAR(50), nullable=True))
+    # 创建违规词按天汇总表，已有记录通过 python -m apps.vio_word.rollup backfill 补算
+    op.create_table(
+        'vio_word_term_daily',
+        sa.Column('day', sa.Date, primary_key=True),
+        sa.Column('ai_product_id', sa.VARCHAR(50), primary_key=True),
+        sa.Column('term', sa.VARCHAR(100), primary_key=True),
+        sa.Column('count', sa.Integer, nullable=False)
+    )
+
+def downgrade():
+    # 删除违规词按天汇总表和AI产品ID字段
+    op.drop_table('vio_word_term_daily')
+    op.drop_column('vio_word', 'ai_product_id')
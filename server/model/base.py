@@ -1,4 +1,7 @@
+import time
 from openai import AsyncOpenAI
+from core.limiter import llm_limiter
+from core.tokens import count_messages, count_tokens, trim_messages, token_meter
 
 class AiChat:
     def __init__(self):
@@ -23,17 +26,30 @@ class AiChat:
             "content": content
         }
         self.chat_context.append(messages)
+        # 上下文超过 token 上限时丢弃最早的历史消息
+        trimmed = trim_messages(self.chat_context)
+        truncated = len(trimmed) < len(self.chat_context)
+        self.chat_context = trimmed
+        prompt_tokens = count_messages(self.chat_context)
+        system_tokens = sum(count_tokens(message["content"]) for message in self.chat_context if message["role"] == "system")
 
-        response = await client.chat.completions.create(
-            model="",  # 模型名称
-            messages=self.chat_context,
-            temperature=0.3,
-            stream=True
-        )
+        # 与其他大模型调用共享自适应并发限制，流式输出结束后释放许可
+        async with llm_limiter.acquire():
+            started = time.monotonic()
+            response = await client.chat.completions.create(
+                model="",  # 模型名称
+                messages=self.chat_context,
+                temperature=0.3,
+                stream=True
+            )
 
-        async for chunk in response:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            completion = []
+            async for chunk in response:
+                if chunk.choices[0].delta.content:
+                    completion.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            token_meter.record("chat", prompt_tokens, count_tokens("".join(completion)), time.monotonic() - started,
+                               system_tokens, truncated)
 
     async def load_chat_history(self, history: list):
         """
@@ -0,0 +1,33 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+import pytest
+
+# 测试从 server 目录导入 apps / core
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    临时 SQLite 数据库
+    用法: async with database() as db: ...  (每次进入时建表，退出时关闭引擎)
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from core.database import Base
+    from apps.vio_word import models  # noqa: F401 注册数据表
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+
+    @asynccontextmanager
+    async def open_session():
+        engine = create_async_engine(url)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                yield db
+        finally:
+            await engine.dispose()
+
+    return open_session
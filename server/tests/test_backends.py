@@ -0,0 +1,47 @@
+import asyncio
+import json
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from apps.vio_word.backends import DEFAULT_FAKE_OUTPUTS, FakeChatModel, LatencyModel, RecordReplayChatModel
+from apps.vio_word.prompts import PROMPT_DETECT, PROMPT_SCORE
+
+
+def test_latency_model_specs():
+    assert LatencyModel("fixed:300").sample() == pytest.approx(0.3)
+    uniform = LatencyModel("uniform:100,200", seed=1)
+    assert all(0.1 <= uniform.sample() <= 0.2 for _ in range(100))
+    assert LatencyModel("lognormal:300,0.4", seed=1).sample() > 0
+    for spec in ("fixed", "uniform:100", "normal:1,2"):
+        with pytest.raises(ValueError):
+            LatencyModel(spec)
+
+
+def test_fake_model_answers_by_stage():
+    model = FakeChatModel(latency=0)
+    detect = model.invoke(PROMPT_DETECT.format_messages(input="国家级床垫"))
+    assert json.loads(detect.content) == DEFAULT_FAKE_OUTPUTS["detect"]
+    score = model.invoke(PROMPT_SCORE.format_messages(input="a", words="b", op="c"))
+    assert json.loads(score.content) == DEFAULT_FAKE_OUTPUTS["score"]
+    unknown = model.invoke([SystemMessage(content="其他提示词"), HumanMessage(content="x")])
+    assert json.loads(unknown.content) == {"is_Violations": "否"}
+
+
+def test_record_then_replay(tmp_path):
+    messages = PROMPT_DETECT.format_messages(input="国家级床垫")
+
+    async def main():
+        recorder = RecordReplayChatModel(inner=FakeChatModel(latency=0), mode="record",
+                                         record_dir=str(tmp_path), model_name="m")
+        recorded = (await recorder.ainvoke(messages)).content
+
+        replayer = RecordReplayChatModel(mode="replay", record_dir=str(tmp_path), model_name="m")
+        assert (await replayer.ainvoke(messages)).content == recorded
+        streamed = "".join([chunk.content async for chunk in replayer.astream(messages)])
+        assert streamed == recorded
+
+        # 模型名称参与录制键
+        other = RecordReplayChatModel(mode="replay", record_dir=str(tmp_path), model_name="other")
+        with pytest.raises(LookupError):
+            await other.ainvoke(messages)
+
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+from apps.vio_word.chunking import merge_results, split_chunks
+from apps.vio_word.scoring import rating_for
+
+TEXT = "甲乙丙。丁戊己。庚辛壬。"
+CHUNKS = [(0, 4), (4, 8), (8, 12)]
+CLEAN = {"is_Violations": "否", "hits": []}
+
+
+def _violation(words, op, old_score, new_score, hits=()):
+    return {
+        "is_Violations": "是", "words": words, "reason": f"{words}违规", "ideas": f"删除{words}",
+        "op": op, "old_score": old_score, "new_score": new_score, "hits": list(hits)
+    }
+
+
+def test_merge_all_clean():
+    merged = merge_results(TEXT, CHUNKS, [CLEAN, CLEAN, CLEAN])
+    assert merged["is_Violations"] == "否"
+    assert [chunk["start"] for chunk in merged["chunks"]] == [0, 4, 8]
+    assert "words" not in merged and "degraded" not in merged
+
+
+def test_merge_combines_violations():
+    results = [
+        CLEAN,
+        _violation("丁戊,己", "XX。", 50, 90, [{"word": "丁戊", "start": 0, "end": 2}]),
+        _violation("己，庚", "YY。", 40, 80, [{"word": "庚", "start": 0, "end": 1}]),
+    ]
+    merged = merge_results(TEXT, CHUNKS, results)
+    assert merged["is_Violations"] == "是"
+    # 违规词去重，未违规分段保留原文
+    assert merged["words"] == "丁戊,己,庚"
+    assert merged["op"] == "甲乙丙。XX。YY。"
+    assert merged["reason"] == "丁戊,己违规;己，庚违规"
+    # 命中位置换算为全文偏移
+    assert [(hit["word"], hit["start"], hit["end"]) for hit in merged["hits"]] == [("丁戊", 4, 6), ("庚", 8, 9)]
+    # 按分段长度加权，未违规分段按 100 分
+    assert merged["old_score"] == round((100 + 50 + 40) * 4 / 12)
+    assert merged["new_score"] == round((100 + 90 + 80) * 4 / 12)
+    assert merged["old_rating"] == rating_for(merged["old_score"])
+
+
+def test_merge_propagates_degraded():
+    results = [CLEAN, {**CLEAN, "degraded": True}, CLEAN]
+    assert merge_results(TEXT, CHUNKS, results)["degraded"] is True
+
+
+def test_split_chunks_cover_text_within_limit():
+    text = "家人们看好了！" * 40 + "这款床垫，" * 30 + "马上抢购" * 50
+    chunks = split_chunks(text, max_chars=60)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(text)
+    assert all(prev_end == start for (_, prev_end), (start, _) in zip(chunks, chunks[1:]))
+    assert all(0 < end - start <= 60 for start, end in chunks)
+
+
+def test_split_chunks_stable_around_edit():
+    sentences = [f"第{i}句话术内容。" for i in range(60)]
+    before = split_chunks("".join(sentences), max_chars=50)
+    edited = sentences[:]
+    edited[30] = "第30句被修改过的话术内容。"
+    text_before, text_after = "".join(sentences), "".join(edited)
+    after = split_chunks(text_after, max_chars=50)
+    # 修改处之前的分段不受影响
+    unchanged = [text_before[start:end] for start, end in before if end <= text_before.index("第30句")]
+    assert unchanged == [text_after[start:end] for start, end in after[:len(unchanged)]]
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+import pytest
+from apps.vio_word import crud
+from apps.vio_word.services import build_vio_word_record
+
+
+def _record(phone, created_at, **extra):
+    return {**build_vio_word_record(phone, "话术", {"is_Violations": "否"}), "created_at": created_at, **extra}
+
+
+def test_cursor_pages_through_equal_created_at(database):
+    async def main():
+        async with database() as db:
+            same = datetime(2026, 10, 1, 12, 0, 0)
+            await crud.create_vio_words(db, [
+                _record("1", datetime(2026, 10, 1, 11, 0, 0)),
+                _record("1", same), _record("1", same), _record("1", same),
+                _record("1", datetime(2026, 10, 1, 13, 0, 0)),
+                _record("1", same, is_deleted=True),
+                _record("2", same),
+            ])
+
+            pages, cursor, total = [], None, None
+            while True:
+                rows, cursor, count = await crud.get_vio_words_by_cursor(db, "1", cursor, page_size=2,
+                                                                         with_total=total is None)
+                total = count if total is None else total
+                assert count is None or count == 5
+                pages.append([row.id for row in rows])
+                if cursor is None:
+                    break
+
+            # 相同创建时间的记录按 ID 倒序，不重复、不遗漏
+            assert pages == [[5, 4], [3, 2], [1]]
+            assert total == 5
+
+    asyncio.run(main())
+
+
+def test_cursor_last_full_page_has_no_next_cursor(database):
+    async def main():
+        async with database() as db:
+            await crud.create_vio_words(db, [_record("1", datetime(2026, 10, 1)) for _ in range(4)])
+            rows, cursor, _ = await crud.get_vio_words_by_cursor(db, "1", page_size=2, with_total=False)
+            rows, cursor, _ = await crud.get_vio_words_by_cursor(db, "1", cursor, page_size=2, with_total=False)
+            assert [row.id for row in rows] == [2, 1]
+            assert cursor is None
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90LWpzb24", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        crud.decode_cursor(cursor)
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from apps.vio_word.backends import DEFAULT_FAKE_OUTPUTS, FakeChatModel
+from apps.vio_word.json_stream import JsonExtractError, JsonExtractor, JsonStage, loads, repair
+from apps.vio_word.prompts import PROMPT_DETECT
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('{"a": 1,\n}', {"a": 1}),
+    ('{"a": "hel', {"a": "hel"}),
+    ('{"a": "x\\', {"a": "x"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+    ('{"a": 1, ', {"a": 1}),
+    ('{"a": "第一行\n第二行\t"}', {"a": "第一行\n第二行\t"}),
+    ('{"a": "逗号,}括号"', {"a": "逗号,}括号"}),
+])
+def test_loads_repairs(text, expected):
+    assert loads(text) == expected
+
+
+def test_repair_leaves_valid_json_unchanged():
+    text = '{"a": [1, {"b": "c"}], "d": "e,]"}'
+    assert repair(text) == text
+
+
+@pytest.mark.parametrize("text", ["[1, 2]", "不是JSON", '{"a": tr'])
+def test_loads_rejects(text):
+    with pytest.raises(JsonExtractError):
+        loads(text)
+
+
+def test_extractor_stops_at_top_level_close():
+    extractor = JsonExtractor()
+    chunks = ['好的，结果如下:\n```json\n{"words": "}{", ', '"nested": {"c": [1]', '}}\n```\n以上是检测结果', '多余输出']
+    done = [extractor.feed(chunk) for chunk in chunks]
+    assert done == [False, False, True, True]
+    assert extractor.text == '{"words": "}{", "nested": {"c": [1]}}'
+    assert extractor.result() == {"words": "}{", "nested": {"c": [1]}}
+
+
+def test_extractor_truncated_output():
+    extractor = JsonExtractor()
+    extractor.feed('{"is_Violations": "是", "words": "国家')
+    assert extractor.partial() == {"is_Violations": "是", "words": "国家"}
+    assert extractor.result() == {"is_Violations": "是", "words": "国家"}
+
+
+def test_extractor_partial_falls_back_to_safe_point():
+    extractor = JsonExtractor()
+    extractor.feed('{"a": 1, "b": tr')
+    assert extractor.partial() == {"a": 1}
+
+
+def test_extractor_without_object():
+    extractor = JsonExtractor()
+    assert extractor.feed("没有JSON") is False
+    assert extractor.partial() is None
+    with pytest.raises(JsonExtractError):
+        extractor.result()
+
+
+def test_stage_stream_ends_with_full_result():
+    async def main():
+        stage = JsonStage(PROMPT_DETECT, FakeChatModel(latency=0))
+        partials = [partial async for partial in stage.astream({"input": "国家级床垫"})]
+        assert len(partials) > 1
+        assert partials[-1] == DEFAULT_FAKE_OUTPUTS["detect"]
+        assert await stage.ainvoke({"input": "国家级床垫"}) == DEFAULT_FAKE_OUTPUTS["detect"]
+
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from core.limiter import AdaptiveLimiter
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+async def _call(limiter, exc=None, delay=0.0):
+    async with limiter.acquire():
+        await asyncio.sleep(delay)
+        if exc is not None:
+            raise exc
+
+
+def test_additive_increase_only_when_saturated():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=1, max_limit=4)
+        await _call(limiter)
+        assert limiter.limit == pytest.approx(2)
+        # 只用了一半的并发上限，不再增加
+        await _call(limiter)
+        assert limiter.limit == pytest.approx(2)
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("exc", [asyncio.TimeoutError(), RateLimited()])
+def test_multiplicative_decrease_on_overload(exc):
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=8, backoff=0.5)
+        with pytest.raises(type(exc)):
+            await _call(limiter, exc)
+        assert limiter.limit == pytest.approx(4)
+        assert limiter.counters["decreases"] == 1
+
+    asyncio.run(main())
+
+
+def test_concurrent_overloads_decrease_once():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=8, backoff=0.5)
+        results = await asyncio.gather(*(_call(limiter, RateLimited(), delay=0.01) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, RateLimited) for result in results)
+        assert limiter.limit == pytest.approx(4)
+        assert limiter.counters["overloads"] == 3
+        assert limiter.counters["decreases"] == 1
+
+    asyncio.run(main())
+
+
+def test_slow_call_counts_as_overload_and_limit_stays_above_min():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=1, min_limit=1, latency_target=0.001)
+        await _call(limiter, delay=0.01)
+        assert limiter.counters["overloads"] == 1
+        assert limiter.limit == pytest.approx(1)
+
+    asyncio.run(main())
+
+
+def test_other_errors_leave_limit_unchanged():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=4)
+        with pytest.raises(ValueError):
+            await _call(limiter, ValueError())
+        assert limiter.limit == pytest.approx(4)
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_waiters_served_in_order_and_cancelled_waiter_skipped():
+    async def main():
+        limiter = AdaptiveLimiter("test", initial=1, max_limit=1)
+        order = []
+
+        async def worker(name):
+            async with limiter.acquire():
+                order.append(name)
+
+        async with limiter.acquire():
+            tasks = [asyncio.create_task(worker(name)) for name in ("a", "b", "c")]
+            await asyncio.sleep(0)
+            tasks[1].cancel()
+            await asyncio.sleep(0)
+            assert limiter.stats()["queue_length"] == 2
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert order == ["a", "c"]
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import pytest
+from apps.vio_word import lexicon
+from apps.vio_word.matcher import AhoCorasick
+
+
+@pytest.fixture
+def builtin_lexicon(monkeypatch):
+    # 不受磁盘上已发布词库版本的影响
+    compiled = lexicon.CompiledLexicon("test", lexicon.DEFAULT_LEXICON, lexicon.compile_lexicon(lexicon.DEFAULT_LEXICON))
+    monkeypatch.setattr(lexicon, "_active", compiled)
+
+
+def test_find_leftmost_longest():
+    matcher = AhoCorasick.build({"最好": "a", "最好的": "b", "好的产品": "c"})
+    assert matcher.find("这是最好的产品") == [{"word": "最好的", "category": "b", "start": 2, "end": 5}]
+
+
+def test_find_overlapping_keeps_all_hits():
+    matcher = AhoCorasick.build({"最好": "a", "最好的": "b", "好的产品": "c"})
+    hits = matcher.find("这是最好的产品", overlapping=True)
+    assert [(hit["word"], hit["start"], hit["end"]) for hit in hits] == [
+        ("最好的", 2, 5), ("最好", 2, 4), ("好的产品", 3, 7)
+    ]
+
+
+def test_find_follows_failure_links():
+    matcher = AhoCorasick.build({"he": "x", "she": "x", "his": "x", "hers": "x"})
+    assert [(hit["word"], hit["start"]) for hit in matcher.find("ushers")] == [("she", 1)]
+    assert sorted(hit["word"] for hit in matcher.find("ushers", overlapping=True)) == ["he", "hers", "she"]
+
+
+def test_find_without_matches():
+    matcher = AhoCorasick.build({"根治": "医疗功效"})
+    assert matcher.find("") == []
+    assert matcher.find("普通的床垫") == []
+
+
+@pytest.mark.parametrize("text, word, original", [
+    ("这款国*家*级床垫", "国家级", "国*家*级"),
+    ("彻底根\u200b治腰痛", "根治", "根\u200b治"),
+    ("國家級產品", "国家级", "國家級"),
+    ("保证１００％有效", "100%", "１００％"),
+])
+def test_prefilter_maps_offsets_to_original(builtin_lexicon, text, word, original):
+    hits = lexicon.prefilter(text)
+    assert [hit["word"] for hit in hits] == [word]
+    assert text[hits[0]["start"]:hits[0]["end"]] == original
+
+
+def test_prefilter_plain_text_offsets(builtin_lexicon):
+    text = "家人们，这是最好的产品，骨折价"
+    hits = lexicon.prefilter(text)
+    assert [(hit["word"], text[hit["start"]:hit["end"]]) for hit in hits] == [("最好", "最好"), ("骨折价", "骨折价")]
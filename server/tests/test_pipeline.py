@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from apps.vio_word.backends import FakeChatModel
+from apps.vio_word.core import run_pipeline
+
+INPUT = "这款国家级床垫根治腰痛"
+
+
+class CountingModel(FakeChatModel):
+    """统计模型调用次数的假模型"""
+    calls: int = 0
+
+    def _content(self, messages):
+        self.calls += 1
+        return super()._content(messages)
+
+
+def test_combined_mode_single_call_same_result_as_staged():
+    async def main():
+        staged_model = CountingModel(latency=0)
+        combined_model = CountingModel(latency=0)
+        staged = await run_pipeline(INPUT, [], mode="staged", model=staged_model)
+        combined = await run_pipeline(INPUT, [], mode="combined", model=combined_model)
+        assert combined_model.calls == 1
+        assert staged_model.calls > 1
+        assert combined == staged
+
+    asyncio.run(main())
+
+
+def test_combined_mode_not_violation():
+    async def main():
+        model = CountingModel(latency=0, outputs={"combined": {"is_Violations": "否"}})
+        assert await run_pipeline(INPUT, [], mode="combined", model=model) == {"is_Violations": "否"}
+        assert model.calls == 1
+
+    asyncio.run(main())
+
+
+def test_unknown_pipeline_mode():
+    with pytest.raises(ValueError):
+        asyncio.run(run_pipeline(INPUT, [], mode="parallel", model=CountingModel(latency=0)))
@@ -0,0 +1,66 @@
+import asyncio
+import time
+import pytest
+from apps.vio_word import core
+from apps.vio_word.llm import LLMRegistry
+from apps.vio_word.resilience import CircuitBreaker, ResilientChain, ResilientInvoker, StageTimeoutError
+
+SAMPLE_INPUT = "这款国家级专利床垫彻底根治腰间盘突出"
+
+
+class HangingStream:
+    """先输出一块，然后不再返回"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def astream(self, inputs: dict):
+        try:
+            yield {"op": "这款"}
+            await asyncio.sleep(3600)
+        finally:
+            self.closed = True
+
+
+class Detect:
+    async def ainvoke(self, inputs: dict):
+        return {"is_Violations": "是", "words": "国家级,根治", "reason": "绝对化用语;医疗功效"}
+
+
+def make_invoker(timeout: float) -> ResilientInvoker:
+    return ResilientInvoker(breaker=CircuitBreaker(), timeouts={"optimize": timeout}, hedge=False)
+
+
+def test_astream_raises_stage_timeout():
+    async def main():
+        upstream = HangingStream()
+        invoker = make_invoker(0.1)
+        chain = ResilientChain("optimize", upstream, invoker)
+        chunks = []
+        started = time.monotonic()
+        with pytest.raises(StageTimeoutError):
+            async for chunk in chain.astream({"input": SAMPLE_INPUT}):
+                chunks.append(chunk)
+        assert time.monotonic() - started < 1
+        assert chunks == [{"op": "这款"}]
+        assert upstream.closed
+        assert invoker.counters["timeouts"] == 1
+
+    asyncio.run(main())
+
+
+def test_stream_check_degrades_when_optimize_hangs(monkeypatch):
+    async def main():
+        invoker = make_invoker(0.1)
+        monkeypatch.setattr(LLMRegistry, "_chains", {
+            "detect": Detect(),
+            "optimize": ResilientChain("optimize", HangingStream(), invoker)
+        })
+        monkeypatch.setattr(core.result_cache, "enabled", False)
+        events = []
+        async for event, data in core.vio_word_check_stream(SAMPLE_INPUT):
+            events.append((event, data))
+        assert [event for event, _ in events] == ["verdict", "op", "done"]
+        assert events[-1][1]["degraded"] is True
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from apps.vio_word.singleflight import SingleFlight
+
+
+def test_followers_share_leader_result():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["ok"] * 5
+        assert calls == 1
+        assert flight.stats()["inflight"] == 0
+
+    asyncio.run(main())
+
+
+def test_leader_cancelled_follower_still_gets_result():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await started.wait()
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "ok"
+        assert flight.counters == {"leaders": 1, "shared": 1}
+
+    asyncio.run(main())
+
+
+def test_all_waiters_cancelled_cancels_work():
+    async def main():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert flight.stats()["inflight"] == 0
+
+    asyncio.run(main())
+
+
+def test_exception_propagates_to_all_waiters():
+    async def main():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(main())
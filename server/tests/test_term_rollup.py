@@ -0,0 +1,70 @@
+import asyncio
+from collections import Counter
+from datetime import date, datetime
+from sqlalchemy import select
+from apps.vio_word import crud
+from apps.vio_word.models import Vio_word_term_daily
+from apps.vio_word.services import build_vio_word_record
+
+DAY = date(2026, 10, 1)
+
+
+async def _rows(db):
+    result = await db.execute(
+        select(Vio_word_term_daily.ai_product_id, Vio_word_term_daily.term, Vio_word_term_daily.count)
+        .order_by(Vio_word_term_daily.ai_product_id, Vio_word_term_daily.term)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+def _record(words, ai_product_id="p1", created_at=datetime(2026, 10, 1, 8), **result):
+    record = build_vio_word_record("1", "话术", {"is_Violations": "是", "words": words, **result}, ai_product_id)
+    return {**record, "created_at": created_at}
+
+
+def test_term_rollup_deltas():
+    deltas = crud.term_rollup_deltas([
+        _record("最好,第一,最好"),
+        _record("最好", ai_product_id=None),
+        _record("第一", degraded=True),
+        {**_record("第一"), "is_violation": False},
+    ])
+    # 同一条记录中重复的词计一次，降级结果和未违规记录不计
+    assert deltas == Counter({(DAY, "p1", "最好"): 1, (DAY, "p1", "第一"): 1, (DAY, "", "最好"): 1})
+
+
+def test_apply_upsert_and_clamped_decrement(database):
+    async def main():
+        async with database() as db:
+            await crud.apply_term_rollup(db, Counter({(DAY, "p1", "a"): 2}))
+            await crud.apply_term_rollup(db, Counter({(DAY, "p1", "a"): 1}))
+            assert await _rows(db) == [("p1", "a", 3)]
+
+            # 扣除不低于 0，也不为没有汇总行的词插入负数
+            await crud.apply_term_rollup(db, Counter({(DAY, "p1", "a"): 5, (DAY, "p1", "b"): 1}), sign=-1)
+            assert await _rows(db) == [("p1", "a", 0)]
+            await crud.apply_term_rollup(db, Counter({(DAY, "p1", "a"): 1}))
+            assert await _rows(db) == [("p1", "a", 1)]
+
+    asyncio.run(main())
+
+
+def test_rollup_follows_writes_deletes_and_rebuild(database):
+    async def main():
+        async with database() as db:
+            await crud.create_vio_words(db, [_record("最好,第一"), _record("最好"), _record("最好", ai_product_id="p2")])
+            deleted = await crud.create_vio_word(db, _record("第一"))
+            assert await crud.get_top_terms(db, DAY, DAY) == [{"term": "最好", "count": 3}, {"term": "第一", "count": 2}]
+
+            await crud.delete_vio_word(db, deleted.id)
+            # 重复删除不再扣除
+            await crud.delete_vio_word(db, deleted.id)
+            expected = [("p1", "最好", 2), ("p1", "第一", 1), ("p2", "最好", 1)]
+            assert await _rows(db) == expected
+            assert await crud.get_top_terms(db, DAY, DAY, ai_product_id="p2") == [{"term": "最好", "count": 1}]
+
+            # 全量重算与增量维护的结果一致
+            assert (await crud.rebuild_term_rollup(db))["records"] == 3
+            assert await _rows(db) == expected
+
+    asyncio.run(main())